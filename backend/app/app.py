@@ -1,17 +1,24 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pymongo import MongoClient
 
 from handler.bots import BotHandler
 from handler.knowledge import KnowledgeHandler
 from handler.auth import AuthHandler
+from handler.system import SystemHandler
 
-from core.memory.memory import TokenBufferMemoryMongoDB
+from core.memory.memory import TokenBufferMemoryMongoDB, mongo_client_options
+from core.memory.async_memory import AsyncTokenBufferMemoryMongoDB, AsyncMongoClient
 from core.llm.chat_assistant import ChatAssistant
 from service.auth import AuthService
 from service.file_service import FileService
 from service.bot_service import BotService
 from service.chat_service import ChatService
+from core.rag.ingestion.jobs import IngestionJobQueue, SQLiteJobStore
+from core.rag.ingestion.preview_cache import PreviewCache
+from core.rag.extractor.extract_processor import shutdown_pool as shutdown_extraction_pool
+from app.libs.executors import shutdown_executors
+from core.rag.datasource.pgvector_async import close_async_pools
 
 from configs.config import Settings
 from repository.s3_storage import S3Storage
@@ -20,13 +27,15 @@ from repository.bots import BotRepository
 from repository.users import UserRepository
 
 from middleware.middleware import AuthMiddleware
+from app.utils.dependencies import get_db_session
 
 def create_app():
-   app = FastAPI(title="RAG System API")
+   # Every request gets its own database session
+   app = FastAPI(title="RAG System API", dependencies=[Depends(get_db_session)])
    configs = Settings()
 
    # Initialize MongoDB client
-   mongo_client = MongoClient(configs.MONGODB_URI)
+   mongo_client = MongoClient(configs.MONGODB_URI, **mongo_client_options())
    
    # Initialize services
    s3_storage = S3Storage(
@@ -34,6 +43,7 @@ def create_app():
        aws_access_key_id=configs.AWS_ACCESS_KEY_ID,
        aws_secret_access_key=configs.AWS_SECRET_ACCESS_KEY,
        region_name=configs.AWS_REGION,
+       endpoint_url=configs.S3_ENDPOINT_URL,
    )
 
    memory = TokenBufferMemoryMongoDB(
@@ -41,8 +51,40 @@ def create_app():
        db_name="rag_chat",
        collection_name="conversations",
    )
+   # Chat requests await conversation memory on the async driver when it is available;
+   # the knowledge assistant stays on the sync client
+   async_memory = None
+   if configs.MONGODB_ASYNC and AsyncMongoClient is not None:
+       async_memory = AsyncTokenBufferMemoryMongoDB(
+           client=AsyncMongoClient(configs.MONGODB_URI, **mongo_client_options()),
+           db_name="rag_chat",
+           collection_name="conversations",
+       )
+       app.add_event_handler("startup", async_memory.ensure_indexes)
+       app.add_event_handler("shutdown", async_memory.close)
+   else:
+       app.add_event_handler("startup", memory.ensure_indexes)
+   app.add_event_handler("shutdown", mongo_client.close)
 
-   file_service = FileService(s3_storage)
+   preview_cache = PreviewCache(
+       max_entries=configs.PREVIEW_CACHE_MAX_ENTRIES,
+       max_bytes=configs.PREVIEW_CACHE_MAX_BYTES,
+       ttl=configs.PREVIEW_CACHE_TTL,
+   )
+   file_service = FileService(s3_storage, preview_cache)
+   job_queue = IngestionJobQueue(
+       store=SQLiteJobStore(configs.INGESTION_JOB_DB),
+       handler=file_service.run_ingestion_job,
+       workers=configs.INGESTION_WORKERS,
+       per_tenant_limit=configs.INGESTION_TENANT_CONCURRENCY,
+       on_finished=file_service.discard_spool,
+   )
+   app.add_event_handler("startup", job_queue.start)
+   app.add_event_handler("shutdown", job_queue.shutdown)
+   app.add_event_handler("shutdown", shutdown_extraction_pool)
+   app.add_event_handler("shutdown", preview_cache.clear)
+   app.add_event_handler("shutdown", close_async_pools)
+   app.add_event_handler("shutdown", shutdown_executors)
    chat_assistant = ChatAssistant(memory=memory)
 
    bot_repository = BotRepository(db)
@@ -54,17 +96,19 @@ def create_app():
     settings=configs
 )
 
-   chat_service = ChatService(memory, bot_service)
+   chat_service = ChatService(memory, bot_service, async_memory=async_memory)
 
    # Initialize handlers
    bot_handler = BotHandler(bot_service, chat_service)
-   knowledge_handler = KnowledgeHandler(file_service, chat_assistant)
+   knowledge_handler = KnowledgeHandler(file_service, chat_assistant, job_queue)
    auth_handler = AuthHandler(auth_service)
+   system_handler = SystemHandler()
 
    # Add routers first
    app.include_router(bot_handler.router)
    app.include_router(knowledge_handler.router)
    app.include_router(auth_handler.router)
+   app.include_router(system_handler.router)
 
    app.add_middleware(
         CORSMiddleware,
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from configs.config import config
+
+T = TypeVar("T")
+
+# Pools for blocking calls, one per dependency so that a slow dependency only
+# exhausts its own threads: a burst of LLM calls cannot starve database reads.
+DATABASE = "database"        # SQLAlchemy / psycopg2
+LLM = "llm"                  # OpenAI chat completions and embeddings
+RETRIEVAL = "retrieval"      # dataset retrieval: query embedding plus vector search
+HYBRID_SEARCH = "hybrid-search"  # branches of parallel hybrid search, submitted from RETRIEVAL
+MEMORY = "memory"            # MongoDB conversation memory
+FILES = "files"              # spooling uploads, previews and S3 transfers
+JOBS = "jobs"                # ingestion job store
+AUTH = "auth"                # bcrypt hashing, CPU bound but releases the GIL
+
+
+def _default_sizes() -> dict[str, int]:
+    return {
+        DATABASE: config.EXECUTOR_DATABASE_WORKERS,
+        LLM: config.EXECUTOR_LLM_WORKERS,
+        RETRIEVAL: config.EXECUTOR_RETRIEVAL_WORKERS,
+        HYBRID_SEARCH: config.RETRIEVAL_MAX_WORKERS,
+        MEMORY: config.EXECUTOR_MEMORY_WORKERS,
+        FILES: config.EXECUTOR_FILES_WORKERS,
+        JOBS: config.EXECUTOR_JOBS_WORKERS,
+        AUTH: config.EXECUTOR_AUTH_WORKERS,
+    }
+
+
+class BoundedExecutor:
+    """
+    A named thread pool of ``max_workers`` threads that counts what goes
+    through it: calls waiting for a thread, running and finished, and the
+    time they spent queued and running. Calls beyond ``max_workers`` queue
+    rather than start more threads, so ``queued`` and ``wait_seconds``
+    show when a dependency's pool is too small for its load.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(max_workers, 1)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._peak_active = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        submitted = time.monotonic()
+        with self._lock:
+            self._queued += 1
+
+        def call() -> T:
+            started = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._peak_active = max(self._peak_active, self._active)
+                self._wait_seconds += started - submitted
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._failed += failed
+                    self._run_seconds += time.monotonic() - started
+
+        future = self._pool.submit(call)
+
+        def on_done(f: Future) -> None:
+            # A call cancelled while queued never ran
+            if f.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        future.add_done_callback(on_done)
+        return future
+
+    async def run(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Await ``fn(*args, **kwargs)`` on this pool, with the caller's context variables."""
+        context = contextvars.copy_context()
+        future = self.submit(context.run, functools.partial(fn, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "peak_active": self._peak_active,
+                "queued": self._queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_seconds": round(self._wait_seconds, 3),
+                "run_seconds": round(self._run_seconds, 3),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executors: dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def register_executor(name: str, max_workers: int) -> BoundedExecutor:
+    """Create the pool for ``name`` with ``max_workers`` threads, replacing any earlier one."""
+    executor = BoundedExecutor(name, max_workers)
+    with _executors_lock:
+        previous = _executors.get(name)
+        _executors[name] = executor
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return executor
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """The pool for ``name``, created on first use with its configured size."""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                sizes = _default_sizes()
+                if name not in sizes:
+                    raise KeyError(f"Unknown executor: {name}")
+                executor = _executors[name] = BoundedExecutor(name, sizes[name])
+    return executor
+
+
+async def run_blocking(name: str, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on the pool of the dependency it waits on, without blocking the event loop."""
+    return await get_executor(name).run(fn, *args, **kwargs)
+
+
+def executor_stats() -> dict[str, dict]:
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
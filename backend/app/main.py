@@ -5,7 +5,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
 
-from fastapi import FastAPI, File, UploadFile, Form
+from fastapi import Depends, FastAPI, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import Optional
@@ -14,13 +14,15 @@ import uvicorn
 
 
 # Import core components
-from core.memory.memory import TokenBufferMemoryMongoDB
+from core.memory.memory import TokenBufferMemoryMongoDB, mongo_client_options
 from core.llm.chat_assistant import ChatAssistant
 from core.rag.retrieve.retrieval_service import RetrievalService, RetrievalMethod
 from core.rag.text_splitter.text_splitter import TextSplitter
 from repository.s3_storage import S3Storage
 from service.file_service import FileService
 from configs.config import Settings
+from app.libs.executors import FILES, LLM, RETRIEVAL, run_blocking
+from app.utils.dependencies import get_db_session
 from pydantic import BaseModel
 from typing import Optional
 from fastapi.responses import JSONResponse
@@ -34,7 +36,7 @@ class ChatRequest(BaseModel):
     dataset_id: Optional[str] = None
 
 # Initialize FastAPI app
-app = FastAPI(title="RAG System API")
+app = FastAPI(title="RAG System API", dependencies=[Depends(get_db_session)])
 
 # CORS configuration
 app.add_middleware(
@@ -53,11 +55,12 @@ s3_storage = S3Storage(
     bucket_name=configs.S3_BUCKET,
     aws_access_key_id=configs.AWS_ACCESS_KEY_ID,
     aws_secret_access_key=configs.AWS_SECRET_ACCESS_KEY,
-    region_name=configs.AWS_REGION
+    region_name=configs.AWS_REGION,
+    endpoint_url=configs.S3_ENDPOINT_URL
 )
 
 # Initialize MongoDB and memory
-mongo_client = MongoClient(configs.MONGODB_URI)
+mongo_client = MongoClient(configs.MONGODB_URI, **mongo_client_options())
 memory = TokenBufferMemoryMongoDB(
     client=mongo_client,
     db_name="rag_chat",
@@ -80,11 +83,17 @@ async def preview_file(
     Preview file chunks before processing
     """
     try:
-        # Read file content once
-        content = await file.read()
-        
-        # Get chunks preview by passing the content directly
-        success, chunks, error = file_service.get_chunk_preview(content)
+        # Only the first chunks are split; the total is estimated for large files
+        success, preview, error = await run_blocking(
+            FILES,
+            file_service.get_chunk_preview,
+            file.file,
+            file.filename,
+            None,
+            file.content_type,
+            chunk_size,
+            chunk_overlap
+        )
         
         if not success:
             return JSONResponse(
@@ -97,11 +106,12 @@ async def preview_file(
             'content': doc.page_content,
             'chunk_index': doc.metadata['chunk_index'],
             'chunk_total': doc.metadata['chunk_total']
-        } for doc in chunks]
+        } for doc in preview.chunks]
         
         return {
             'chunks': preview_data,
-            'total_chunks': len(chunks)
+            'total_chunks': preview.total_chunks,
+            'estimated': preview.estimated
         }
         
     except Exception as e:
@@ -123,12 +133,11 @@ async def process_file(
     Process file: upload to S3, create chunks, and store vectors
     """
     try:
-        # Read file content once
-        file_content = await file.read()
-
-        # Pass file content and metadata to the service
-        success, result = file_service.process_file(
-            file_content=file_content,  # Pass file content
+        # Pass the spooled upload and metadata to the service
+        success, result = await run_blocking(
+            FILES,
+            file_service.process_file,
+            file=file.file,             # Streamed, not read into memory
             filename=file.filename,     # Pass filename
             description=description,
             tenant_id=tenant_id,        # Pass tenant_id
@@ -171,7 +180,9 @@ async def chat(request: ChatRequest):
     """
     try:
         # Generate response and retrieve context
-        response, relevant_context = chat_assistant.handle_message(
+        response, relevant_context = await run_blocking(
+            LLM,
+            chat_assistant.handle_message,
             conversation_id=request.conversation_id,
             user_message=request.message,
             dataset_id=request.dataset_id
@@ -201,7 +212,9 @@ async def search_documents(
     Search documents in the dataset
     """
     try:
-        documents = retrieval_service.retrieve(
+        documents = await run_blocking(
+            RETRIEVAL,
+            retrieval_service.retrieve,
             dataset_id=dataset_id,
             query=query,
             search_method=search_method,
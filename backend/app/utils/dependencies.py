@@ -2,6 +2,8 @@ from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from configs.config import config
+from repository.ext_database import begin_session_scope, db, end_session_scope
+from app.libs.executors import DATABASE, run_blocking
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
@@ -13,4 +15,18 @@ async def get_current_user_tenant(token: str = Depends(oauth2_scheme)):
             raise HTTPException(status_code=401, detail="Invalid token")
         return tenant_id
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token credentials")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token credentials")
+
+async def get_db_session():
+    """
+    Request-scoped SQLAlchemy session. Installed as an app-wide dependency,
+    so every repository call made for the request, on the event loop or an
+    executor, uses this session, and it is closed when the request ends.
+    """
+    token = begin_session_scope()
+    try:
+        yield db()
+    finally:
+        # Closing may roll back over the network, so it runs off the event loop
+        await run_blocking(DATABASE, db.remove)
+        end_session_scope(token)
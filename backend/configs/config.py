@@ -16,15 +16,79 @@ class Settings(BaseSettings):
 
     # Embedding Model Settings
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    # Storage precision of cached embeddings: float32 or float16 (half the size, ~3 significant digits)
+    EMBEDDING_CACHE_DTYPE: str = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+    # Per-request limits for document embedding batches (OpenAI allows 2048 inputs / 300k tokens)
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", 512))
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", 100000))
+    # Embedding requests in flight per embed_documents call
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", 4))
+    # Retries per batch on rate limits, connection and server errors
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", 5))
+    # Micro-batching of concurrent query embeddings on cache misses
+    EMBEDDING_COALESCE_ENABLED: bool = os.getenv("EMBEDDING_COALESCE_ENABLED", "true").lower() == "true"
+    EMBEDDING_COALESCE_WINDOW_MS: float = float(os.getenv("EMBEDDING_COALESCE_WINDOW_MS", 5))
+    EMBEDDING_COALESCE_MAX_BATCH: int = int(os.getenv("EMBEDDING_COALESCE_MAX_BATCH", 64))
+    EMBEDDING_COALESCE_MAX_IN_FLIGHT: int = int(os.getenv("EMBEDDING_COALESCE_MAX_IN_FLIGHT", 4))
+    # Seconds a caller waits for its coalesced embedding before giving up
+    EMBEDDING_COALESCE_TIMEOUT: float = float(os.getenv("EMBEDDING_COALESCE_TIMEOUT", 60))
+    # In-process cache of query embeddings in front of the database cache; 0 entries disables it
+    EMBEDDING_MEMORY_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_MEMORY_CACHE_MAX_ENTRIES", 10000))
+    EMBEDDING_MEMORY_CACHE_MAX_BYTES: int = int(os.getenv("EMBEDDING_MEMORY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    EMBEDDING_MEMORY_CACHE_TTL: float = float(os.getenv("EMBEDDING_MEMORY_CACHE_TTL", 3600))
+
+    # Streaming ingestion: bytes read from an upload at a time, chunks per
+    # embed/insert batch and batches buffered between pipeline stages
+    INGESTION_READ_SIZE: int = int(os.getenv("INGESTION_READ_SIZE", 64 * 1024))
+    INGESTION_BATCH_SIZE: int = int(os.getenv("INGESTION_BATCH_SIZE", 256))
+    INGESTION_QUEUE_SIZE: int = int(os.getenv("INGESTION_QUEUE_SIZE", 2))
+    # Background ingestion jobs; INGESTION_JOB_DB is a SQLite path, ":memory:" keeps jobs in-process
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", 2))
+    INGESTION_TENANT_CONCURRENCY: int = int(os.getenv("INGESTION_TENANT_CONCURRENCY", 1))
+    INGESTION_JOB_DB: str = os.getenv("INGESTION_JOB_DB", ":memory:")
+    INGESTION_SPOOL_DIR: str = os.getenv("INGESTION_SPOOL_DIR", "")
+    # Seconds between job progress events on the SSE endpoint
+    INGESTION_EVENTS_INTERVAL: float = float(os.getenv("INGESTION_EVENTS_INTERVAL", 1))
+    # Text extraction process pool (PDF, DOCX, HTML): worker processes, pages per
+    # pool task and tasks in flight per document; 0 workers means one per CPU
+    EXTRACTION_MAX_WORKERS: int = int(os.getenv("EXTRACTION_MAX_WORKERS", 0))
+    EXTRACTION_PAGES_PER_TASK: int = int(os.getenv("EXTRACTION_PAGES_PER_TASK", 16))
+    EXTRACTION_MAX_IN_FLIGHT: int = int(os.getenv("EXTRACTION_MAX_IN_FLIGHT", 4))
+    # Chunk preview: chunks returned by default and at most per request
+    PREVIEW_CHUNKS: int = int(os.getenv("PREVIEW_CHUNKS", 10))
+    PREVIEW_MAX_CHUNKS: int = int(os.getenv("PREVIEW_MAX_CHUNKS", 100))
+    # Previewed uploads kept for the process request that confirms them
+    PREVIEW_CACHE_TTL: float = float(os.getenv("PREVIEW_CACHE_TTL", 900))
+    PREVIEW_CACHE_MAX_ENTRIES: int = int(os.getenv("PREVIEW_CACHE_MAX_ENTRIES", 256))
+    PREVIEW_CACHE_MAX_BYTES: int = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
 
     # MongoDB Settings
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+    # Conversation memory client: async (pymongo AsyncMongoClient, awaited on the event loop) or sync
+    MONGODB_ASYNC: bool = os.getenv("MONGODB_ASYNC", "true").lower() == "true"
+    # Connection pool: connections per server, idle ones closed after MAX_IDLE_TIME_MS,
+    # and how long a request waits for a connection or a reachable server
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", 100))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", 0))
+    MONGODB_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 300000))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 10000))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 10000))
 
     # AWS Settings
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "your_aws_access_key_id")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "your_aws_secret_access_key")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     S3_BUCKET: str = os.getenv("S3_BUCKET", "your_s3_bucket_name")
+    # Custom S3 endpoint, e.g. a local MinIO or moto server; empty for AWS
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")
+    # Multipart uploads: part size in bytes (at least 5 MiB) and parts uploaded in parallel
+    S3_MULTIPART_PART_SIZE: int = int(os.getenv("S3_MULTIPART_PART_SIZE", 8 * 1024 * 1024))
+    S3_MULTIPART_CONCURRENCY: int = int(os.getenv("S3_MULTIPART_CONCURRENCY", 4))
+    # Store uploads under the sha256 of their content, once per tenant, reference counted by datasets
+    STORAGE_CONTENT_ADDRESSED: bool = os.getenv("STORAGE_CONTENT_ADDRESSED", "false").lower() == "true"
+    # Local file storage (repository.ext_storage.LocalStorage)
+    STORAGE_LOCAL_PATH: str = os.getenv("STORAGE_LOCAL_PATH", "storage")
+    MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", 100 * 1024 * 1024))
 
     # PGVector Settings
     PGVECTOR_HOST: str = os.getenv("PGVECTOR_HOST", "localhost")
@@ -34,6 +98,53 @@ class Settings(BaseSettings):
     PGVECTOR_DATABASE: str = os.getenv("PGVECTOR_DATABASE", "example_db")
     PGVECTOR_MIN_CONNECTION: int = int(os.getenv("PGVECTOR_MIN_CONNECTION", 1))
     PGVECTOR_MAX_CONNECTION: int = int(os.getenv("PGVECTOR_MAX_CONNECTION", 10))
+    # Seconds to wait for a free pooled connection before giving up
+    PGVECTOR_POOL_TIMEOUT: float = float(os.getenv("PGVECTOR_POOL_TIMEOUT", 30))
+    # Idle connections above PGVECTOR_MIN_CONNECTION are closed after this many seconds
+    PGVECTOR_POOL_IDLE_TIMEOUT: float = float(os.getenv("PGVECTOR_POOL_IDLE_TIMEOUT", 300))
+    # Connections idle for longer than this are pinged before being handed out
+    PGVECTOR_POOL_HEALTH_CHECK_INTERVAL: float = float(os.getenv("PGVECTOR_POOL_HEALTH_CHECK_INTERVAL", 30))
+    # SQLAlchemy engine pool (repository.ext_database): connections kept open, extra
+    # connections allowed under load, seconds before a connection is replaced and
+    # seconds a session waits for a connection before failing
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    # Vector store behind Vector: pgvector (psycopg2) or pgvector_async (asyncpg, one pool
+    # per event loop, sized below); the async store only serves Vector's a-prefixed methods
+    VECTOR_STORE: str = os.getenv("VECTOR_STORE", "pgvector")
+    PGVECTOR_ASYNC_MIN_CONNECTION: int = int(os.getenv("PGVECTOR_ASYNC_MIN_CONNECTION", 1))
+    PGVECTOR_ASYNC_MAX_CONNECTION: int = int(os.getenv("PGVECTOR_ASYNC_MAX_CONNECTION", 20))
+
+    # PGVector ANN index defaults, applied to datasets created without explicit index settings
+    PGVECTOR_INDEX_METHOD: str = os.getenv("PGVECTOR_INDEX_METHOD", "hnsw")  # hnsw | ivfflat
+    PGVECTOR_HNSW_M: int = int(os.getenv("PGVECTOR_HNSW_M", 16))
+    PGVECTOR_HNSW_EF_CONSTRUCTION: int = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", 64))
+    PGVECTOR_HNSW_EF_SEARCH: int = int(os.getenv("PGVECTOR_HNSW_EF_SEARCH", 40))
+    PGVECTOR_IVFFLAT_LISTS: int = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", 0))  # 0 = derive from row count
+    PGVECTOR_IVFFLAT_PROBES: int = int(os.getenv("PGVECTOR_IVFFLAT_PROBES", 10))
+    PGVECTOR_INDEX_MAINTENANCE_WORK_MEM: str = os.getenv("PGVECTOR_INDEX_MAINTENANCE_WORK_MEM", "")
+    # Postgres text search configuration for new datasets, e.g. english, russian or simple
+    PGVECTOR_TEXT_SEARCH_CONFIG: str = os.getenv("PGVECTOR_TEXT_SEARCH_CONFIG", "english")
+
+    # Hybrid retrieval: "server" fuses both branches in one SQL statement where the
+    # store supports it, "parallel" runs the semantic and full-text branches concurrently
+    RETRIEVAL_HYBRID_MODE: str = os.getenv("RETRIEVAL_HYBRID_MODE", "server")
+    RETRIEVAL_MAX_WORKERS: int = int(os.getenv("RETRIEVAL_MAX_WORKERS", 16))
+    # Per-branch timeouts (seconds) for parallel hybrid search; the semantic one covers the query embedding call
+    RETRIEVAL_SEMANTIC_TIMEOUT: float = float(os.getenv("RETRIEVAL_SEMANTIC_TIMEOUT", 10))
+    RETRIEVAL_FULL_TEXT_TIMEOUT: float = float(os.getenv("RETRIEVAL_FULL_TEXT_TIMEOUT", 5))
+
+    # Threads per dependency for blocking calls made from request handlers
+    # (app.libs.executors); keep the database one within DB_POOL_SIZE
+    EXECUTOR_DATABASE_WORKERS: int = int(os.getenv("EXECUTOR_DATABASE_WORKERS", 10))
+    EXECUTOR_LLM_WORKERS: int = int(os.getenv("EXECUTOR_LLM_WORKERS", 32))
+    EXECUTOR_RETRIEVAL_WORKERS: int = int(os.getenv("EXECUTOR_RETRIEVAL_WORKERS", 16))
+    EXECUTOR_MEMORY_WORKERS: int = int(os.getenv("EXECUTOR_MEMORY_WORKERS", 8))
+    EXECUTOR_FILES_WORKERS: int = int(os.getenv("EXECUTOR_FILES_WORKERS", 8))
+    EXECUTOR_JOBS_WORKERS: int = int(os.getenv("EXECUTOR_JOBS_WORKERS", 4))
+    EXECUTOR_AUTH_WORKERS: int = int(os.getenv("EXECUTOR_AUTH_WORKERS", 4))
 
     SECRET_KEY: str = os.getenv("SECRET_KEY", "secret_key")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
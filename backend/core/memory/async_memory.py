@@ -0,0 +1,82 @@
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    from pymongo import AsyncMongoClient
+except ImportError:  # pymongo < 4.9
+    AsyncMongoClient = None
+
+from core.entities import PromptMessage
+from core.memory.memory import (
+    HISTORY_BATCH_SIZE,
+    HISTORY_INDEX,
+    HISTORY_PROJECTION,
+    HistoryBudget,
+    history_prompt_text,
+    with_token_count,
+)
+
+
+class AsyncTokenBufferMemoryMongoDB:
+    """
+    TokenBufferMemoryMongoDB on an async Mongo client, with the same methods
+    as coroutines and the same results.
+
+    ``client`` is anything with the async client interface: pymongo's
+    AsyncMongoClient in production, Motor, or an in-memory stand-in such as
+    mongomock_motor.AsyncMongoMockClient in tests.
+    """
+
+    def __init__(self, client: Any, db_name: str, collection_name: str) -> None:
+        self.client = client
+        self.db = self.client[db_name]
+        self.collection = self.db[collection_name]
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index(HISTORY_INDEX)
+
+    async def save_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        await self.collection.insert_one(with_token_count(conversation_id, message))
+
+    async def get_messages(
+        self,
+        conversation_id: str,
+        max_token_limit: int = 2000,
+        message_limit: Optional[int] = None,
+    ) -> Sequence[PromptMessage]:
+        query = {"conversation_id": conversation_id}
+        sort = [("created_at", -1)]
+
+        cursor = self.collection.find(query, HISTORY_PROJECTION).sort(sort).batch_size(HISTORY_BATCH_SIZE)
+        if message_limit:
+            cursor = cursor.limit(message_limit)
+
+        budget = HistoryBudget(max_token_limit)
+        try:
+            async for message in cursor:
+                if not budget.add(message):
+                    break
+        finally:
+            result = cursor.close()
+            if hasattr(result, "__await__"):
+                await result
+
+        return budget.prompt_messages()
+
+    async def get_history_prompt_text(
+        self,
+        conversation_id: str,
+        human_prefix: str = "Human",
+        ai_prefix: str = "Assistant",
+        max_token_limit: int = 2000,
+        message_limit: Optional[int] = None,
+    ) -> str:
+        prompt_messages = await self.get_messages(
+            conversation_id, max_token_limit=max_token_limit, message_limit=message_limit
+        )
+        return history_prompt_text(prompt_messages, human_prefix, ai_prefix)
+
+    async def close(self) -> None:
+        """Close the client's connection pool."""
+        result = self.client.close()
+        if hasattr(result, "__await__"):
+            await result
@@ -1,5 +1,5 @@
-from typing import Optional, Sequence, List, Dict, Any
-from pymongo import MongoClient
+from typing import Optional, Sequence, List, Dict, Any, Iterable
+from pymongo import ASCENDING, DESCENDING, MongoClient
 from pymongo.database import Database
 from core.entities import (
     AssistantPromptMessage,
@@ -7,6 +7,102 @@ from core.entities import (
     UserPromptMessage,
 )
 from datetime import datetime
+from configs.config import config
+from core.rag.embedding.token_counter import get_token_counter
+
+# History is read newest first through this index and stops at the token budget
+HISTORY_INDEX = [("conversation_id", ASCENDING), ("created_at", DESCENDING)]
+# Only the fields a prompt message is built from
+HISTORY_PROJECTION = {"_id": 0, "role": 1, "query": 1, "answer": 1, "token_count": 1}
+# Documents fetched per round trip while walking back through a conversation
+HISTORY_BATCH_SIZE = 50
+
+
+def mongo_client_options() -> Dict[str, Any]:
+    """Connection pool settings shared by the sync and async Mongo clients."""
+    return {
+        "maxPoolSize": config.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": config.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": config.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    }
+
+
+def _to_prompt_message(message: Dict[str, Any]) -> Optional[PromptMessage]:
+    if "query" in message and message.get("role") == "user":
+        return UserPromptMessage(content=message["query"])
+    if "answer" in message and message.get("role") == "assistant":
+        return AssistantPromptMessage(content=message["answer"])
+    return None
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """Tokens of a message's text in the chat model's tokenizer."""
+    prompt_message = _to_prompt_message(message)
+    if prompt_message is None:
+        return 0
+    return get_token_counter(config.OPENAI_MODEL)(prompt_message.content)
+
+
+def with_token_count(conversation_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """The document stored for ``message``, with its token count computed once at write time."""
+    document = {"conversation_id": conversation_id, **message}
+    document.setdefault("token_count", count_message_tokens(message))
+    return document
+
+
+class HistoryBudget:
+    """
+    Collects stored messages, newest first, until ``max_token_limit`` tokens;
+    ``add`` returns False once the next message would not fit and reading
+    can stop. The newest message is the turn being answered and is always
+    kept, even on its own over the budget, which only limits older turns.
+    Messages saved before token counts were stored are counted as they are
+    read.
+    """
+
+    def __init__(self, max_token_limit: int):
+        self.max_token_limit = max_token_limit
+        self.total_tokens = 0
+        self._prompt_messages: List[PromptMessage] = []
+
+    def add(self, message: Dict[str, Any]) -> bool:
+        prompt_message = _to_prompt_message(message)
+        if prompt_message is None:
+            return True
+        tokens = message.get("token_count")
+        if tokens is None:
+            tokens = count_message_tokens(message)
+        if self._prompt_messages and self.total_tokens + tokens > self.max_token_limit:
+            return False
+        self.total_tokens += tokens
+        self._prompt_messages.append(prompt_message)
+        return True
+
+    def prompt_messages(self) -> List[PromptMessage]:
+        """The collected messages, oldest first."""
+        return self._prompt_messages[::-1]
+
+
+def to_prompt_messages(messages: Iterable[Dict[str, Any]], max_token_limit: int) -> List[PromptMessage]:
+    """The newest of ``messages`` (given newest first) that fit in ``max_token_limit``, oldest first."""
+    budget = HistoryBudget(max_token_limit)
+    for message in messages:
+        if not budget.add(message):
+            break
+    return budget.prompt_messages()
+
+
+def history_prompt_text(prompt_messages: Sequence[PromptMessage], human_prefix: str, ai_prefix: str) -> str:
+    string_messages = []
+    for message in prompt_messages:
+        if isinstance(message, UserPromptMessage):
+            string_messages.append(f"{human_prefix}: {message.content}")
+        elif isinstance(message, AssistantPromptMessage):
+            string_messages.append(f"{ai_prefix}: {message.content}")
+
+    return "\n".join(string_messages)
 
 
 class TokenBufferMemoryMongoDB:
@@ -15,8 +111,11 @@ class TokenBufferMemoryMongoDB:
         self.db: Database = self.client[db_name]
         self.collection = self.db[collection_name]
 
+    def ensure_indexes(self) -> None:
+        self.collection.create_index(HISTORY_INDEX)
+
     def save_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
-        self.collection.insert_one({"conversation_id": conversation_id, **message})
+        self.collection.insert_one(with_token_count(conversation_id, message))
 
     def get_messages(
         self,
@@ -27,28 +126,14 @@ class TokenBufferMemoryMongoDB:
         query = {"conversation_id": conversation_id}
         sort = [("created_at", -1)]
 
-        cursor = self.collection.find(query).sort(sort)
+        cursor = self.collection.find(query, HISTORY_PROJECTION).sort(sort).batch_size(HISTORY_BATCH_SIZE)
         if message_limit:
             cursor = cursor.limit(message_limit)
 
-        messages = list(cursor)
-        messages.reverse()
-
-        prompt_messages: List[PromptMessage] = []
-        total_tokens = 0
-
-        for msg in messages:
-            if "query" in msg and msg.get("role") == "user":
-                prompt_messages.append(UserPromptMessage(content=msg["query"]))
-                total_tokens += len(msg["query"])
-            if "answer" in msg and msg.get("role") == "assistant":
-                prompt_messages.append(AssistantPromptMessage(content=msg["answer"]))
-                total_tokens += len(msg["answer"])
-
-            if total_tokens > max_token_limit:
-                break
-
-        return prompt_messages
+        try:
+            return to_prompt_messages(cursor, max_token_limit)
+        finally:
+            cursor.close()
 
     def get_history_prompt_text(
         self,
@@ -62,11 +147,4 @@ class TokenBufferMemoryMongoDB:
             conversation_id, max_token_limit=max_token_limit, message_limit=message_limit
         )
 
-        string_messages = []
-        for message in prompt_messages:
-            if isinstance(message, UserPromptMessage):
-                string_messages.append(f"{human_prefix}: {message.content}")
-            elif isinstance(message, AssistantPromptMessage):
-                string_messages.append(f"{ai_prefix}: {message.content}")
-
-        return "\n".join(string_messages)
+        return history_prompt_text(prompt_messages, human_prefix, ai_prefix)
@@ -1,15 +1,19 @@
 import json
+import math
+import re
+import threading
 import uuid
 from contextlib import contextmanager
-from typing import Any, List
+from typing import Any, List, Optional
 
+import numpy as np
 import psycopg2.extras
-import psycopg2.pool
 from pydantic import BaseModel, model_validator
 
 from configs.config import config
+from core.rag.datasource.pgvector_pool import get_connection_pool
 from core.rag.datasource.vector_base import AbstractVectorFactory, BaseVector
-from core.rag.datasource.vector_type import VectorType
+from core.rag.datasource.vector_type import HybridFusionMethod, VectorIndexType, VectorType
 from core.rag.embedding.embedding_base import Embeddings
 from core.rag.datasource.document import Document
 from core.rag.models.dataset import Dataset
@@ -24,6 +28,9 @@ class PGVectorConfig(BaseModel):
     database: str
     min_connection: int
     max_connection: int
+    pool_timeout: float = 30.0
+    idle_timeout: float = 300.0
+    health_check_interval: float = 30.0
 
     @model_validator(mode="before")
     @classmethod
@@ -47,46 +54,161 @@ class PGVectorConfig(BaseModel):
         return values
 
 
+class PGVectorIndexConfig(BaseModel):
+    """ANN index settings of a single collection, persisted in ``Dataset.index_struct``."""
+
+    method: VectorIndexType = VectorIndexType.HNSW
+    # HNSW build parameters
+    m: int = 16
+    ef_construction: int = 64
+    # IVFFlat build parameter, derived from the row count at build time when unset
+    lists: Optional[int] = None
+    # Query-time defaults, overridable per search
+    ef_search: int = 40
+    probes: int = 10
+
+    @classmethod
+    def from_config(cls) -> "PGVectorIndexConfig":
+        return cls(
+            method=config.PGVECTOR_INDEX_METHOD,
+            m=config.PGVECTOR_HNSW_M,
+            ef_construction=config.PGVECTOR_HNSW_EF_CONSTRUCTION,
+            lists=config.PGVECTOR_IVFFLAT_LISTS or None,
+            ef_search=config.PGVECTOR_HNSW_EF_SEARCH,
+            probes=config.PGVECTOR_IVFFLAT_PROBES,
+        )
+
+
 SQL_CREATE_TABLE = """
 CREATE TABLE IF NOT EXISTS {table_name} (
     id UUID PRIMARY KEY,
     text TEXT NOT NULL,
     meta JSONB NOT NULL,
-    embedding vector({dimension}) NOT NULL
+    embedding vector({dimension}) NOT NULL,
+    text_tsv tsvector GENERATED ALWAYS AS (to_tsvector('{text_search_config}'::regconfig, coalesce(text, ''))) STORED
 ) using heap;
 """
 
+SQL_CREATE_TSV_INDEX = """
+CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} USING gin (text_tsv);
+"""
+
+SQL_CREATE_HNSW_INDEX = """
+CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}
+USING hnsw (embedding vector_cosine_ops) WITH (m = {m}, ef_construction = {ef_construction});
+"""
+
+SQL_CREATE_IVFFLAT_INDEX = """
+CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}
+USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists});
+"""
+
+# Both candidate sets and their fusion run in one statement, so only the final
+# top_k rows (with text and metadata) leave the server.
+SQL_HYBRID_SEARCH = """
+WITH semantic AS (
+    SELECT id, 1 - distance AS score, row_number() OVER (ORDER BY distance) AS rank
+    FROM (
+        SELECT id, embedding <=> %(vector)s::vector AS distance
+        FROM {table_name}
+        ORDER BY distance
+        LIMIT %(candidates)s
+    ) nearest
+    WHERE 1 - distance > %(score_threshold)s
+),
+full_text AS (
+    SELECT id, score, row_number() OVER (ORDER BY score DESC) AS rank
+    FROM (
+        SELECT id, ts_rank(text_tsv, query) AS score
+        FROM {table_name}, plainto_tsquery(%(text_search_config)s::regconfig, %(query)s) query
+        WHERE text_tsv @@ query
+        ORDER BY score DESC
+        LIMIT %(candidates)s
+    ) matched
+),
+fused AS (
+    SELECT coalesce(s.id, f.id) AS id, {fused_score} AS score, s.score AS semantic_score, f.score AS full_text_score
+    FROM semantic s FULL OUTER JOIN full_text f ON s.id = f.id
+    ORDER BY score DESC
+    LIMIT %(top_k)s
+)
+SELECT t.meta, t.text, fused.score, fused.semantic_score, fused.full_text_score
+FROM fused JOIN {table_name} t ON t.id = fused.id
+ORDER BY fused.score DESC
+"""
+
+# Weights are cast explicitly: drivers that bind typed parameters (asyncpg)
+# would otherwise infer them from the integer ranks
+SQL_WEIGHTED_FUSION = (
+    "%(semantic_weight)s::float8 * coalesce(s.score, 0) + %(full_text_weight)s::float8 * coalesce(f.score, 0)"
+)
+
+SQL_RRF_FUSION = (
+    "coalesce(%(semantic_weight)s::float8 / (%(rrf_k)s + s.rank), 0)"
+    " + coalesce(%(full_text_weight)s::float8 / (%(rrf_k)s + f.rank), 0)"
+)
+
+# Rank offset of reciprocal rank fusion; 60 is the value from the original RRF paper
+RRF_K = 60
+
+# pgvector cannot index vector columns wider than this
+MAX_INDEXED_DIMENSION = 2000
+
+_TEXT_SEARCH_CONFIG_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*(\.[a-z_][a-z0-9_]*)?$")
+
+# Tables known to have the text_tsv column, so the check runs once per process
+_full_text_ready: set[str] = set()
+_full_text_lock = threading.Lock()
+
+SQL_HAS_TSV_COLUMN = "SELECT 1 FROM information_schema.columns WHERE table_name = {param} AND column_name = 'text_tsv'"
+
+
+def _missing_full_text_column(table_name: str) -> RuntimeError:
+    # Adding the column rewrites the table, so it is left to the migration rather than a search request
+    return RuntimeError(
+        f"{table_name} has no text_tsv column; run db/migrations/001_embedding_text_tsv.sql "
+        "with its text_search_config variable set to PGVECTOR_TEXT_SEARCH_CONFIG"
+    )
+
+
+def _default_text_search_config() -> str:
+    return config.PGVECTOR_TEXT_SEARCH_CONFIG
+
+
+def _to_vector_literal(embedding) -> str:
+    """Render a list or NumPy array in pgvector's text input format."""
+    if isinstance(embedding, np.ndarray):
+        embedding = embedding.tolist()
+    return "[" + ",".join(map(str, embedding)) + "]"
+
 
 class PGVector(BaseVector):
-    def __init__(self, collection_name: str, config: PGVectorConfig):
+    def __init__(
+        self,
+        collection_name: str,
+        config: PGVectorConfig,
+        index_config: Optional[PGVectorIndexConfig] = None,
+        text_search_config: Optional[str] = None,
+    ):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self.pool = get_connection_pool(config)
         self.table_name = f"embedding_{collection_name}"
+        self.index_config = index_config or PGVectorIndexConfig.from_config()
+        self.text_search_config = text_search_config or _default_text_search_config()
+        if not _TEXT_SEARCH_CONFIG_PATTERN.match(self.text_search_config):
+            raise ValueError(f"Invalid text search configuration: {self.text_search_config!r}")
 
     def get_type(self) -> str:
         return VectorType.PGVECTOR
 
-    def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
-            config.min_connection,
-            config.max_connection,
-            host=config.host,
-            port=config.port,
-            user=config.user,
-            password=config.password,
-            database=config.database,
-        )
-
     @contextmanager
     def _get_cursor(self):
-        conn = self.pool.getconn()
-        cur = conn.cursor()
-        try:
-            yield cur
-        finally:
-            cur.close()
-            conn.commit()
-            self.pool.putconn(conn)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
 
     def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
 
@@ -94,7 +216,14 @@ class PGVector(BaseVector):
 
         self._create_collection(dimension)
 
-        return self.add_texts(texts, embeddings)
+        pks = self.add_texts(texts, embeddings)
+
+        # Build the ANN index once over the loaded rows instead of maintaining
+        # it row by row during the bulk insert.
+        if kwargs.get("build_index", True):
+            self.create_index(dimension)
+
+        return pks
 
     def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
         values = []
@@ -107,12 +236,16 @@ class PGVector(BaseVector):
                     doc_id,
                     doc.page_content,
                     json.dumps(doc.metadata),
-                    embeddings[i],
+                    _to_vector_literal(embeddings[i]),
                 )
             )
         with self._get_cursor() as cur:
             psycopg2.extras.execute_values(
-                cur, f"INSERT INTO {self.table_name} (id, text, meta, embedding) VALUES %s", values
+                cur,
+                # Conflicts are rows re-sent by a resumed ingestion
+                f"INSERT INTO {self.table_name} (id, text, meta, embedding) VALUES %s ON CONFLICT (id) DO NOTHING",
+                values,
+                template="(%s, %s, %s, %s::vector)",
             )
         return pks
 
@@ -130,6 +263,15 @@ class PGVector(BaseVector):
                 docs.append(Document(page_content=record[1], metadata=record[0]))
         return docs
 
+    def get_doc_hashes(self) -> dict[str, str]:
+        """doc_hash of every stored chunk by id, computed from the text for rows stored without one."""
+        with self._get_cursor() as cur:
+            cur.execute(
+                f"""SELECT id::text, coalesce(meta->>'doc_hash', encode(sha256(convert_to(text, 'UTF8')), 'hex'))
+                FROM {self.table_name}"""
+            )
+            return dict(cur.fetchall())
+
     def delete_by_ids(self, ids: list[str]) -> None:
         with self._get_cursor() as cur:
             cur.execute(f"DELETE FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
@@ -144,12 +286,15 @@ class PGVector(BaseVector):
 
         :param query_vector: The input vector to search for similar items.
         :param top_k: The number of nearest neighbors to return, default is 5.
+        :param ef_search: HNSW candidate list size for this query.
+        :param probes: Number of IVFFlat lists to scan for this query.
         :return: List of Documents that are nearest to the query vector.
         """
         top_k = kwargs.get("top_k", 4)
 
         with self._get_cursor() as cur:
-            vector_str = "[" + ",".join(str(x) for x in query_vector) + "]"
+            self._set_search_params(cur, top_k, **kwargs)
+            vector_str = _to_vector_literal(query_vector)
             cur.execute(
     f"""
     SELECT meta, text, embedding <=> %s::vector AS distance
@@ -172,14 +317,16 @@ class PGVector(BaseVector):
     def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
         top_k = kwargs.get("top_k", 5)
 
+        self._ensure_full_text_column()
+
         with self._get_cursor() as cur:
             cur.execute(
-                f"""SELECT meta, text, ts_rank(to_tsvector(coalesce(text, '')), plainto_tsquery(%s)) AS score
-                FROM {self.table_name}
-                WHERE to_tsvector(text) @@ plainto_tsquery(%s)
+                f"""SELECT meta, text, ts_rank(text_tsv, query) AS score
+                FROM {self.table_name}, plainto_tsquery(%s::regconfig, %s) query
+                WHERE text_tsv @@ query
                 ORDER BY score DESC
-                LIMIT {top_k}""",
-                (query, query),
+                LIMIT %s""",
+                (self.text_search_config, query, top_k),
             )
 
             docs = []
@@ -191,6 +338,51 @@ class PGVector(BaseVector):
 
         return docs
 
+    def search_hybrid(self, query: str, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        """
+        Run semantic and full-text search as CTEs of one statement and fuse them server-side.
+
+        :param top_k: Number of fused results to return, default is 4.
+        :param candidates: Rows taken from each branch before fusion, default is 2 * top_k.
+        :param score_threshold: Minimum cosine similarity for semantic candidates.
+        :param weights: ``{"semantic": float, "full_text": float}``.
+        :param fusion: ``weighted`` sums weighted branch scores, ``rrf`` uses reciprocal rank fusion.
+        :return: Documents whose metadata carries ``score`` (fused), ``semantic_score`` and ``full_text_score``.
+        """
+        top_k = kwargs.get("top_k", 4)
+        candidates = kwargs.get("candidates") or top_k * 2
+        weights = kwargs.get("weights") or {"semantic": 0.5, "full_text": 0.5}
+        fusion = HybridFusionMethod(kwargs.get("fusion") or HybridFusionMethod.WEIGHTED)
+
+        self._ensure_full_text_column()
+
+        fused_score = SQL_RRF_FUSION if fusion == HybridFusionMethod.RECIPROCAL_RANK else SQL_WEIGHTED_FUSION
+        params = {
+            "vector": _to_vector_literal(query_vector),
+            "query": query,
+            "text_search_config": self.text_search_config,
+            "candidates": candidates,
+            "top_k": top_k,
+            "score_threshold": float(kwargs.get("score_threshold") or 0.0),
+            "semantic_weight": float(weights.get("semantic", 0.5)),
+            "full_text_weight": float(weights.get("full_text", 0.5)),
+            "rrf_k": RRF_K,
+        }
+
+        with self._get_cursor() as cur:
+            self._set_search_params(cur, candidates, **kwargs)
+            cur.execute(SQL_HYBRID_SEARCH.format(table_name=self.table_name, fused_score=fused_score), params)
+
+            docs = []
+            for record in cur:
+                metadata, text, score, semantic_score, full_text_score = record
+                metadata["score"] = score
+                metadata["semantic_score"] = semantic_score
+                metadata["full_text_score"] = full_text_score
+                docs.append(Document(page_content=text, metadata=metadata))
+
+        return docs
+
     def delete(self) -> None:
         with self._get_cursor() as cur:
             cur.execute(f"DROP TABLE IF EXISTS {self.table_name}")
@@ -198,28 +390,118 @@ class PGVector(BaseVector):
     def _create_collection(self, dimension: int):
         with self._get_cursor() as cur:
             cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
-            cur.execute(SQL_CREATE_TABLE.format(table_name=self.table_name, dimension=dimension))
+            cur.execute(
+                SQL_CREATE_TABLE.format(
+                    table_name=self.table_name,
+                    dimension=dimension,
+                    text_search_config=self.text_search_config,
+                )
+            )
+            cur.execute(
+                SQL_CREATE_TSV_INDEX.format(index_name=f"{self._collection_name}_tsv_idx", table_name=self.table_name)
+            )
+        with _full_text_lock:
+            _full_text_ready.add(self.table_name)
+
+    def _ensure_full_text_column(self) -> None:
+        """Fail clearly on legacy collections that migration 001 has not given a text_tsv column."""
+        if self.table_name in _full_text_ready:
+            return
+        with self._get_cursor() as cur:
+            cur.execute(SQL_HAS_TSV_COLUMN.format(param="%s"), (self.table_name,))
+            if cur.fetchone() is None:
+                raise _missing_full_text_column(self.table_name)
+        with _full_text_lock:
+            _full_text_ready.add(self.table_name)
+
+    def create_index(self, dimension: Optional[int] = None) -> None:
+        """Build the collection's ANN index if it does not exist yet."""
+        if dimension is not None and dimension > MAX_INDEXED_DIMENSION:
+            logging.warning(
+                "Skipping ANN index on %s: dimension %d exceeds %d",
+                self.table_name, dimension, MAX_INDEXED_DIMENSION,
+            )
+            return
+
+        index_config = self.index_config
+        index_name = f"{self._collection_name}_vec_idx"
+
+        with self._get_cursor() as cur:
+            if config.PGVECTOR_INDEX_MAINTENANCE_WORK_MEM:
+                cur.execute("SET LOCAL maintenance_work_mem = %s", (config.PGVECTOR_INDEX_MAINTENANCE_WORK_MEM,))
+
+            if index_config.method == VectorIndexType.IVFFLAT:
+                lists = index_config.lists or self._default_ivfflat_lists(cur)
+                cur.execute(
+                    SQL_CREATE_IVFFLAT_INDEX.format(index_name=index_name, table_name=self.table_name, lists=int(lists))
+                )
+            else:
+                cur.execute(
+                    SQL_CREATE_HNSW_INDEX.format(
+                        index_name=index_name,
+                        table_name=self.table_name,
+                        m=int(index_config.m),
+                        ef_construction=int(index_config.ef_construction),
+                    )
+                )
+
+    def _default_ivfflat_lists(self, cur) -> int:
+        # pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond that.
+        cur.execute(f"SELECT count(*) FROM {self.table_name}")
+        rows = cur.fetchone()[0]
+        if rows > 1_000_000:
+            return int(math.sqrt(rows))
+        return max(1, rows // 1000)
+
+    def _set_search_params(self, cur, top_k: int, **kwargs: Any) -> None:
+        """Apply query-time index knobs for the current transaction only."""
+        if self.index_config.method == VectorIndexType.IVFFLAT:
+            probes = kwargs.get("probes") or self.index_config.probes
+            cur.execute("SET LOCAL ivfflat.probes = %s", (int(probes),))
+        else:
+            # HNSW can return at most ef_search rows per scan.
+            ef_search = kwargs.get("ef_search") or self.index_config.ef_search
+            cur.execute("SET LOCAL hnsw.ef_search = %s", (max(int(ef_search), int(top_k)),))
 
 
 class PGVectorFactory(AbstractVectorFactory):
     def init_vector(self, dataset: Dataset, attributes: list, embeddings: Embeddings) -> PGVector:
+        collection_name, index_config, text_search_config = self._collection_settings(dataset)
+        return PGVector(
+            collection_name=collection_name,
+            index_config=index_config,
+            text_search_config=text_search_config,
+            config=self._connection_config(),
+        )
+
+    def _collection_settings(self, dataset: Dataset) -> tuple[str, PGVectorIndexConfig, Optional[str]]:
+        """Collection name, ANN index settings and text search configuration stored for ``dataset``."""
+        index_config = PGVectorIndexConfig.from_config()
         if dataset.index_struct_dict:
             class_prefix: str = dataset.index_struct_dict["vector_store"]["class_prefix"]
             collection_name = class_prefix
+            stored_index = dataset.index_struct_dict.get("vector_index")
+            if stored_index:
+                index_config = PGVectorIndexConfig(**{**index_config.model_dump(), **stored_index})
+            text_search_config = dataset.index_struct_dict.get("text_search_config")
         else:
             dataset_id = dataset.id
             collection_name = Dataset.gen_collection_name_by_id(dataset_id)
             dataset.index_struct = json.dumps(self.gen_index_struct_dict(VectorType.PGVECTOR, collection_name))
-
-        return PGVector(
-            collection_name=collection_name,
-            config=PGVectorConfig(
-                host=config.PGVECTOR_HOST,
-                port=config.PGVECTOR_PORT,
-                user=config.PGVECTOR_USER,
-                password=config.PGVECTOR_PASSWORD,
-                database=config.PGVECTOR_DATABASE,
-                min_connection=config.PGVECTOR_MIN_CONNECTION,
-                max_connection=config.PGVECTOR_MAX_CONNECTION,
-            ),
+            text_search_config = None
+        return collection_name, index_config, text_search_config
+
+    @staticmethod
+    def _connection_config() -> PGVectorConfig:
+        return PGVectorConfig(
+            host=config.PGVECTOR_HOST,
+            port=config.PGVECTOR_PORT,
+            user=config.PGVECTOR_USER,
+            password=config.PGVECTOR_PASSWORD,
+            database=config.PGVECTOR_DATABASE,
+            min_connection=config.PGVECTOR_MIN_CONNECTION,
+            max_connection=config.PGVECTOR_MAX_CONNECTION,
+            pool_timeout=config.PGVECTOR_POOL_TIMEOUT,
+            idle_timeout=config.PGVECTOR_POOL_IDLE_TIMEOUT,
+            health_check_interval=config.PGVECTOR_POOL_HEALTH_CHECK_INTERVAL,
         )
@@ -0,0 +1,423 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+try:
+    import asyncpg
+    from pgvector.asyncpg import register_vector
+except ImportError:
+    asyncpg = None
+    register_vector = None
+
+from configs.config import config
+from core.rag.datasource.document import Document
+from core.rag.datasource.pgvector import (
+    MAX_INDEXED_DIMENSION,
+    RRF_K,
+    SQL_CREATE_HNSW_INDEX,
+    SQL_CREATE_IVFFLAT_INDEX,
+    SQL_CREATE_TABLE,
+    SQL_CREATE_TSV_INDEX,
+    SQL_HAS_TSV_COLUMN,
+    SQL_HYBRID_SEARCH,
+    SQL_RRF_FUSION,
+    SQL_WEIGHTED_FUSION,
+    _TEXT_SEARCH_CONFIG_PATTERN,
+    _default_text_search_config,
+    _full_text_lock,
+    _full_text_ready,
+    _missing_full_text_column,
+    PGVectorConfig,
+    PGVectorFactory,
+    PGVectorIndexConfig,
+)
+from core.rag.datasource.vector_base import AsyncBaseVector
+from core.rag.datasource.vector_type import HybridFusionMethod, VectorIndexType, VectorType
+from core.rag.embedding.embedding_base import Embeddings
+from core.rag.models.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+# asyncpg pools are bound to the event loop that created them, so there is one
+# per process, loop and connection settings; the value is the task creating
+# it, awaited by every caller so concurrent first searches share one pool.
+_pools: dict[tuple, "asyncio.Task"] = {}
+
+
+def _positional(sql: str, params: dict) -> tuple[str, list]:
+    """Turn psycopg2 ``%(name)s`` placeholders into asyncpg's ``$n``, reusing a number per name."""
+    numbers: dict[str, int] = {}
+    args: list = []
+
+    def number(match: re.Match) -> str:
+        name = match.group(1)
+        if name not in numbers:
+            args.append(params[name])
+            numbers[name] = len(args)
+        return f"${numbers[name]}"
+
+    return _NAMED_PARAM.sub(number, sql), args
+
+
+async def _init_connection(conn) -> None:
+    """Binary codec for pgvector's vector type and JSON (de)coding of jsonb, on every new connection."""
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    try:
+        await register_vector(conn)
+    except ValueError:
+        # The extension is created with the first collection; until then there is no vector type
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        await conn.reload_schema_state()
+        await register_vector(conn)
+
+
+def _pool_key(pg_config: PGVectorConfig) -> tuple:
+    return (
+        os.getpid(),
+        id(asyncio.get_running_loop()),
+        pg_config.host,
+        pg_config.port,
+        pg_config.user,
+        pg_config.password,
+        pg_config.database,
+    )
+
+
+async def get_async_pool(pg_config: PGVectorConfig):
+    """The pool for ``pg_config`` on the running event loop, created on first use."""
+    if asyncpg is None:
+        raise RuntimeError("asyncpg is required for VectorType.PGVECTOR_ASYNC; install asyncpg")
+    key = _pool_key(pg_config)
+    task = _pools.get(key)
+    if task is None:
+        task = _pools[key] = asyncio.ensure_future(
+            asyncpg.create_pool(
+                host=pg_config.host,
+                port=pg_config.port,
+                user=pg_config.user,
+                password=pg_config.password,
+                database=pg_config.database,
+                min_size=config.PGVECTOR_ASYNC_MIN_CONNECTION,
+                max_size=config.PGVECTOR_ASYNC_MAX_CONNECTION,
+                max_inactive_connection_lifetime=pg_config.idle_timeout,
+                init=_init_connection,
+            )
+        )
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        if _pools.get(key) is task:
+            del _pools[key]
+        raise
+
+
+def get_async_pool_stats() -> list[dict]:
+    """Usage of the pools created by this process, in the shape of get_pool_stats."""
+    pid = os.getpid()
+    stats = []
+    for key, task in list(_pools.items()):
+        if key[0] != pid or not task.done() or task.cancelled() or task.exception() is not None:
+            continue
+        pool = task.result()
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        stats.append({
+            "host": key[2],
+            "port": key[3],
+            "database": key[6],
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "min_connection": pool.get_min_size(),
+            "max_connection": pool.get_max_size(),
+        })
+    return stats
+
+
+async def close_async_pools() -> None:
+    """Close the pools of the running event loop; call from its shutdown."""
+    loop_id = id(asyncio.get_running_loop())
+    for key, task in list(_pools.items()):
+        if key[0] != os.getpid() or key[1] != loop_id:
+            continue
+        del _pools[key]
+        try:
+            pool = await task
+        except Exception:
+            continue
+        await pool.close()
+
+
+class AsyncPGVector(AsyncBaseVector):
+    """
+    PGVector on asyncpg: the same tables, SQL and index knobs as PGVector,
+    awaited on the event loop instead of holding a thread per query.
+
+    Vectors travel in pgvector's binary format, bulk inserts go out as one
+    pipelined ``executemany`` and every query is a prepared statement that
+    asyncpg caches per connection.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        config: PGVectorConfig,
+        index_config: Optional[PGVectorIndexConfig] = None,
+        text_search_config: Optional[str] = None,
+    ):
+        super().__init__(collection_name)
+        self.config = config
+        self.table_name = f"embedding_{collection_name}"
+        self.index_config = index_config or PGVectorIndexConfig.from_config()
+        self.text_search_config = text_search_config or _default_text_search_config()
+        if not _TEXT_SEARCH_CONFIG_PATTERN.match(self.text_search_config):
+            raise ValueError(f"Invalid text search configuration: {self.text_search_config!r}")
+
+    def get_type(self) -> str:
+        return VectorType.PGVECTOR_ASYNC
+
+    @asynccontextmanager
+    async def _acquire(self):
+        pool = await get_async_pool(self.config)
+        async with pool.acquire(timeout=self.config.pool_timeout) as conn:
+            yield conn
+
+    async def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        dimension = len(embeddings[0])
+
+        await self._create_collection(dimension)
+
+        pks = await self.add_texts(texts, embeddings)
+
+        if kwargs.get("build_index", True):
+            await self.create_index(dimension)
+
+        return pks
+
+    async def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
+        records = []
+        pks = []
+        for i, doc in enumerate(documents):
+            doc_id = doc.metadata.get("doc_id", str(uuid.uuid4()))
+            pks.append(doc_id)
+            records.append((doc_id, doc.page_content, doc.metadata, embeddings[i]))
+        async with self._acquire() as conn:
+            await conn.executemany(
+                # Conflicts are rows re-sent by a resumed ingestion
+                f"INSERT INTO {self.table_name} (id, text, meta, embedding) VALUES ($1, $2, $3, $4) "
+                "ON CONFLICT (id) DO NOTHING",
+                records,
+            )
+        return pks
+
+    async def text_exists(self, id: str) -> bool:
+        async with self._acquire() as conn:
+            return await conn.fetchval(f"SELECT 1 FROM {self.table_name} WHERE id = $1", id) is not None
+
+    async def get_by_ids(self, ids: list[str]) -> list[Document]:
+        async with self._acquire() as conn:
+            records = await conn.fetch(f"SELECT meta, text FROM {self.table_name} WHERE id = ANY($1::uuid[])", ids)
+        return [Document(page_content=text, metadata=meta) for meta, text in records]
+
+    async def get_doc_hashes(self) -> dict[str, str]:
+        async with self._acquire() as conn:
+            records = await conn.fetch(
+                f"""SELECT id::text, coalesce(meta->>'doc_hash', encode(sha256(convert_to(text, 'UTF8')), 'hex'))
+                FROM {self.table_name}"""
+            )
+        return dict(records)
+
+    async def delete_by_ids(self, ids: list[str]) -> None:
+        async with self._acquire() as conn:
+            await conn.execute(f"DELETE FROM {self.table_name} WHERE id = ANY($1::uuid[])", ids)
+
+    async def delete_by_metadata_field(self, key: str, value: str) -> None:
+        async with self._acquire() as conn:
+            await conn.execute(f"DELETE FROM {self.table_name} WHERE meta->>$1 = $2", key, value)
+
+    async def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        """See PGVector.search_by_vector."""
+        top_k = kwargs.get("top_k", 4)
+        score_threshold = float(kwargs.get("score_threshold") or 0.0)
+
+        async with self._acquire() as conn:
+            await self._set_search_params(conn, top_k, **kwargs)
+            records = await conn.fetch(
+                f"""SELECT meta, text, embedding <=> $1::vector AS distance
+                FROM {self.table_name}
+                ORDER BY distance
+                LIMIT $2""",
+                query_vector,
+                top_k,
+            )
+
+        docs = []
+        for metadata, text, distance in records:
+            score = 1 - distance
+            metadata["score"] = score
+            if score > score_threshold:
+                docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    async def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        top_k = kwargs.get("top_k", 5)
+
+        await self._ensure_full_text_column()
+
+        async with self._acquire() as conn:
+            records = await conn.fetch(
+                f"""SELECT meta, text, ts_rank(text_tsv, query) AS score
+                FROM {self.table_name}, plainto_tsquery($1::regconfig, $2) query
+                WHERE text_tsv @@ query
+                ORDER BY score DESC
+                LIMIT $3""",
+                self.text_search_config,
+                query,
+                top_k,
+            )
+
+        docs = []
+        for metadata, text, score in records:
+            metadata["score"] = score
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    async def search_hybrid(self, query: str, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        """See PGVector.search_hybrid; runs the same statement."""
+        top_k = kwargs.get("top_k", 4)
+        candidates = kwargs.get("candidates") or top_k * 2
+        weights = kwargs.get("weights") or {"semantic": 0.5, "full_text": 0.5}
+        fusion = HybridFusionMethod(kwargs.get("fusion") or HybridFusionMethod.WEIGHTED)
+
+        await self._ensure_full_text_column()
+
+        fused_score = SQL_RRF_FUSION if fusion == HybridFusionMethod.RECIPROCAL_RANK else SQL_WEIGHTED_FUSION
+        sql, args = _positional(
+            SQL_HYBRID_SEARCH.format(table_name=self.table_name, fused_score=fused_score),
+            {
+                "vector": query_vector,
+                "query": query,
+                "text_search_config": self.text_search_config,
+                "candidates": candidates,
+                "top_k": top_k,
+                "score_threshold": float(kwargs.get("score_threshold") or 0.0),
+                "semantic_weight": float(weights.get("semantic", 0.5)),
+                "full_text_weight": float(weights.get("full_text", 0.5)),
+                "rrf_k": RRF_K,
+            },
+        )
+
+        async with self._acquire() as conn:
+            await self._set_search_params(conn, candidates, **kwargs)
+            records = await conn.fetch(sql, *args)
+
+        docs = []
+        for metadata, text, score, semantic_score, full_text_score in records:
+            metadata["score"] = score
+            metadata["semantic_score"] = semantic_score
+            metadata["full_text_score"] = full_text_score
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    async def delete(self) -> None:
+        async with self._acquire() as conn:
+            await conn.execute(f"DROP TABLE IF EXISTS {self.table_name}")
+
+    async def _create_collection(self, dimension: int):
+        async with self._acquire() as conn:
+            # Simple-protocol script: one round trip for all three statements
+            await conn.execute(
+                SQL_CREATE_TABLE.format(
+                    table_name=self.table_name,
+                    dimension=dimension,
+                    text_search_config=self.text_search_config,
+                )
+                + SQL_CREATE_TSV_INDEX.format(index_name=f"{self._collection_name}_tsv_idx", table_name=self.table_name)
+            )
+        with _full_text_lock:
+            _full_text_ready.add(self.table_name)
+
+    async def _ensure_full_text_column(self) -> None:
+        """Fail clearly on legacy collections that migration 001 has not given a text_tsv column."""
+        if self.table_name in _full_text_ready:
+            return
+        async with self._acquire() as conn:
+            exists = await conn.fetchval(SQL_HAS_TSV_COLUMN.format(param="$1"), self.table_name)
+        if exists is None:
+            raise _missing_full_text_column(self.table_name)
+        with _full_text_lock:
+            _full_text_ready.add(self.table_name)
+
+    async def create_index(self, dimension: Optional[int] = None) -> None:
+        """Build the collection's ANN index if it does not exist yet."""
+        if dimension is not None and dimension > MAX_INDEXED_DIMENSION:
+            logger.warning(
+                "Skipping ANN index on %s: dimension %d exceeds %d",
+                self.table_name, dimension, MAX_INDEXED_DIMENSION,
+            )
+            return
+
+        index_config = self.index_config
+        index_name = f"{self._collection_name}_vec_idx"
+
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                if config.PGVECTOR_INDEX_MAINTENANCE_WORK_MEM:
+                    await conn.execute(
+                        "SELECT set_config('maintenance_work_mem', $1, true)", config.PGVECTOR_INDEX_MAINTENANCE_WORK_MEM
+                    )
+
+                if index_config.method == VectorIndexType.IVFFLAT:
+                    lists = index_config.lists or await self._default_ivfflat_lists(conn)
+                    await conn.execute(
+                        SQL_CREATE_IVFFLAT_INDEX.format(
+                            index_name=index_name, table_name=self.table_name, lists=int(lists)
+                        )
+                    )
+                else:
+                    await conn.execute(
+                        SQL_CREATE_HNSW_INDEX.format(
+                            index_name=index_name,
+                            table_name=self.table_name,
+                            m=int(index_config.m),
+                            ef_construction=int(index_config.ef_construction),
+                        )
+                    )
+
+    async def _default_ivfflat_lists(self, conn) -> int:
+        rows = await conn.fetchval(f"SELECT count(*) FROM {self.table_name}")
+        if rows > 1_000_000:
+            return int(math.sqrt(rows))
+        return max(1, rows // 1000)
+
+    async def _set_search_params(self, conn, top_k: int, **kwargs: Any) -> None:
+        """
+        Apply query-time index knobs for this checkout. A session SET rather
+        than SET LOCAL saves the BEGIN/COMMIT round trips; the pool's RESET ALL
+        on release puts the defaults back.
+        """
+        if self.index_config.method == VectorIndexType.IVFFLAT:
+            probes = kwargs.get("probes") or self.index_config.probes
+            await conn.execute(f"SET ivfflat.probes = {int(probes)}")
+        else:
+            ef_search = kwargs.get("ef_search") or self.index_config.ef_search
+            await conn.execute(f"SET hnsw.ef_search = {max(int(ef_search), int(top_k))}")
+
+
+class AsyncPGVectorFactory(PGVectorFactory):
+    def init_vector(self, dataset: Dataset, attributes: list, embeddings: Embeddings) -> AsyncPGVector:
+        collection_name, index_config, text_search_config = self._collection_settings(dataset)
+        return AsyncPGVector(
+            collection_name=collection_name,
+            index_config=index_config,
+            text_search_config=text_search_config,
+            config=self._connection_config(),
+        )
@@ -0,0 +1,263 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+if TYPE_CHECKING:
+    from core.rag.datasource.pgvector import PGVectorConfig
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(psycopg2.pool.PoolError):
+    """Raised when no pooled connection becomes available within the pool timeout."""
+
+
+class PGVectorConnectionPool:
+    """
+    Thread-safe, blocking connection pool shared by every PGVector instance
+    that uses the same connection settings.
+
+    Unlike psycopg2's SimpleConnectionPool it waits for a free connection
+    instead of failing, pings connections that have been idle for a while,
+    closes idle connections above ``min_connection`` and records how long
+    callers had to wait.
+    """
+
+    def __init__(self, config: "PGVectorConfig"):
+        self._config = config
+        self._idle: deque[tuple[psycopg2.extensions.connection, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._health_check_failures = 0
+        self._reaped = 0
+
+        for _ in range(config.min_connection):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        return psycopg2.connect(
+            host=self._config.host,
+            port=self._config.port,
+            user=self._config.user,
+            password=self._config.password,
+            database=self._config.database,
+        )
+
+    @staticmethod
+    def _close_quietly(conn: psycopg2.extensions.connection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn: psycopg2.extensions.connection, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self._config.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _reap_idle_locked(self) -> None:
+        """Close the oldest idle connections that outlived the idle timeout."""
+        now = time.monotonic()
+        while (
+            self._idle
+            and self._size > self._config.min_connection
+            and now - self._idle[0][1] > self._config.idle_timeout
+        ):
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._reaped += 1
+            self._close_quietly(conn)
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        started = time.monotonic()
+        deadline = started + self._config.pool_timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.pool.PoolError("connection pool is closed")
+                self._reap_idle_locked()
+                if self._idle:
+                    # LIFO keeps a small hot set of connections busy and lets
+                    # the rest age out through the idle reaper.
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._size < self._config.max_connection:
+                    self._size += 1
+                    conn, idle_since = None, 0.0
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"no PGVector connection available within {self._config.pool_timeout}s "
+                        f"(max_connection={self._config.max_connection})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            wait_time = time.monotonic() - started
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        if conn is not None and not self._is_healthy(conn, idle_since):
+            with self._cond:
+                self._health_check_failures += 1
+            logger.warning("Discarding broken PGVector connection")
+            self._close_quietly(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def putconn(self, conn: psycopg2.extensions.connection, close: bool = False) -> None:
+        if not close and not conn.closed:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        with self._cond:
+            if close or conn.closed or self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._reap_idle_locked()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, committing on success and rolling back on error."""
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            broken = conn.closed != 0
+            if not broken:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            self.putconn(conn, close=broken)
+            raise
+        self.putconn(conn)
+
+    def closeall(self) -> None:
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_connection": self._config.min_connection,
+                "max_connection": self._config.max_connection,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total": self._wait_time_total,
+                "wait_time_max": self._wait_time_max,
+                "timeouts": self._timeouts,
+                "health_check_failures": self._health_check_failures,
+                "reaped": self._reaped,
+            }
+
+
+_pools: dict[tuple, PGVectorConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(config: "PGVectorConfig") -> tuple:
+    # The pid is part of the key so a forked worker never reuses sockets
+    # inherited from its parent.
+    return (
+        os.getpid(),
+        config.host,
+        config.port,
+        config.user,
+        config.password,
+        config.database,
+        config.min_connection,
+        config.max_connection,
+    )
+
+
+def get_connection_pool(config: "PGVectorConfig") -> PGVectorConnectionPool:
+    """Return the process-wide pool for ``config``, creating it on first use."""
+    key = _pool_key(config)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = PGVectorConnectionPool(config)
+            _pools[key] = pool
+        return pool
+
+
+def get_pool_stats() -> list[dict]:
+    """Usage metrics for every pool owned by this process."""
+    pid = os.getpid()
+    return [
+        {"host": key[1], "port": key[2], "database": key[5], **pool.stats()}
+        for key, pool in list(_pools.items())
+        if key[0] == pid
+    ]
+
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        pid = os.getpid()
+        for key, pool in list(_pools.items()):
+            if key[0] == pid:
+                pool.closeall()
+            del _pools[key]
+
+
+atexit.register(close_all_pools)
@@ -45,6 +45,10 @@ class BaseVector(ABC):
     def get_ids_by_metadata_field(self, key: str, value: str):
         raise NotImplementedError
 
+    def get_doc_hashes(self) -> dict[str, str]:
+        """Content hash of every stored chunk, keyed by doc id."""
+        raise NotImplementedError
+
     @abstractmethod
     def delete_by_metadata_field(self, key: str, value: str) -> None:
         raise NotImplementedError
@@ -57,6 +61,10 @@ class BaseVector(ABC):
     def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
         raise NotImplementedError
 
+    def search_hybrid(self, query: str, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        """Fused semantic + full-text search executed by the store itself, where supported."""
+        raise NotImplementedError
+
     @abstractmethod
     def delete(self) -> None:
         raise NotImplementedError
@@ -75,4 +83,59 @@ class BaseVector(ABC):
 
     @property
     def collection_name(self):
-        return self._collection_name
\ No newline at end of file
+        return self._collection_name
+
+
+class AsyncBaseVector(ABC):
+    """BaseVector for stores driven by an async client: the same surface, awaitable."""
+
+    def __init__(self, collection_name: str):
+        self._collection_name = collection_name
+
+    @abstractmethod
+    def get_type(self) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def text_exists(self, id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_by_ids(self, ids: list[str]) -> None:
+        raise NotImplementedError
+
+    async def get_doc_hashes(self) -> dict[str, str]:
+        """Content hash of every stored chunk, keyed by doc id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_by_metadata_field(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        raise NotImplementedError
+
+    async def search_hybrid(self, query: str, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        """Fused semantic + full-text search executed by the store itself, where supported."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self) -> None:
+        raise NotImplementedError
+
+    @property
+    def collection_name(self):
+        return self._collection_name
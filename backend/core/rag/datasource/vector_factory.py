@@ -1,20 +1,30 @@
 # vector_factory.py
 
 from abc import ABC, abstractmethod
+import asyncio
+import contextvars
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Optional, Any
 import json
+import logging
+import time
 
 
-from core.rag.datasource.pgvector import PGVectorFactory
-from core.rag.datasource.vector_base import BaseVector
-from core.rag.datasource.vector_type import VectorType
+from core.rag.datasource.pgvector import RRF_K, PGVectorFactory, PGVectorIndexConfig
+from core.rag.datasource.pgvector_async import AsyncPGVectorFactory
+from core.rag.datasource.vector_base import AsyncBaseVector, BaseVector
+from core.rag.datasource.vector_type import HybridFusionMethod, VectorType
 from core.rag.embedding.cache_embedding import CacheEmbedding
 from core.rag.embedding.embedding_base import Embeddings
 from core.rag.datasource.document import Document
 from core.rag.models.dataset import Dataset
 from core.rag.embedding.embedding import OpenAIEmbedding
 from core.rag.embedding.cache_embedding import CacheEmbedding
-from repository.ext_database import db
+from repository.ext_database import db, session_scope
+from app.libs.executors import HYBRID_SEARCH, LLM, RETRIEVAL, get_executor, run_blocking
+from configs.config import config
+
+logger = logging.getLogger(__name__)
 
 
 class AbstractVectorFactory(ABC):
@@ -28,12 +38,36 @@ class AbstractVectorFactory(ABC):
         return index_struct_dict
 
 
+_factories: dict[VectorType, type[AbstractVectorFactory]] = {
+    VectorType.PGVECTOR: PGVectorFactory,
+    VectorType.PGVECTOR_ASYNC: AsyncPGVectorFactory,
+}
+
+
 class Vector:
-    """Vector store implementation using PGVector."""
-    def __init__(self, dataset: Dataset, attributes: Optional[list] = None):
+    """
+    Vector store implementation using PGVector.
+
+    ``vector_type`` (default VECTOR_STORE) picks the driver. The a-prefixed
+    search methods work with either, awaiting an async store directly and
+    running a sync one on the retrieval executor; the other methods need a
+    sync store, which ingestion therefore asks for explicitly.
+    """
+    def __init__(
+        self,
+        dataset: Dataset,
+        attributes: Optional[list] = None,
+        vector_index: Optional[dict] = None,
+        text_search_config: Optional[str] = None,
+        vector_type: Optional[VectorType] = None,
+    ):
         if attributes is None:
             attributes = ["doc_id", "dataset_id", "document_id", "doc_hash"]
         self._dataset = dataset
+        self._vector_index = vector_index
+        self._text_search_config = text_search_config
+        self._vector_type = VectorType(vector_type or config.VECTOR_STORE)
+        self._collection_created = False
         self._embeddings = self._get_embeddings()
         self._attributes = attributes
         self._vector_processor = self._init_vector()
@@ -46,7 +80,7 @@ class Vector:
         cached_embedding = CacheEmbedding(base_embedding)
         return cached_embedding
 
-    def _init_vector(self) -> BaseVector:
+    def _init_vector(self) -> BaseVector | AsyncBaseVector:
         """Safely initialize PGVector instance."""
         vector_type = VectorType.PGVECTOR
         dataset_id = self._dataset.id
@@ -54,9 +88,14 @@ class Vector:
         if not self._dataset.index_struct:
             # Generate a new index structure if it doesn't exist
             collection_name = Dataset.gen_collection_name_by_id(dataset_id)
+            # Persist the ANN index choice so later searches use matching knobs
+            vector_index = PGVectorIndexConfig.from_config().model_dump(mode="json")
+            vector_index.update(self._vector_index or {})
             index_struct = {
                 "type": vector_type.value,
                 "vector_store": {"class_prefix": collection_name},
+                "vector_index": vector_index,
+                "text_search_config": self._text_search_config or config.PGVECTOR_TEXT_SEARCH_CONFIG,
             }
             # Directly assign the dictionary; JSONB will handle storage
             self._dataset.index_struct = index_struct
@@ -68,7 +107,16 @@ class Vector:
             collection_name = index_struct["vector_store"]["class_prefix"]
 
         # Initialize the PGVector processor
-        return PGVectorFactory().init_vector(self._dataset, self._attributes, self._embeddings)
+        return _factories[self._vector_type]().init_vector(self._dataset, self._attributes, self._embeddings)
+
+    @property
+    def _sync_processor(self) -> BaseVector:
+        if isinstance(self._vector_processor, AsyncBaseVector):
+            raise TypeError(
+                f"{self._vector_type} is an async vector store; use the a-prefixed methods "
+                "or create the Vector with vector_type=VectorType.PGVECTOR"
+            )
+        return self._vector_processor
 
     def create(self, texts: Optional[list] = None, **kwargs):
         """Create vector embeddings for texts."""
@@ -77,7 +125,7 @@ class Vector:
 
         embeddings = self._embeddings.embed_documents([document.page_content for document in texts])
         
-        self._vector_processor.create(texts=texts, embeddings=embeddings, **kwargs)
+        self._sync_processor.create(texts=texts, embeddings=embeddings, **kwargs)
 
     def add_texts(self, documents: list[Document], **kwargs):
         """Add new documents to vector store."""
@@ -89,25 +137,52 @@ class Vector:
 
         embeddings = self._embeddings.embed_documents([document.page_content for document in documents])
         
-        self._vector_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+        self._sync_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+
+    def embed_documents(self, documents: list[Document]) -> list:
+        """Embed documents through the cache without storing them."""
+        return self._embeddings.embed_documents([document.page_content for document in documents])
+
+    def add_embeddings(self, documents: list[Document], embeddings: list, **kwargs):
+        """
+        Store already embedded documents. The first call creates the collection;
+        the ANN index is left to ``create_index`` once loading is finished.
+        """
+        if not self._collection_created:
+            self._sync_processor.create(texts=documents, embeddings=embeddings, build_index=False, **kwargs)
+            self._collection_created = True
+        else:
+            self._sync_processor.add_texts(documents, embeddings, **kwargs)
+
+    def create_index(self, dimension: Optional[int] = None) -> None:
+        """Build the ANN index after a batched load."""
+        self._sync_processor.create_index(dimension)
 
     def text_exists(self, id: str) -> bool:
         """Check if a text exists in vector store."""
-        return self._vector_processor.text_exists(id)
+        return self._sync_processor.text_exists(id)
 
     def delete_by_ids(self, ids: list[str]) -> None:
         """Delete documents by their IDs."""
-        self._vector_processor.delete_by_ids(ids)
+        self._sync_processor.delete_by_ids(ids)
+
+    def get_doc_hashes(self) -> dict[str, str]:
+        """Content hash of every stored chunk, keyed by doc id."""
+        return self._sync_processor.get_doc_hashes()
 
     def delete_by_metadata_field(self, key: str, value: str) -> None:
         """Delete documents by metadata field."""
-        self._vector_processor.delete_by_metadata_field(key, value)
+        self._sync_processor.delete_by_metadata_field(key, value)
 
-    def search_by_vector(self, query: str, top_k=3, score_threshold=0.5) -> list[Document]:
+    def search_by_vector(self, query: str, top_k=3, score_threshold=0.5, **kwargs: Any) -> list[Document]:
+        """
+        Search by query embedding. Index knobs such as ``ef_search`` (HNSW)
+        or ``probes`` (IVFFlat) are passed through to the vector store.
+        """
         print("[Vector] Starting search_by_vector...")
         query_vector = self._embeddings.embed_query(query)
 
-        docs = self._vector_processor.search_by_vector(query_vector, top_k=top_k)
+        docs = self._sync_processor.search_by_vector(query_vector, top_k=top_k, **kwargs)
         print(f"[Vector] _vector_processor returned {len(docs)} docs.")
 
         filtered_docs = []
@@ -132,11 +207,241 @@ class Vector:
         """Search documents by full text."""
         # This might return docs with string metadata, so we do not do threshold checks here.
         # We'll let the service parse the metadata or do any threshold checks if needed.
-        return self._vector_processor.search_by_full_text(query, **kwargs)
+        return self._sync_processor.search_by_full_text(query, **kwargs)
+
+    def search_hybrid(
+        self,
+        query: str,
+        top_k: int = 3,
+        score_threshold: float = 0.5,
+        weights: Optional[dict] = None,
+        fusion: str = HybridFusionMethod.WEIGHTED,
+        mode: Optional[str] = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        """
+        Semantic and full-text search fused into a single ranking.
+
+        In ``server`` mode stores implementing ``search_hybrid`` (PGVector) do
+        this in one round trip. Otherwise, or in ``parallel`` mode, both
+        branches run concurrently and are merged here.
+        """
+        weights = weights or {"semantic": 0.5, "full_text": 0.5}
+        mode = mode or config.RETRIEVAL_HYBRID_MODE
+        supports_server_fusion = type(self._sync_processor).search_hybrid is not BaseVector.search_hybrid
+
+        if mode == "server" and supports_server_fusion:
+            query_vector = self._embeddings.embed_query(query)
+            return self._sync_processor.search_hybrid(
+                query,
+                query_vector,
+                top_k=top_k,
+                score_threshold=score_threshold,
+                weights=weights,
+                fusion=fusion,
+                **kwargs,
+            )
+
+        return self._search_hybrid_parallel(query, top_k, score_threshold, weights, fusion, **kwargs)
+
+    def _search_hybrid_parallel(
+        self,
+        query: str,
+        top_k: int,
+        score_threshold: float,
+        weights: dict,
+        fusion: str,
+        **kwargs: Any,
+    ) -> list[Document]:
+        """
+        Run the branches on separate pooled connections. The full-text branch
+        does not wait for the query embedding, and a branch that fails or
+        times out is dropped in favour of the other one.
+        """
+        executor = get_executor(HYBRID_SEARCH)
+
+        def semantic_branch() -> list[Document]:
+            query_vector = self._embeddings.embed_query(query)
+            return self._sync_processor.search_by_vector(
+                query_vector, top_k=top_k * 2, score_threshold=score_threshold, **kwargs
+            )
+
+        started = time.monotonic()
+        # Each branch gets its own copy of the caller's context
+        semantic_future = executor.submit(contextvars.copy_context().run, self._run_branch, semantic_branch)
+        full_text_future = executor.submit(
+            contextvars.copy_context().run,
+            self._run_branch,
+            self._sync_processor.search_by_full_text,
+            query,
+            top_k=top_k * 2,
+        )
+
+        full_text_docs = self._branch_result(
+            full_text_future, "full_text", started + config.RETRIEVAL_FULL_TEXT_TIMEOUT
+        )
+        semantic_docs = self._branch_result(
+            semantic_future, "semantic", started + config.RETRIEVAL_SEMANTIC_TIMEOUT
+        )
+
+        if semantic_docs is None and full_text_docs is None:
+            raise RuntimeError("Both hybrid search branches failed")
+
+        return self._fuse_results(semantic_docs or [], full_text_docs or [], weights, fusion, top_k)
+
+    @staticmethod
+    def _run_branch(fn, *args: Any, **kwargs: Any) -> list[Document]:
+        """
+        Run a branch in a session scope of its own: the branches run
+        concurrently, so they cannot share the caller's session, and the scope
+        closes the session (e.g. the embedding cache's) when the branch ends
+        rather than leaving it on the executor thread.
+        """
+        with session_scope():
+            return fn(*args, **kwargs)
+
+    @staticmethod
+    def _branch_result(future: Future, branch: str, deadline: float) -> Optional[list[Document]]:
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning("Hybrid search %s branch timed out, using the other branch only", branch)
+        except Exception as e:
+            logger.warning("Hybrid search %s branch failed: %s", branch, e)
+        return None
+
+    async def _processor_call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Await a store method: directly on an async store, on the retrieval executor for a sync one."""
+        if isinstance(self._vector_processor, AsyncBaseVector):
+            return await getattr(self._vector_processor, method)(*args, **kwargs)
+        return await run_blocking(RETRIEVAL, getattr(self._vector_processor, method), *args, **kwargs)
+
+    async def _aembed_query(self, query: str) -> list[float]:
+        return await run_blocking(LLM, self._embeddings.embed_query, query)
+
+    async def asearch_by_vector(self, query: str, top_k=3, score_threshold=0.5, **kwargs: Any) -> list[Document]:
+        """Awaitable search_by_vector."""
+        query_vector = await self._aembed_query(query)
+        docs = await self._processor_call("search_by_vector", query_vector, top_k=top_k, **kwargs)
+
+        filtered_docs = []
+        for doc in docs:
+            if isinstance(doc.metadata, str):
+                try:
+                    doc.metadata = json.loads(doc.metadata)
+                except json.JSONDecodeError:
+                    doc.metadata = {}
+            if doc.metadata.get("score", 0) >= score_threshold:
+                filtered_docs.append(doc)
+        return filtered_docs
+
+    async def asearch_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        """Awaitable search_by_full_text."""
+        return await self._processor_call("search_by_full_text", query, **kwargs)
+
+    async def asearch_hybrid(
+        self,
+        query: str,
+        top_k: int = 3,
+        score_threshold: float = 0.5,
+        weights: Optional[dict] = None,
+        fusion: str = HybridFusionMethod.WEIGHTED,
+        mode: Optional[str] = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        """Awaitable search_hybrid; parallel mode runs both branches as tasks on the event loop."""
+        weights = weights or {"semantic": 0.5, "full_text": 0.5}
+        mode = mode or config.RETRIEVAL_HYBRID_MODE
+        processor_type = type(self._vector_processor)
+        supports_server_fusion = (
+            processor_type.search_hybrid is not BaseVector.search_hybrid
+            and processor_type.search_hybrid is not AsyncBaseVector.search_hybrid
+        )
+
+        if mode == "server" and supports_server_fusion:
+            query_vector = await self._aembed_query(query)
+            return await self._processor_call(
+                "search_hybrid",
+                query,
+                query_vector,
+                top_k=top_k,
+                score_threshold=score_threshold,
+                weights=weights,
+                fusion=fusion,
+                **kwargs,
+            )
+
+        async def semantic_branch() -> list[Document]:
+            query_vector = await self._aembed_query(query)
+            return await self._processor_call(
+                "search_by_vector", query_vector, top_k=top_k * 2, score_threshold=score_threshold, **kwargs
+            )
+
+        semantic_docs, full_text_docs = await asyncio.gather(
+            self._abranch_result(semantic_branch(), "semantic", config.RETRIEVAL_SEMANTIC_TIMEOUT),
+            self._abranch_result(
+                self._processor_call("search_by_full_text", query, top_k=top_k * 2),
+                "full_text",
+                config.RETRIEVAL_FULL_TEXT_TIMEOUT,
+            ),
+        )
+
+        if semantic_docs is None and full_text_docs is None:
+            raise RuntimeError("Both hybrid search branches failed")
+
+        return self._fuse_results(semantic_docs or [], full_text_docs or [], weights, fusion, top_k)
+
+    @staticmethod
+    async def _abranch_result(branch_coro, branch: str, timeout: float) -> Optional[list[Document]]:
+        try:
+            return await asyncio.wait_for(branch_coro, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Hybrid search %s branch timed out, using the other branch only", branch)
+        except Exception as e:
+            logger.warning("Hybrid search %s branch failed: %s", branch, e)
+        return None
+
+    @staticmethod
+    def _fuse_results(
+        semantic_docs: list[Document],
+        full_text_docs: list[Document],
+        weights: dict,
+        fusion: str,
+        top_k: int,
+    ) -> list[Document]:
+        """Python counterpart of the fusion PGVector.search_hybrid does in SQL."""
+        doc_scores = {}
+        for branch, docs in (("semantic", semantic_docs), ("full_text", full_text_docs)):
+            weight = weights.get(branch, 0.5)
+            for rank, doc in enumerate(docs, 1):
+                doc_id = doc.metadata.get("doc_id")
+                if doc_id is None:
+                    continue
+                branch_score = doc.metadata.get("score", 0)
+                if fusion == HybridFusionMethod.RECIPROCAL_RANK:
+                    score = weight / (RRF_K + rank)
+                else:
+                    score = branch_score * weight
+
+                entry = doc_scores.setdefault(
+                    doc_id, {"doc": doc, "score": 0.0, "semantic_score": None, "full_text_score": None}
+                )
+                entry["score"] += score
+                entry[f"{branch}_score"] = branch_score
+
+        results = []
+        for item in sorted(doc_scores.values(), key=lambda x: x["score"], reverse=True)[:top_k]:
+            doc = item["doc"]
+            doc.metadata["score"] = item["score"]
+            doc.metadata["semantic_score"] = item["semantic_score"]
+            doc.metadata["full_text_score"] = item["full_text_score"]
+            results.append(doc)
+        return results
 
     def delete(self) -> None:
         """Delete the vector store."""
-        self._vector_processor.delete()
+        self._sync_processor.delete()
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
         """Filter out duplicate documents."""
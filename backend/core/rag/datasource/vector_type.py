@@ -3,3 +3,15 @@ from enum import StrEnum
 
 class VectorType(StrEnum):
     PGVECTOR = "pgvector"
+    # Same collections as PGVECTOR, through asyncpg; serves the async Vector methods only
+    PGVECTOR_ASYNC = "pgvector_async"
+
+
+class VectorIndexType(StrEnum):
+    HNSW = "hnsw"
+    IVFFLAT = "ivfflat"
+
+
+class HybridFusionMethod(StrEnum):
+    WEIGHTED = "weighted"
+    RECIPROCAL_RANK = "rrf"
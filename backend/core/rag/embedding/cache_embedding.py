@@ -1,70 +1,152 @@
 # core/rag/embedding/cache_embedding.py
 
-from typing import List
+from typing import Dict, List, Optional
 import hashlib
-import pickle
+import logging
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 from .embedding_base import Embeddings
+from .embedding_codec import MAGIC, EmbeddingModelMismatch, is_legacy
+from .embedding_coalescer import get_query_coalescer
+from .memory_cache import query_embedding_cache
+from configs.config import config
 from repository.ext_database import db
 from core.rag.models.dataset import Embedding 
 
+logger = logging.getLogger(__name__)
+
+# Upper bound for hashes per IN (...) lookup and rows per multi-row INSERT
+CACHE_BATCH_SIZE = 1000
+
+
 class CacheEmbedding(Embeddings): 
     """Caching wrapper for embeddings."""
     
-    def __init__(self, embedding_model: Embeddings):
+    def __init__(self, embedding_model: Embeddings, provider_name: str = "", model_name: Optional[str] = None):
         self.embedding_model = embedding_model
+        self.provider_name = provider_name
+        # Recorded in every cached vector; rows of another model are cache misses
+        self.model_name = model_name if model_name is not None else getattr(embedding_model, "model", "")
         
     def _get_hash(self, text: str) -> str:
         """Generate hash for text."""
         return hashlib.sha256(text.encode()).hexdigest()
     
+    def _get_cached_embeddings(self, text_hashes: List[str]) -> Dict[str, List[float]]:
+        """Retrieve cached embeddings for many hashes with one query per batch."""
+        cached = {}
+        for start in range(0, len(text_hashes), CACHE_BATCH_SIZE):
+            batch = text_hashes[start:start + CACHE_BATCH_SIZE]
+            rows = db.query(Embedding).filter(
+                Embedding.provider_name == self.provider_name,
+                Embedding.hash.in_(batch),
+            ).all()
+            for row in rows:
+                try:
+                    cached[row.hash] = row.get_embedding(self.model_name)
+                except EmbeddingModelMismatch:
+                    # Re-embedded and overwritten by _cache_embeddings
+                    logger.info("Cached embedding %s is from another model", row.hash)
+        return cached
+
     def _get_cached_embedding(self, text_hash: str) -> List[float] | None:
         """Retrieve embedding from cache."""
-        cached = db.query(Embedding).filter_by(hash=text_hash).first()
-        if cached:
-            return cached.get_embedding()
-        return None
+        return self._get_cached_embeddings([text_hash]).get(text_hash)
     
+    def _cache_embeddings(self, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings with multi-row inserts, overwriting rows already cached for the same hashes."""
+        items = list(embeddings.items())
+        try:
+            for start in range(0, len(items), CACHE_BATCH_SIZE):
+                rows = [
+                    {
+                        "hash": text_hash,
+                        "provider_name": self.provider_name,
+                        "embedding": Embedding.serialize(embedding_data, self.model_name),
+                    }
+                    for text_hash, embedding_data in items[start:start + CACHE_BATCH_SIZE]
+                ]
+                statement = insert(Embedding).values(rows)
+                # Replaces rows of another model; a concurrent writer stored the same vector
+                db.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["provider_name", "hash"],
+                        set_={"embedding": statement.excluded.embedding},
+                    )
+                )
+            db.commit()
+        except Exception as e:
+            # The embeddings are already computed; a cache write failure must not lose them.
+            db.rollback()
+            logger.warning("Failed to cache %d embeddings: %s", len(items), e)
+
     def _cache_embedding(self, text_hash: str, embedding_data: List[float]):
         """Store embedding in cache."""
-        embedding = Embedding(
-            hash=text_hash,
-        )
-        embedding.set_embedding(embedding_data)
-        db.add(embedding)
-        db.commit()
+        self._cache_embeddings({text_hash: embedding_data})
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for documents with caching."""
-        results = []
-        texts_to_embed = []
-        text_hashes = []
-        
-        for text in texts:
-            text_hash = self._get_hash(text)
-            cached = self._get_cached_embedding(text_hash)
-            
-            if cached:
-                results.append(cached)
-            else:
-                texts_to_embed.append(text)
-                text_hashes.append(text_hash)
-        
+        """
+        Get embeddings for documents with caching, in the order of ``texts``.
+        Cache hits come back as read-only float32 arrays.
+        """
+        text_hashes = [self._get_hash(text) for text in texts]
+        embeddings = self._get_cached_embeddings(list(dict.fromkeys(text_hashes)))
+
+        # Embed each missing text once, even if it repeats within the batch
+        texts_to_embed = {}
+        for text, text_hash in zip(texts, text_hashes):
+            if text_hash not in embeddings and text_hash not in texts_to_embed:
+                texts_to_embed[text_hash] = text
+
         if texts_to_embed:
-            new_embeddings = self.embedding_model.embed_documents(texts_to_embed)
-            for i, embedding in enumerate(new_embeddings):
-                self._cache_embedding(text_hashes[i], embedding)
-                results.append(embedding)
-                
-        return results
+            new_embeddings = self.embedding_model.embed_documents(list(texts_to_embed.values()))
+            computed = dict(zip(texts_to_embed.keys(), new_embeddings))
+            self._cache_embeddings(computed)
+            embeddings.update(computed)
+
+        return [embeddings[text_hash] for text_hash in text_hashes]
     
     def embed_query(self, text: str) -> List[float]:
-        """Get embedding for query with caching."""
+        """
+        Get embedding for query with caching: in-process memory first, then
+        the database, then the embedding model. Returns a read-only float32 array.
+        """
         text_hash = self._get_hash(text)
-        cached = self._get_cached_embedding(text_hash)
-        
-        if cached:
+        # Two models of one provider must not share query vectors
+        memory_key = (self.provider_name, self.model_name, text_hash)
+
+        cached = query_embedding_cache.get(memory_key)
+        if cached is not None:
             return cached
-            
-        embedding = self.embedding_model.embed_query(text)
+
+        cached = self._get_cached_embedding(text_hash)
+        if cached is not None:
+            return query_embedding_cache.put(memory_key, cached)
+
+        if config.EMBEDDING_COALESCE_ENABLED:
+            # Concurrent misses share one batched request, identical texts one result
+            embedding = get_query_coalescer(self.embedding_model).embed(text)
+        else:
+            embedding = self.embedding_model.embed_query(text)
         self._cache_embedding(text_hash, embedding)
-        return embedding
\ No newline at end of file
+        return query_embedding_cache.put(memory_key, embedding)
+
+
+def migrate_legacy_embeddings(batch_size: int = 500) -> int:
+    """Rewrite pickled cache rows in the compact binary format; returns the number migrated."""
+    migrated = 0
+    while True:
+        rows = db.query(Embedding).filter(
+            func.substring(Embedding.embedding, 1, len(MAGIC)) != MAGIC
+        ).limit(batch_size).all()
+        if not rows:
+            return migrated
+        for row in rows:
+            if is_legacy(row.embedding):
+                row.set_embedding(row.get_embedding())
+        db.commit()
+        migrated += len(rows)
+
+
+if __name__ == "__main__":
+    print(f"Migrated {migrate_legacy_embeddings()} cached embeddings")
@@ -1,6 +1,11 @@
-from typing import List
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 import openai
 from core.rag.embedding.embedding_base import Embeddings
+from core.rag.embedding.token_counter import get_token_counter
 from configs.config import config
 
 OPENAI_API_KEY = config.OPENAI_API_KEY
@@ -8,37 +13,109 @@ EMBEDDING_MODEL = config.EMBEDDING_MODEL
 
 print(EMBEDDING_MODEL)
 
+# Errors worth retrying with backoff; everything else fails the batch immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_client: Optional[openai.Client] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> openai.Client:
+    """Process-wide client so HTTP connections are reused across requests."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Retries are handled per batch in OpenAIEmbedding
+                _client = openai.Client(api_key=OPENAI_API_KEY, max_retries=0)
+    return _client
+
+
 class OpenAIEmbedding(Embeddings):
     """OpenAI embedding implementation."""
     def __init__(self):
         if not OPENAI_API_KEY:
             raise ValueError("OpenAI API key is not set in configuration")
             
-        self.client = openai.Client(api_key=OPENAI_API_KEY)
+        self.client = _get_client()
         self.model = EMBEDDING_MODEL
         self.dimension = 1536  # Dimension for text-embedding-3-small
-        
+        self.batch_size = config.EMBEDDING_BATCH_SIZE
+        self.max_batch_tokens = config.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_concurrency = config.EMBEDDING_MAX_CONCURRENCY
+        self.max_retries = config.EMBEDDING_MAX_RETRIES
+        self._count_tokens = get_token_counter(self.model)
+
+    def _plan_batches(self, texts: List[str]) -> List[List[str]]:
+        """Pack texts, in order, into requests under the item and token budgets."""
+        batches = []
+        current = []
+        current_tokens = 0
+        for text in texts:
+            tokens = self._count_tokens(text)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Exponential backoff with jitter so parallel batches do not retry in lockstep
+        return min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                    encoding_format="float"
+                )
+                return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt, e))
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of documents."""
+        """
+        Generate embeddings for a list of documents.
+
+        Texts are split into token- and size-bounded batches which are sent
+        with at most ``EMBEDDING_MAX_CONCURRENCY`` requests in flight; the
+        result order always matches ``texts``.
+        """
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=texts,
-                encoding_format="float"
-            )
-            return [data.embedding for data in response.data]
+            batches = self._plan_batches(texts)
+            if len(batches) <= 1:
+                return [embedding for batch in batches for embedding in self._embed_batch(batch)]
+
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embedding") as executor:
+                results = executor.map(self._embed_batch, batches)
+                return [embedding for batch_embeddings in results for embedding in batch_embeddings]
         except Exception as e:
             raise Exception(f"Error generating document embeddings: {str(e)}")
             
     def embed_query(self, text: str) -> List[float]:
         """Generate embedding for a query text."""
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=[text],
-                encoding_format="float"
-            )
-            return response.data[0].embedding
+            return self._embed_batch([text])[0]
         except Exception as e:
             raise Exception(f"Error generating query embedding: {str(e)}")
 
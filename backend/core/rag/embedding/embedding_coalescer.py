@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from configs.config import config
+from core.rag.embedding.embedding_base import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCoalescer:
+    """
+    Micro-batches concurrent query embeddings.
+
+    Calls to ``embed`` are collected for up to ``max_wait`` seconds, or until
+    ``max_batch_size`` distinct texts are waiting, and sent as one
+    ``embed_documents`` request whose results are fanned back to the callers.
+    Identical texts that are waiting or already in flight share one result.
+    A caller waits at most ``timeout`` seconds for its result.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        max_wait: float = 0.005,
+        max_batch_size: int = 64,
+        max_in_flight: int = 4,
+        timeout: Optional[float] = 60,
+    ):
+        self.embedding_model = embedding_model
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embedding-coalescer")
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Future] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._batch_started = 0.0
+        self._flusher: Optional[threading.Thread] = None
+
+    def embed(self, text: str) -> List[float]:
+        with self._cond:
+            future = self._in_flight.get(text) or self._pending.get(text)
+            if future is None:
+                future = Future()
+                if not self._pending:
+                    self._batch_started = time.monotonic()
+                self._pending[text] = future
+                self._ensure_flusher()
+                self._cond.notify()
+        return future.result(self.timeout)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="embedding-coalescer-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                while len(self._pending) < self.max_batch_size:
+                    remaining = self._batch_started + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                texts = list(self._pending)[:self.max_batch_size]
+                batch = {text: self._pending.pop(text) for text in texts}
+                self._in_flight.update(batch)
+                # Anything left over starts the next window right away
+                self._batch_started = time.monotonic()
+
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: Dict[str, Future]) -> None:
+        texts = list(batch)
+        try:
+            embeddings = self.embedding_model.embed_documents(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"embedding model returned {len(embeddings)} embeddings for {len(texts)} texts")
+            for text, embedding in zip(texts, embeddings):
+                batch[text].set_result(embedding)
+        except Exception as e:
+            logger.warning("Coalesced embedding request for %d texts failed: %s", len(texts), e)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Never leave a caller waiting on a future nothing will resolve
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("coalesced embedding request ended without a result"))
+            with self._cond:
+                for text in texts:
+                    if self._in_flight.get(text) is batch[text]:
+                        del self._in_flight[text]
+
+
+_coalescers: Dict[tuple, EmbeddingCoalescer] = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_query_coalescer(embedding_model: Embeddings) -> EmbeddingCoalescer:
+    """Process-wide coalescer per embedding model, shared by all CacheEmbedding instances."""
+    key = (type(embedding_model).__name__, getattr(embedding_model, "model", None))
+    with _coalescers_lock:
+        coalescer = _coalescers.get(key)
+        if coalescer is None:
+            coalescer = EmbeddingCoalescer(
+                embedding_model,
+                max_wait=config.EMBEDDING_COALESCE_WINDOW_MS / 1000,
+                max_batch_size=config.EMBEDDING_COALESCE_MAX_BATCH,
+                max_in_flight=config.EMBEDDING_COALESCE_MAX_IN_FLIGHT,
+                timeout=config.EMBEDDING_COALESCE_TIMEOUT,
+            )
+            _coalescers[key] = coalescer
+        return coalescer
@@ -0,0 +1,101 @@
+"""
+Compact binary encoding for cached embedding vectors.
+
+Layout, little-endian::
+
+    magic     3 bytes   b"EMB"
+    version   1 byte    FORMAT_VERSION
+    dtype     1 byte    0 = float32, 1 = float16
+    reserved  1 byte
+    dimension 2 bytes   uint16
+    model     4 bytes   uint32 CRC-32 of the embedding model's name, 0 if unknown
+    values    dimension * itemsize bytes
+
+The 12-byte header keeps the values aligned, so decoding is a zero-copy
+``np.frombuffer`` view for float32. Decoding with a ``model`` rejects vectors
+of another model, even of the same dimension. Version 1 rows have no model
+field and are decoded unchecked. Rows written before the binary format hold
+a pickled ``list[float]`` and are still readable; see
+``migrate_legacy_embeddings`` in cache_embedding.py for rewriting them.
+"""
+
+import io
+import pickle
+import struct
+import zlib
+from typing import Optional
+
+import numpy as np
+
+MAGIC = b"EMB"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<3sBBxHI")
+# Version 1 header, without the model
+HEADER_V1 = struct.Struct("<3sBBxH")
+
+_DTYPES = {
+    0: np.dtype("<f4"),
+    1: np.dtype("<f2"),
+}
+_DTYPE_CODES = {"float32": 0, "float16": 1}
+
+
+class EmbeddingModelMismatch(ValueError):
+    """A cached vector was computed by a different embedding model."""
+
+
+def model_id(model: str) -> int:
+    return zlib.crc32(model.encode("utf-8")) if model else 0
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Unpickler for legacy rows, which only ever held a list of floats."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"legacy embedding may not reference {module}.{name}")
+
+
+def is_legacy(blob: bytes) -> bool:
+    return bytes(blob[:len(MAGIC)]) != MAGIC
+
+
+def encode_embedding(embedding, dtype: str = "float32", model: str = "") -> bytes:
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    code = _DTYPE_CODES[dtype]
+    values = np.asarray(embedding, dtype=_DTYPES[code])
+    if values.ndim != 1:
+        raise ValueError("Embedding must be a one-dimensional vector")
+    return HEADER.pack(MAGIC, FORMAT_VERSION, code, len(values), model_id(model)) + values.tobytes()
+
+
+def decode_embedding(blob: bytes, model: Optional[str] = None) -> np.ndarray:
+    """
+    Decode a cached embedding into a read-only float32 array, raising
+    EmbeddingModelMismatch if ``model`` is given and the vector records
+    another one.
+    """
+    if is_legacy(blob):
+        values = np.asarray(_LegacyUnpickler(io.BytesIO(blob)).load(), dtype=np.float32)
+        values.flags.writeable = False
+        return values
+
+    version = blob[len(MAGIC)]
+    if version == 1:
+        _, _, code, dimension = HEADER_V1.unpack_from(blob)
+        offset = HEADER_V1.size
+    elif version == FORMAT_VERSION:
+        _, _, code, dimension, stored_model = HEADER.unpack_from(blob)
+        offset = HEADER.size
+        if model and stored_model and stored_model != model_id(model):
+            raise EmbeddingModelMismatch(f"Embedding was not computed by {model}")
+    else:
+        raise ValueError(f"Unsupported embedding format version: {version}")
+    if code not in _DTYPES:
+        raise ValueError(f"Unsupported embedding dtype code: {code}")
+
+    values = np.frombuffer(blob, dtype=_DTYPES[code], count=dimension, offset=offset)
+    if values.dtype != np.float32:
+        values = values.astype(np.float32)
+        values.flags.writeable = False
+    return values
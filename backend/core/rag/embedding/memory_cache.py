@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+from configs.config import config
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node, array header)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class EmbeddingMemoryCache:
+    """
+    Bounded in-process LRU cache of float32 embeddings with a TTL.
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` would be exceeded, and expire ``ttl`` seconds after
+    being stored. Cached arrays are read-only because they are shared.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[np.ndarray, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            embedding, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return embedding
+
+    def put(self, key: Hashable, embedding) -> np.ndarray:
+        """Store ``embedding`` and return the shared read-only float32 copy."""
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+        if not self.enabled:
+            return embedding
+
+        size = embedding.nbytes + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return embedding
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (embedding, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+        return embedding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+# First-level cache for query embeddings, in front of the database cache
+query_embedding_cache = EmbeddingMemoryCache(
+    max_entries=config.EMBEDDING_MEMORY_CACHE_MAX_ENTRIES,
+    max_bytes=config.EMBEDDING_MEMORY_CACHE_MAX_BYTES,
+    ttl=config.EMBEDDING_MEMORY_CACHE_TTL,
+)
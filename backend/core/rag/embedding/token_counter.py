@@ -0,0 +1,41 @@
+import logging
+import math
+from functools import lru_cache
+from typing import Callable
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to a conservative estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Upper-bound style estimate: roughly three UTF-8 bytes per token."""
+    return math.ceil(len(text.encode("utf-8")) / 3)
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """
+    Return a function counting tokens of ``model``'s tokenizer.
+
+    Uses tiktoken when it is installed and its encoding can be loaded,
+    otherwise ``estimate_tokens``.
+    """
+    if tiktoken is None:
+        return estimate_tokens
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Could not load tiktoken encoding for %s, estimating tokens: %s", model, e)
+        return estimate_tokens
+
+    def count_tokens(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count_tokens
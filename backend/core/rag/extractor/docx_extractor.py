@@ -0,0 +1,36 @@
+import zipfile
+from typing import Optional
+from xml.etree import ElementTree
+
+from core.rag.extractor.extractor_base import BaseExtractor
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class DocxExtractor(BaseExtractor):
+    """Paragraph text of Word (.docx) documents, read straight from the package XML."""
+
+    name = "docx"
+    extensions = ("docx",)
+    mime_types = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+
+    def extract(self, path: str, start: int = 0, end: Optional[int] = None) -> str:
+        paragraphs = []
+        with zipfile.ZipFile(path) as package, package.open("word/document.xml") as document:
+            parts: list[str] = []
+            for event, elem in ElementTree.iterparse(document, events=("end",)):
+                tag = elem.tag
+                if tag == f"{W_NS}t":
+                    parts.append(elem.text or "")
+                elif tag == f"{W_NS}tab":
+                    parts.append("\t")
+                elif tag in (f"{W_NS}br", f"{W_NS}cr"):
+                    parts.append("\n")
+                elif tag == f"{W_NS}p":
+                    text = "".join(parts).strip()
+                    if text:
+                        paragraphs.append(text)
+                    parts = []
+                    # Free finished paragraphs; the document tree is never kept whole
+                    elem.clear()
+        return "\n\n".join(paragraphs)
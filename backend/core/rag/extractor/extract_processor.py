@@ -0,0 +1,211 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from configs.config import config
+from core.rag.extractor.docx_extractor import DocxExtractor
+from core.rag.extractor.extractor_base import BaseExtractor, UnsupportedFileType
+from core.rag.extractor.html_extractor import HtmlExtractor
+from core.rag.extractor.pdf_extractor import PdfExtractor
+from core.rag.extractor.text_extractor import TextExtractor
+
+logger = logging.getLogger(__name__)
+
+# Extractors by name, extension and MIME type; the extension/mime_type pair
+# is the one stored on UploadFile
+_extractors: dict[str, BaseExtractor] = {}
+_by_extension: dict[str, BaseExtractor] = {}
+_by_mime_type: dict[str, BaseExtractor] = {}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def register_extractor(extractor: BaseExtractor) -> None:
+    """
+    Make ``extractor`` available for its extensions and MIME types. Pool
+    workers only know extractors registered when this module is imported.
+    """
+    _extractors[extractor.name] = extractor
+    for extension in extractor.extensions:
+        _by_extension[extension.lower()] = extractor
+    for mime_type in extractor.mime_types:
+        _by_mime_type[mime_type.lower()] = extractor
+
+
+for _extractor in (TextExtractor(), HtmlExtractor(), DocxExtractor(), PdfExtractor()):
+    register_extractor(_extractor)
+
+
+def file_extension(filename: Optional[str]) -> str:
+    """Lower-case extension without the dot, as stored in UploadFile.extension."""
+    return os.path.splitext(filename or "")[1].lstrip(".").lower()
+
+
+def get_extractor(filename: Optional[str] = None, mime_type: Optional[str] = None) -> BaseExtractor:
+    """
+    Extractor for a file, by extension first: browsers report many types as
+    application/octet-stream, while the extension is what the user chose.
+    """
+    extractor = _by_extension.get(file_extension(filename))
+    if extractor is None and mime_type:
+        extractor = _by_mime_type.get(mime_type.split(";")[0].strip().lower())
+    if extractor is None:
+        raise UnsupportedFileType(f"Unsupported file type: {filename or mime_type}")
+    return extractor
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = config.EXTRACTION_MAX_WORKERS or os.cpu_count() or 1
+            # spawn: forking a process that runs threads and holds DB connections is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _count_sections(name: str, path: str) -> int:
+    return _extractors[name].count_sections(path)
+
+
+def _extract_range(name: str, path: str, start: int, end: int) -> str:
+    return _extractors[name].extract(path, start, end)
+
+
+@contextmanager
+def _local_path(file: BinaryIO) -> Iterator[str]:
+    """A filesystem path with the file's content, for extractors running in another process."""
+    name = getattr(file, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="extract-", dir=config.INGESTION_SPOOL_DIR or None) as spool:
+        shutil.copyfileobj(file, spool, config.INGESTION_READ_SIZE)
+        spool.flush()
+        yield spool.name
+
+
+class TextStream:
+    """
+    Iterator over the text of a file that also tracks how far into the file
+    it has got: ``chars`` yielded so far and ``fraction`` of the input they
+    cover (1.0 once exhausted), from which callers that stop early can
+    extrapolate to the whole document.
+    """
+
+    def __init__(self):
+        self.chars = 0
+        self.fraction = 0.0
+        self.exhausted = False
+        self._pieces: Optional[Iterator[str]] = None
+
+    def __iter__(self) -> "TextStream":
+        return self
+
+    def __next__(self) -> str:
+        try:
+            piece = next(self._pieces)
+        except StopIteration:
+            self.exhausted = True
+            self.fraction = 1.0
+            raise
+        self.chars += len(piece)
+        return piece
+
+    def close(self) -> None:
+        self._pieces.close()
+
+
+def extract_text(file: BinaryIO, filename: Optional[str] = None, mime_type: Optional[str] = None) -> TextStream:
+    """
+    The text of ``file`` in document order, as a lazy TextStream.
+
+    Plain text is decoded incrementally in the calling thread. Other formats
+    are extracted in the process pool: the document is cut into ranges of
+    EXTRACTION_PAGES_PER_TASK sections which run in parallel, at most
+    EXTRACTION_MAX_IN_FLIGHT at a time, and each range is yielded as soon as
+    it and every range before it are done, so the splitter can start on the
+    first pages while later ones are still being extracted.
+    """
+    extractor = get_extractor(filename, mime_type)
+    stream = TextStream()
+    if extractor.cpu_bound:
+        stream._pieces = _extract_in_pool(file, filename, extractor, stream)
+    else:
+        stream._pieces = _extract_inline(file, extractor, stream)
+    return stream
+
+
+def _extract_inline(file: BinaryIO, extractor: BaseExtractor, stream: TextStream) -> Iterator[str]:
+    size = None
+    if file.seekable():
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    for piece in extractor.stream(file):
+        if size:
+            stream.fraction = min(file.tell() / size, 1.0)
+        yield piece
+
+
+def _extract_in_pool(
+    file: BinaryIO, filename: Optional[str], extractor: BaseExtractor, stream: TextStream
+) -> Iterator[str]:
+    with _local_path(file) as path:
+        pool = _get_pool()
+        try:
+            sections = pool.submit(_count_sections, extractor.name, path).result()
+            per_task = max(config.EXTRACTION_PAGES_PER_TASK, 1)
+            ranges = iter(range(0, sections, per_task))
+            pending: deque[tuple[int, Future]] = deque()
+            first = True
+            try:
+                while True:
+                    while len(pending) < max(config.EXTRACTION_MAX_IN_FLIGHT, 1):
+                        start = next(ranges, None)
+                        if start is None:
+                            break
+                        end = min(start + per_task, sections)
+                        pending.append((end, pool.submit(_extract_range, extractor.name, path, start, end)))
+                    if not pending:
+                        break
+                    end, future = pending.popleft()
+                    text = future.result()
+                    stream.fraction = end / sections
+                    if text:
+                        yield text if first else "\n\n" + text
+                        first = False
+            finally:
+                # The consumer stopped early or a range failed: drop queued work
+                for _, future in pending:
+                    future.cancel()
+        except BrokenProcessPool:
+            logger.error("Extraction pool broke while extracting %s; it will be recreated", filename)
+            _reset_pool(pool)
+            raise
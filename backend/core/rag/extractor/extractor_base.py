@@ -0,0 +1,36 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+
+
+class UnsupportedFileType(ValueError):
+    """No extractor is registered for a file's extension or MIME type."""
+
+
+class BaseExtractor(ABC):
+    """
+    Turns files of one format family into plain text.
+
+    Extractors are looked up by ``extensions`` (without the dot) and
+    ``mime_types``. CPU-bound extractors run in the extraction process
+    pool, one task per range of sections (pages for PDFs), and must be
+    importable by name there; the others stream from the file object in
+    the calling thread.
+    """
+
+    name: str = ""
+    extensions: tuple[str, ...] = ()
+    mime_types: tuple[str, ...] = ()
+    cpu_bound: bool = True
+
+    def count_sections(self, path: str) -> int:
+        """Number of independently extractable sections; 1 if the format has none."""
+        return 1
+
+    @abstractmethod
+    def extract(self, path: str, start: int = 0, end: Optional[int] = None) -> str:
+        """Text of sections [start, end) of the file at ``path``."""
+        raise NotImplementedError
+
+    def stream(self, file: BinaryIO) -> Iterator[str]:
+        """Incremental text of ``file``; only used for extractors that are not CPU-bound."""
+        raise NotImplementedError
@@ -0,0 +1,73 @@
+import re
+from html.parser import HTMLParser
+from typing import Optional
+
+from configs.config import config
+from core.rag.extractor.extractor_base import BaseExtractor
+
+# Elements whose boundaries separate blocks of text
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav",
+    "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+}
+PARAGRAPH_TAGS = {"article", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "p", "pre", "section", "table"}
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "head", "svg"}
+WHITESPACE = re.compile(r"\s+")
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+        # Newlines owed before the next text: 1 for a line break, 2 for a paragraph
+        self._pending_break = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._break(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._break(tag)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        # Whitespace runs render as one space, as in a browser
+        text = WHITESPACE.sub(" ", data)
+        if text == " ":
+            if self.parts and not self._pending_break:
+                self.parts.append(text)
+            return
+        if self._pending_break and self.parts:
+            self.parts.append("\n" * self._pending_break)
+        self._pending_break = 0
+        self.parts.append(text)
+
+    def _break(self, tag):
+        self._pending_break = max(self._pending_break, 2 if tag in PARAGRAPH_TAGS else 1)
+
+
+class HtmlExtractor(BaseExtractor):
+    """Visible text of HTML documents, with block elements turned into line and paragraph breaks."""
+
+    name = "html"
+    extensions = ("html", "htm", "xhtml")
+    mime_types = ("text/html", "application/xhtml+xml")
+
+    def extract(self, path: str, start: int = 0, end: Optional[int] = None) -> str:
+        collector = _TextCollector()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                data = f.read(config.INGESTION_READ_SIZE)
+                if not data:
+                    break
+                collector.feed(data)
+        collector.close()
+        return "\n".join(line.strip() for line in "".join(collector.parts).split("\n"))
@@ -0,0 +1,35 @@
+from typing import Optional
+
+try:
+    import pypdf
+except ImportError:  # locked in the Pipfile; only bare dev environments lack it, and then reject PDFs
+    pypdf = None
+
+from core.rag.extractor.extractor_base import BaseExtractor, UnsupportedFileType
+
+
+class PdfExtractor(BaseExtractor):
+    """Text layer of PDF documents; pages are the sections extracted in parallel."""
+
+    name = "pdf"
+    extensions = ("pdf",)
+    mime_types = ("application/pdf",)
+
+    @staticmethod
+    def _reader(path: str):
+        if pypdf is None:
+            raise UnsupportedFileType("PDF extraction requires the pypdf package")
+        return pypdf.PdfReader(path)
+
+    def count_sections(self, path: str) -> int:
+        return len(self._reader(path).pages)
+
+    def extract(self, path: str, start: int = 0, end: Optional[int] = None) -> str:
+        pages = self._reader(path).pages
+        end = len(pages) if end is None else min(end, len(pages))
+        texts = []
+        for i in range(start, end):
+            text = (pages[i].extract_text() or "").strip()
+            if text:
+                texts.append(text)
+        return "\n\n".join(texts)
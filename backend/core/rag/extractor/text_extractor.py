@@ -0,0 +1,39 @@
+import codecs
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from configs.config import config
+from core.rag.extractor.extractor_base import BaseExtractor
+
+
+def decode_stream(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Decode byte chunks incrementally, never splitting a multi-byte character."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for data in chunks:
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_text(fileobj: BinaryIO, encoding: str = "utf-8", read_size: int = None) -> Iterator[str]:
+    """Decode a binary file incrementally."""
+    read_size = read_size or config.INGESTION_READ_SIZE
+    return decode_stream(iter(lambda: fileobj.read(read_size), b""), encoding)
+
+
+class TextExtractor(BaseExtractor):
+    """Plain text formats, decoded as UTF-8 (a leading BOM is dropped)."""
+
+    name = "text"
+    extensions = ("txt", "text", "md", "markdown", "csv", "tsv", "json", "log", "rst")
+    mime_types = ("text/plain", "text/markdown", "text/csv", "text/tab-separated-values", "application/json")
+    cpu_bound = False
+
+    def extract(self, path: str, start: int = 0, end: Optional[int] = None) -> str:
+        with open(path, "rb") as f:
+            return "".join(self.stream(f))
+
+    def stream(self, file: BinaryIO) -> Iterator[str]:
+        return iter_text(file, encoding="utf-8-sig")
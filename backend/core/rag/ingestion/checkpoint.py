@@ -0,0 +1,71 @@
+import bisect
+import hashlib
+import uuid
+from typing import BinaryIO, Iterable
+
+from repository.ingestion_checkpoint import IngestionCheckpointRepository
+
+# Namespace for chunk ids derived from (dataset, content, chunk index)
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c9a52-3d0e-4f43-9a57-2b8e4c1d7e90")
+
+
+def hash_file(file: BinaryIO, read_size: int = 1024 * 1024) -> str:
+    """sha256 of a seekable file, leaving it rewound."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    while True:
+        data = file.read(read_size)
+        if not data:
+            break
+        digest.update(data)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def to_ranges(indices: Iterable[int]) -> list[tuple[int, int]]:
+    """Collapse chunk indices into sorted [start, end) ranges."""
+    ranges: list[list[int]] = []
+    for index in sorted(indices):
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] = index + 1
+        else:
+            ranges.append([index, index + 1])
+    return [(start, end) for start, end in ranges]
+
+
+class IngestionCheckpoint:
+    """
+    Which chunks of one (dataset, content) pair are already stored.
+
+    Chunk ids are derived from the dataset, the content hash and the chunk
+    index, so a chunk re-sent after a failure lands on the same row instead
+    of creating a duplicate.
+    """
+
+    def __init__(self, repository: IngestionCheckpointRepository, dataset_id: str, content_hash: str):
+        self.repository = repository
+        self.dataset_id = dataset_id
+        self.content_hash = content_hash
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        for start, end in repository.get_completed_ranges(dataset_id, content_hash):
+            self._starts.append(start)
+            self._ends.append(end)
+
+    @property
+    def completed_chunks(self) -> int:
+        return sum(end - start for start, end in zip(self._starts, self._ends))
+
+    def is_done(self, chunk_index: int) -> bool:
+        i = bisect.bisect_right(self._starts, chunk_index) - 1
+        return i >= 0 and chunk_index < self._ends[i]
+
+    def doc_id(self, chunk_index: int) -> str:
+        return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{self.dataset_id}:{self.content_hash}:{chunk_index}"))
+
+    def commit(self, chunk_indices: Iterable[int]) -> None:
+        """Record chunks as stored; call only after their rows are committed."""
+        self.repository.record(self.dataset_id, self.content_hash, to_ranges(chunk_indices))
+
+    def clear(self) -> None:
+        self.repository.clear(self.dataset_id)
@@ -0,0 +1,40 @@
+import uuid
+from collections import defaultdict
+
+from core.rag.datasource.document import Document
+
+
+class ChunkDiff:
+    """
+    Matches the chunks of a new document version against the stored ones
+    by ``doc_hash``.
+
+    Used as the pipeline's ``chunk_filter``: a chunk whose text is already
+    stored claims that row and is skipped, anything else is embedded. The
+    rows left unclaimed afterwards belong to text that is gone. Chunks to
+    embed are given their ``doc_id`` here, so a failed update can delete
+    the ``added_ids`` it may have stored.
+    """
+
+    def __init__(self, stored_hashes: dict[str, str]):
+        self._ids_by_hash: dict[str, list[str]] = defaultdict(list)
+        for doc_id, doc_hash in stored_hashes.items():
+            self._ids_by_hash[doc_hash].append(doc_id)
+        self.unchanged = 0
+        self.added = 0
+        self.added_ids: list[str] = []
+
+    def __call__(self, doc: Document) -> bool:
+        ids = self._ids_by_hash.get(doc.metadata["doc_hash"])
+        if ids:
+            # Repeated chunks each claim their own row
+            ids.pop()
+            self.unchanged += 1
+            return False
+        self.added += 1
+        doc.metadata["doc_id"] = str(uuid.uuid4())
+        self.added_ids.append(doc.metadata["doc_id"])
+        return True
+
+    def vanished_ids(self) -> list[str]:
+        return [doc_id for ids in self._ids_by_hash.values() for doc_id in ids]
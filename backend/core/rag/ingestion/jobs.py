@@ -0,0 +1,309 @@
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobKind(str, Enum):
+    INGEST = "ingest"    # new dataset from a spooled upload
+    UPDATE = "update"    # new version of an existing dataset's document
+    RESUME = "resume"    # finish a failed ingestion from its checkpoints
+
+
+class JobCancelled(Exception):
+    """Raised from a progress callback once cancellation of the job was requested."""
+
+
+SQL_CREATE_JOBS = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'ingest',
+    tenant_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    mime_type TEXT,
+    spool_path TEXT,
+    status TEXT NOT NULL,
+    dataset_id TEXT,
+    chunks_split INTEGER NOT NULL DEFAULT 0,
+    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+    chunks_stored INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+SQL_CREATE_JOBS_INDEX = """
+CREATE INDEX IF NOT EXISTS ingestion_jobs_status_idx ON ingestion_jobs (status, created_at)
+"""
+
+# Oldest queued job whose tenant is below its running-job limit
+SQL_NEXT_QUEUED = """
+SELECT j.* FROM ingestion_jobs j
+WHERE j.status = 'queued'
+  AND (SELECT count(*) FROM ingestion_jobs r
+       WHERE r.tenant_id = j.tenant_id AND r.status = 'running') < ?
+ORDER BY j.created_at
+LIMIT 1
+"""
+
+PROGRESS_FIELDS = ("chunks_split", "chunks_embedded", "chunks_stored")
+
+
+class SQLiteJobStore:
+    """
+    Job records in SQLite. ``:memory:`` keeps them for the life of the
+    process; a file path lets queued jobs survive a restart.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(SQL_CREATE_JOBS)
+            self._conn.execute(SQL_CREATE_JOBS_INDEX)
+
+    def create(
+        self,
+        tenant_id: str,
+        filename: str,
+        spool_path: Optional[str],
+        dataset_id: Optional[str] = None,
+        kind: JobKind = JobKind.INGEST,
+        mime_type: Optional[str] = None,
+    ) -> dict:
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ingestion_jobs "
+                "(id, kind, tenant_id, filename, mime_type, spool_path, dataset_id, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id, JobKind(kind).value, tenant_id, filename, mime_type, spool_path, dataset_id,
+                    JobStatus.QUEUED.value, time.time(),
+                ),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ingestion_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_by_tenant(self, tenant_id: str, limit: int = 50) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM ingestion_jobs WHERE tenant_id = ? ORDER BY created_at DESC LIMIT ?",
+                (tenant_id, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_next(self, per_tenant_limit: int) -> Optional[dict]:
+        """Atomically move the next eligible queued job to running."""
+        with self._lock:
+            row = self._conn.execute(SQL_NEXT_QUEUED, (per_tenant_limit,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, started_at = ? WHERE id = ?",
+                (JobStatus.RUNNING.value, time.time(), row["id"]),
+            )
+        return self.get(row["id"])
+
+    def add_progress(self, job_id: str, field: str, count: int) -> None:
+        if field not in PROGRESS_FIELDS:
+            raise ValueError(f"unknown progress field {field}")
+        with self._lock:
+            self._conn.execute(f"UPDATE ingestion_jobs SET {field} = {field} + ? WHERE id = ?", (count, job_id))
+
+    def set_dataset(self, job_id: str, dataset_id: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE ingestion_jobs SET dataset_id = ? WHERE id = ?", (dataset_id, job_id))
+
+    def finish(self, job_id: str, status: JobStatus, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status.value, error, time.time(), job_id),
+            )
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued job outright or flag a running one; returns the
+        status the job had, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM ingestion_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row["status"] == JobStatus.QUEUED.value:
+                self._conn.execute(
+                    "UPDATE ingestion_jobs SET status = ?, finished_at = ? WHERE id = ?",
+                    (JobStatus.CANCELLED.value, time.time(), job_id),
+                )
+            elif row["status"] == JobStatus.RUNNING.value:
+                self._conn.execute("UPDATE ingestion_jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            return row["status"]
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cancel_requested FROM ingestion_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def requeue_running(self) -> int:
+        """Return jobs interrupted by a restart to the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, started_at = NULL, "
+                "chunks_split = 0, chunks_embedded = 0, chunks_stored = 0 WHERE status = ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            )
+            return cursor.rowcount
+
+
+class JobProgress:
+    """Progress sink handed to a running job; doubles as its cancellation check."""
+
+    def __init__(self, store: SQLiteJobStore, job_id: str):
+        self._store = store
+        self.job_id = job_id
+
+    def __call__(self, stage: str, count: int) -> None:
+        self._store.add_progress(self.job_id, f"chunks_{stage}", count)
+        self.check_cancelled()
+
+    def set_dataset(self, dataset_id: str) -> None:
+        self._store.set_dataset(self.job_id, dataset_id)
+
+    def check_cancelled(self) -> None:
+        if self._store.cancel_requested(self.job_id):
+            raise JobCancelled(f"job {self.job_id} was cancelled")
+
+
+class IngestionJobQueue:
+    """
+    Worker pool running ingestion jobs from a job store.
+
+    ``handler(job, progress)`` does the work; it reports progress through
+    ``progress(stage, count)`` which raises JobCancelled once the job is
+    cancelled. At most ``per_tenant_limit`` jobs of one tenant run at a time.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteJobStore,
+        handler: Callable[[dict, JobProgress], None],
+        workers: int = 2,
+        per_tenant_limit: int = 1,
+        on_finished: Optional[Callable[[dict], None]] = None,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.per_tenant_limit = per_tenant_limit
+        self.on_finished = on_finished
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        requeued = self.store.requeue_running()
+        if requeued:
+            logger.info("Requeued %d interrupted ingestion jobs", requeued)
+        self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(
+        self,
+        tenant_id: str,
+        filename: str,
+        spool_path: Optional[str] = None,
+        dataset_id: Optional[str] = None,
+        kind: JobKind = JobKind.INGEST,
+        mime_type: Optional[str] = None,
+    ) -> dict:
+        job = self.store.create(tenant_id, filename, spool_path, dataset_id, kind, mime_type)
+        with self._cond:
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        previous = self.store.request_cancel(job_id)
+        if previous is None:
+            return None
+        job = self.store.get(job_id)
+        if previous == JobStatus.QUEUED.value and self.on_finished is not None:
+            self.on_finished(job)
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping:
+                    job = self.store.claim_next(self.per_tenant_limit)
+                    if job is not None:
+                        break
+                    # Also wakes up periodically so jobs held back by the
+                    # tenant limit are picked up when a sibling finishes.
+                    self._cond.wait(1.0)
+                if job is None:
+                    return
+            self._run(job)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _run(self, job: dict) -> None:
+        progress = JobProgress(self.store, job["id"])
+        try:
+            progress.check_cancelled()
+            self.handler(job, progress)
+            self.store.finish(job["id"], JobStatus.SUCCEEDED)
+        except JobCancelled:
+            logger.info("Ingestion job %s cancelled", job["id"])
+            self.store.finish(job["id"], JobStatus.CANCELLED)
+        except Exception as e:
+            logger.exception("Ingestion job %s failed", job["id"])
+            self.store.finish(job["id"], JobStatus.FAILED, str(e))
+        finally:
+            if self.on_finished is not None:
+                try:
+                    self.on_finished(self.store.get(job["id"]))
+                except Exception:
+                    logger.exception("on_finished hook failed for job %s", job["id"])
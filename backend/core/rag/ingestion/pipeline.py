@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from configs.config import config
+from core.rag.datasource.document import Document
+from core.rag.datasource.vector_factory import Vector
+from core.rag.ingestion.checkpoint import IngestionCheckpoint
+from core.rag.text_splitter.text_splitter import TextSplitter
+from repository.ext_database import session_scope
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage has already failed."""
+
+
+@dataclass
+class IngestionResult:
+    chunks: int = 0
+    batches: int = 0
+    skipped: int = 0
+    dimension: Optional[int] = None
+    elapsed: float = 0.0
+
+
+def chunk_hash(text: str) -> str:
+    """doc_hash of a chunk; matches sha256(convert_to(text, 'UTF8')) in Postgres."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IngestionPipeline:
+    """
+    Split -> embed -> store, connected by bounded queues.
+
+    The calling thread splits and batches chunks, one worker embeds batches
+    and another writes them to the vector store, so embedding requests and
+    database inserts overlap. At most ``queue_size`` batches wait between
+    stages, which keeps peak memory independent of the input size.
+    """
+
+    def __init__(
+        self,
+        vector: Vector,
+        text_splitter: TextSplitter,
+        batch_size: int = None,
+        queue_size: int = None,
+    ):
+        self.vector = vector
+        self.text_splitter = text_splitter
+        self.batch_size = batch_size or config.INGESTION_BATCH_SIZE
+        self.queue_size = queue_size or config.INGESTION_QUEUE_SIZE
+        self._failed = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+        self._on_progress: Optional[Callable[[str, int], None]] = None
+        self._checkpoint: Optional[IngestionCheckpoint] = None
+
+    def run(
+        self,
+        pieces: Iterable[str],
+        metadata: dict,
+        on_progress: Optional[Callable[[str, int], None]] = None,
+        checkpoint: Optional[IngestionCheckpoint] = None,
+        chunk_filter: Optional[Callable[[Document], bool]] = None,
+        chunks: Optional[Iterable[tuple[str, int, int]]] = None,
+    ) -> IngestionResult:
+        """
+        Ingest text arriving as ``pieces``. ``on_progress(stage, count)`` is
+        called with ``split``, ``embedded`` and ``stored`` as batches move
+        through; an exception raised from it aborts the run.
+
+        With a ``checkpoint`` chunks it records as stored are skipped, chunk
+        ids are deterministic and each stored batch is recorded, so a failed
+        run can be resumed without embedding anything twice.
+
+        Chunks for which ``chunk_filter`` returns False are skipped as well;
+        every chunk carries its ``doc_hash`` by then. A ``doc_id`` the filter
+        sets on a chunk it keeps is used when there is no checkpoint.
+
+        ``chunks`` are (chunk, start, end) triples of the same text split
+        earlier with this pipeline's splitter, e.g. for a preview; they are
+        used as they are and ``pieces`` is not read.
+        """
+        self._on_progress = on_progress
+        self._checkpoint = checkpoint
+        result = IngestionResult()
+        started = time.monotonic()
+        embed_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        store_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        embedder = threading.Thread(
+            target=self._stage, args=(self._embed_stage, embed_queue, store_queue), name="ingest-embed", daemon=True
+        )
+        storer = threading.Thread(
+            target=self._stage,
+            args=(self._store_stage, store_queue, None, result),
+            name="ingest-store",
+            daemon=True,
+        )
+        embedder.start()
+        storer.start()
+
+        try:
+            batch = []
+            if chunks is not None:
+                documents = self.text_splitter.documents_from_chunks(chunks, metadata)
+            else:
+                documents = self.text_splitter.split_documents_stream(pieces, metadata)
+            for doc in documents:
+                chunk_index = doc.metadata["chunk_index"]
+                doc.metadata["doc_hash"] = chunk_hash(doc.page_content)
+                if chunk_filter is not None and not chunk_filter(doc):
+                    result.skipped += 1
+                    continue
+                if checkpoint is not None:
+                    if checkpoint.is_done(chunk_index):
+                        result.skipped += 1
+                        continue
+                    doc.metadata["doc_id"] = checkpoint.doc_id(chunk_index)
+                else:
+                    doc.metadata.setdefault("doc_id", str(uuid.uuid4()))
+                batch.append(doc)
+                if len(batch) >= self.batch_size:
+                    self._report("split", len(batch))
+                    self._put(embed_queue, batch)
+                    batch = []
+            if batch:
+                self._report("split", len(batch))
+                self._put(embed_queue, batch)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(embed_queue, _DONE, force=True)
+            embedder.join()
+            storer.join()
+
+        if self._error is not None:
+            if isinstance(self._error, PipelineAborted):
+                raise RuntimeError("ingestion pipeline aborted")
+            raise self._error
+
+        if result.dimension is not None or result.skipped:
+            self.vector.create_index(result.dimension)
+        result.elapsed = time.monotonic() - started
+        logger.info(
+            "Ingested %d chunks in %d batches in %.2fs (%d already stored)",
+            result.chunks, result.batches, result.elapsed, result.skipped,
+        )
+        return result
+
+    def _stage(self, handler, inbox: queue.Queue, outbox: Optional[queue.Queue], *args) -> None:
+        # Stage threads do not inherit the job's context, so each gets its own
+        # session (e.g. for the embedding cache), closed when the stage ends
+        with session_scope():
+            self._run_stage(handler, inbox, outbox, *args)
+
+    def _run_stage(self, handler, inbox: queue.Queue, outbox: Optional[queue.Queue], *args) -> None:
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                if self._failed.is_set():
+                    # Keep draining so an upstream put never blocks forever
+                    continue
+                try:
+                    output = handler(item, *args)
+                    if outbox is not None:
+                        self._put(outbox, output)
+                except BaseException as e:
+                    self._fail(e)
+        finally:
+            if outbox is not None:
+                self._put(outbox, _DONE, force=True)
+
+    def _embed_stage(self, batch: list[Document]) -> tuple[list[Document], list]:
+        embeddings = self.vector.embed_documents(batch)
+        self._report("embedded", len(batch))
+        return batch, embeddings
+
+    def _store_stage(self, item, result: IngestionResult) -> None:
+        documents, embeddings = item
+        self.vector.add_embeddings(documents, embeddings)
+        if self._checkpoint is not None:
+            self._checkpoint.commit(doc.metadata["chunk_index"] for doc in documents)
+        result.chunks += len(documents)
+        result.batches += 1
+        if result.dimension is None and len(embeddings):
+            result.dimension = len(embeddings[0])
+        self._report("stored", len(documents))
+
+    def _report(self, stage: str, count: int) -> None:
+        if self._on_progress is not None:
+            self._on_progress(stage, count)
+
+    def _put(self, q: queue.Queue, item, force: bool = False) -> None:
+        """Blocking put that gives up once another stage failed, unless ``force``d."""
+        while True:
+            if self._failed.is_set() and not force:
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fail(self, error: BaseException) -> None:
+        with self._error_lock:
+            if self._error is None or isinstance(self._error, PipelineAborted):
+                self._error = error
+        self._failed.set()
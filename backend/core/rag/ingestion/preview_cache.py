@@ -0,0 +1,184 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+# Sidecar of a spooled upload holding all its chunks, one JSON [chunk, start, end] per line
+CHUNKS_SUFFIX = ".chunks"
+
+
+def chunks_path(spool_path: str) -> str:
+    return spool_path + CHUNKS_SUFFIX
+
+
+def write_chunks(spool_path: str, chunks: Iterable[tuple[str, int, int]]) -> None:
+    with open(chunks_path(spool_path), "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+
+
+def read_chunks(spool_path: str) -> Optional[Iterator[tuple[str, int, int]]]:
+    """Chunks stored next to a spooled upload, or None if it has none."""
+    path = chunks_path(spool_path)
+    if not os.path.exists(path):
+        return None
+
+    def chunks():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                chunk, start, end = json.loads(line)
+                yield chunk, start, end
+
+    return chunks()
+
+
+def discard_files(spool_path: str) -> None:
+    """Remove a spooled upload and its chunks sidecar."""
+    for path in (spool_path, chunks_path(spool_path)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class PreviewEntry:
+    token: str
+    tenant_id: str
+    filename: str
+    mime_type: Optional[str]
+    spool_path: str
+    chunk_size: int
+    chunk_overlap: int
+    size: int = 0
+    expires_at: float = field(default=0.0, repr=False)
+
+    @property
+    def has_chunks(self) -> bool:
+        return os.path.exists(chunks_path(self.spool_path))
+
+
+class PreviewCache:
+    """
+    Spooled uploads kept between a preview and the process request that
+    confirms it, keyed by an unguessable token.
+
+    Entries expire ``ttl`` seconds after the preview and are evicted least-
+    recently-used first once ``max_entries`` or ``max_bytes`` (spool plus
+    chunks sidecar) would be exceeded; evicted and expired entries have
+    their files deleted. ``take`` hands an entry and its files over to the
+    caller, who is responsible for them from then on.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, PreviewEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def put(
+        self,
+        tenant_id: str,
+        filename: str,
+        mime_type: Optional[str],
+        spool_path: str,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> Optional[PreviewEntry]:
+        """
+        Take ownership of a spooled upload and return its entry, or None if
+        the cache is disabled or the upload too large; the files then stay
+        with the caller.
+        """
+        entry = PreviewEntry(
+            token=secrets.token_urlsafe(24),
+            tenant_id=tenant_id,
+            filename=filename,
+            mime_type=mime_type,
+            spool_path=spool_path,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        entry.size = sum(
+            os.path.getsize(path) for path in (spool_path, chunks_path(spool_path)) if os.path.exists(path)
+        )
+        if not self.enabled or entry.size > self.max_bytes:
+            return None
+
+        entry.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[entry.token] = entry
+            self._bytes += entry.size
+            evicted = self._evict_locked()
+        self._discard(evicted)
+        return entry
+
+    def get(self, token: str, tenant_id: str) -> Optional[PreviewEntry]:
+        """The tenant's entry for ``token``; it stays cached."""
+        with self._lock:
+            evicted = self._evict_locked()
+            entry = self._entries.get(token)
+            if entry is not None and entry.tenant_id == tenant_id:
+                self._entries.move_to_end(token)
+            else:
+                entry = None
+        self._discard(evicted)
+        return entry
+
+    def take(self, token: str, tenant_id: str) -> Optional[PreviewEntry]:
+        """Remove the tenant's entry for ``token`` from the cache and hand its files to the caller."""
+        with self._lock:
+            evicted = self._evict_locked()
+            entry = self._entries.get(token)
+            if entry is not None and entry.tenant_id == tenant_id:
+                del self._entries[token]
+                self._bytes -= entry.size
+            else:
+                entry = None
+        self._discard(evicted)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._bytes = 0
+        self._discard(entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict_locked(self) -> list[PreviewEntry]:
+        """Drop expired entries, then the least recently used over the limits."""
+        now = time.monotonic()
+        evicted = [entry for entry in self._entries.values() if entry.expires_at <= now]
+        for entry in evicted:
+            del self._entries[entry.token]
+            self._bytes -= entry.size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            evicted.append(entry)
+        return evicted
+
+    @staticmethod
+    def _discard(entries: list[PreviewEntry]) -> None:
+        # File removal happens outside the lock
+        for entry in entries:
+            discard_files(entry.spool_path)
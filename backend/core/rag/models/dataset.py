@@ -1,5 +1,9 @@
-import pickle
+from typing import Optional
+
+import numpy as np
 from sqlalchemy.dialects.postgresql import JSONB
+from configs.config import config
+from core.rag.embedding.embedding_codec import decode_embedding, encode_embedding
 from models.engine import db
 from core.rag.models.account import Account
 from app.types.types import StringUUID
@@ -11,6 +15,7 @@ class Dataset(db.Model):
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="dataset_pkey"),
         db.Index("dataset_tenant_idx", "tenant_id"),
+        db.Index("dataset_tenant_content_hash_idx", "tenant_id", "content_hash"),
     )
 
     id = db.Column(StringUUID, nullable=False, server_default=db.text("uuid_generate_v4()"))
@@ -20,6 +25,12 @@ class Dataset(db.Model):
     created_by = db.Column(StringUUID, nullable=False)
     index_struct = db.Column(JSONB, nullable=True)
     name = db.Column(db.String(255), nullable=False)
+    # sha256 of the uploaded file; identifies a retry of the same upload
+    content_hash = db.Column(db.String(64), nullable=True)
+    # indexing | completed | failed
+    indexing_status = db.Column(
+        db.String(32), nullable=False, server_default=db.text("'completed'::character varying")
+    )
     
     @property
     def created_by_account(self):
@@ -41,7 +52,8 @@ class Dataset(db.Model):
             "id": self.id,
             "tenant_id": self.tenant_id,
             "created_by": self.created_by,
-            "name"  : self.name
+            "name"  : self.name,
+            "indexing_status": self.indexing_status
         }
 
     @staticmethod
@@ -68,11 +80,41 @@ class Document(db.Model):
     def dataset(self):
         return db.query(Dataset).filter(Dataset.id == self.dataset_id).first()
 
+class DatasetIngestionCheckpoint(db.Model):
+    """A contiguous range of chunks [batch_start, batch_end) that is embedded and stored."""
+    __tablename__ = "dataset_ingestion_checkpoints"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("id", name="dataset_ingestion_checkpoint_pkey"),
+        db.Index(
+            "dataset_ingestion_checkpoint_range_idx", "dataset_id", "content_hash", "batch_start", unique=True
+        ),
+    )
+
+    id = db.Column(StringUUID, nullable=False, server_default=db.text("uuid_generate_v4()"))
+    dataset_id = db.Column(StringUUID, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    batch_start = db.Column(db.Integer, nullable=False)
+    batch_end = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
+
+class StorageObject(db.Model):
+    """A content-addressed stored file and the number of datasets referencing it."""
+    __tablename__ = "storage_objects"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("key", name="storage_object_pkey"),
+    )
+
+    key = db.Column(db.String(512), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False, server_default=db.text("0"))
+    ref_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
+
 class Embedding(db.Model):
     __tablename__ = "embeddings"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="embedding_pkey"),
         db.Index("created_at_idx", "created_at"),
+        db.Index("embedding_provider_hash_idx", "provider_name", "hash", unique=True),
     )
 
     id = db.Column(StringUUID, primary_key=True, server_default=db.text("uuid_generate_v4()"))
@@ -81,8 +123,12 @@ class Embedding(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
     provider_name = db.Column(db.String(255), nullable=False, server_default=db.text("''::character varying"))
 
-    def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+    @staticmethod
+    def serialize(embedding_data: list[float], model: str = "") -> bytes:
+        return encode_embedding(embedding_data, config.EMBEDDING_CACHE_DTYPE, model)
+
+    def set_embedding(self, embedding_data: list[float], model: str = ""):
+        self.embedding = self.serialize(embedding_data, model)
 
-    def get_embedding(self) -> list[float]:
-        return pickle.loads(self.embedding)
\ No newline at end of file
+    def get_embedding(self, model: Optional[str] = None) -> np.ndarray:
+        return decode_embedding(self.embedding, model)
\ No newline at end of file
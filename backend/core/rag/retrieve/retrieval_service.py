@@ -3,6 +3,7 @@
 from typing import List, Optional
 from core.rag.datasource.document import Document
 from core.rag.datasource.vector_factory import Vector
+from core.rag.datasource.vector_type import VectorType
 from core.rag.models.dataset import Dataset
 from repository.ext_database import db
 
@@ -49,7 +50,7 @@ class RetrievalService:
 
         try:
             # Initialize vector store
-            vector = Vector(dataset=dataset)
+            vector = Vector(dataset=dataset, vector_type=VectorType.PGVECTOR)
             
             # Clean query
             cleaned_query = RetrievalService._clean_query(query)
@@ -104,62 +105,12 @@ class RetrievalService:
         Returns:
             Combined and reranked list of documents
         """
-        # Get results from both methods
-        semantic_docs = vector.search_by_vector(
+        return vector.search_hybrid(
             query=query,
-            top_k=top_k * 2,  # Get more results for better combination
-            score_threshold=score_threshold
+            top_k=top_k,
+            score_threshold=score_threshold,
+            weights=weights
         )
-        print(f"Semantic search results: {semantic_docs}")
-
-        full_text_docs = vector.search_by_full_text(
-            query=query,
-            top_k=top_k * 2
-        )
-        print(f"Full-text search results: {full_text_docs}")
-        
-        # Combine results with weighted scores
-        doc_scores = {}
-        
-        # Process semantic search results
-        for doc in semantic_docs:
-            doc_id = doc.metadata.get('doc_id')
-            score = doc.metadata.get('score', 0) * weights['semantic']
-            doc_scores[doc_id] = {
-                'doc': doc,
-                'score': score
-            }
-        
-        # Process full-text search results
-        for doc in full_text_docs:
-            doc_id = doc.metadata.get('doc_id')
-            full_text_score = doc.metadata.get('score', 0) * weights['full_text']
-            
-            if doc_id in doc_scores:
-                # Add full-text score to existing document
-                doc_scores[doc_id]['score'] += full_text_score
-            else:
-                # Add new document
-                doc_scores[doc_id] = {
-                    'doc': doc,
-                    'score': full_text_score
-                }
-        
-        # Sort by combined score and get top_k results
-        sorted_docs = sorted(
-            doc_scores.values(),
-            key=lambda x: x['score'],
-            reverse=True
-        )[:top_k]
-        
-        # Update metadata with combined scores
-        results = []
-        for item in sorted_docs:
-            doc = item['doc']
-            doc.metadata['score'] = item['score']
-            results.append(doc)
-        
-        return results
 
     @staticmethod
     def _clean_query(query: str) -> str:
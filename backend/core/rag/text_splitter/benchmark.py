@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of TextSplitter against langchain's RecursiveCharacterTextSplitter.
+
+    python -m core.rag.text_splitter.benchmark --size-mb 8 --repeat 3
+
+langchain is only needed for the comparison; without it just the native
+splitter is timed.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, List
+
+from core.rag.text_splitter.text_splitter import TextSplitter
+
+WORDS = [
+    "policy", "employee", "request", "approval", "within", "days", "the", "of", "and", "a",
+    "must", "be", "submitted", "manager", "leave", "travel", "expense", "réunion", "übersicht",
+]
+
+
+def make_text(size_bytes: int, seed: int = 0) -> str:
+    """
+    Prose-like text with sentences, lines and paragraphs of varying length.
+    Some paragraphs are long unbroken lines, as text extracted from PDFs often is.
+    """
+    rng = random.Random(seed)
+    parts: List[str] = []
+    size = 0
+    while size < size_bytes:
+        sentences = []
+        for _ in range(rng.randint(1, 40)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(4, 30))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        per_line = len(sentences) if rng.random() < 0.3 else 3
+        paragraph = "\n".join(" ".join(sentences[i:i + per_line]) for i in range(0, len(sentences), per_line))
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+
+def measure(name: str, split: Callable[[str], List[str]], text: str, repeat: int) -> dict:
+    best = float("inf")
+    chunks = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = split(text)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    split(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    return {
+        "name": name,
+        "chunks": len(chunks),
+        "seconds": best,
+        "mb_per_s": size_mb / best if best else float("inf"),
+        "peak_mb": peak / (1024 * 1024),
+        "output": chunks,
+    }
+
+
+def run(size_mb: float, chunk_size: int, chunk_overlap: int, repeat: int) -> List[dict]:
+    text = make_text(int(size_mb * 1024 * 1024))
+    native = TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    results = [measure("native", native.split_text, text, repeat)]
+
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        print("langchain is not installed; skipping the comparison")
+    else:
+        baseline = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=["\n\n", "\n", " ", ""]
+        )
+        results.append(measure("langchain", baseline.split_text, text, repeat))
+        if results[0]["output"] != results[1]["output"]:
+            print("WARNING: native and langchain chunks differ")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.size_mb, args.chunk_size, args.chunk_overlap, args.repeat)
+    print(f"{'splitter':<10} {'chunks':>8} {'seconds':>9} {'MB/s':>8} {'peak MB':>9}")
+    for r in results:
+        print(f"{r['name']:<10} {r['chunks']:>8} {r['seconds']:>9.3f} {r['mb_per_s']:>8.1f} {r['peak_mb']:>9.1f}")
+    if len(results) == 2:
+        print(f"speedup: {results[1]['seconds'] / results[0]['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+from collections import deque
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+
+class Span(NamedTuple):
+    """A chunk as character offsets into the source text, end exclusive."""
+    start: int
+    end: int
+
+
+def _self_overlapping(separator: str) -> bool:
+    """Whether two occurrences of ``separator`` can overlap, as in "\\n\\n" within "\\n\\n\\n"."""
+    return any(separator[:k] == separator[-k:] for k in range(1, len(separator)))
+
+
+class RecursiveSpanSplitter:
+    """
+    Recursive character splitting with the semantics of langchain's
+    RecursiveCharacterTextSplitter (separators kept at the start of the
+    following piece, whitespace stripped from chunks), done over offsets.
+
+    Pieces are never copied out of the source text: the text is scanned
+    with ``str.find`` once per separator level, pieces are merged into
+    chunks as they are found and every chunk is yielded as soon as it is
+    complete. ``length_function`` measures a piece of text; it defaults to
+    character count, pass a token counter for token-based sizing.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: Optional[List[str]] = None,
+        length_function: Optional[Callable[[str], int]] = None,
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators if separators is not None else ["\n\n", "\n", " ", ""])
+        self.length_function = length_function
+
+    def split_spans(self, text: str) -> Iterator[Span]:
+        """Yield chunk spans of ``text`` in order."""
+        yield from self._split(text, 0, len(text), 0)
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def _measure(self, text: str, start: int, end: int) -> int:
+        if self.length_function is None:
+            return end - start
+        return self.length_function(text[start:end])
+
+    def _split(self, text: str, start: int, end: int, level: int) -> Iterator[Span]:
+        separators = self.separators
+        # First separator present in this span, as langchain picks it
+        sep_index = len(separators) - 1
+        for i in range(level, len(separators)):
+            if separators[i] == "" or text.find(separators[i], start, end) != -1:
+                sep_index = i
+                break
+        separator = separators[sep_index]
+        has_finer = sep_index + 1 < len(separators)
+
+        if self.length_function is None:
+            if separator == "":
+                # Character-level split of a run without any separator: merging
+                # single characters amounts to fixed windows
+                yield from self._char_windows(text, start, end)
+                return
+            if not _self_overlapping(separator):
+                yield from self._split_by_offsets(text, start, end, sep_index)
+                return
+
+        # Pieces below chunk_size are merged as they arrive: ``current`` holds
+        # the pieces of the chunk being built and ``total`` their length.
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        current: deque[tuple[int, int, int]] = deque()
+        total = 0
+        for piece_start, piece_end in self._pieces(text, start, end, separator):
+            length = self._measure(text, piece_start, piece_end)
+            if length < chunk_size:
+                if total + length > chunk_size and current:
+                    span = self._strip(text, current[0][0], current[-1][1])
+                    if span is not None:
+                        yield span
+                    # Keep trailing pieces as overlap for the next chunk
+                    while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                        total -= current.popleft()[2]
+                current.append((piece_start, piece_end, length))
+                total += length
+                continue
+
+            if current:
+                span = self._strip(text, current[0][0], current[-1][1])
+                if span is not None:
+                    yield span
+                current.clear()
+                total = 0
+            if not has_finer:
+                # Oversized and unsplittable; langchain passes these through unstripped
+                yield Span(piece_start, piece_end)
+            else:
+                yield from self._split(text, piece_start, piece_end, sep_index + 1)
+
+        if current:
+            span = self._strip(text, current[0][0], current[-1][1])
+            if span is not None:
+                yield span
+
+    def _split_by_offsets(self, text: str, start: int, end: int, sep_index: int) -> Iterator[Span]:
+        """
+        Same result as the piece-by-piece merge in ``_split`` when lengths are
+        character counts: a chunk's length is then just the distance between
+        its first and last boundary, so each chunk is found with a couple of
+        ``find``/``rfind`` calls instead of visiting every piece.
+
+        Boundaries are ``start`` and every occurrence of the separator; this
+        needs a separator whose occurrences cannot overlap.
+        """
+        separator = self.separators[sep_index]
+        sep_len = len(separator)
+        has_finer = sep_index + 1 < len(self.separators)
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        find = text.find
+
+        def next_boundary(pos: int) -> int:
+            found = find(separator, pos + 1, end)
+            return end if found == -1 else found
+
+        # Current chunk is [chunk_start, chunk_end), or empty if chunk_start is None
+        chunk_start = None
+        chunk_end = pos = start
+        while pos < end:
+            if chunk_start is None:
+                piece_end = next_boundary(pos)
+                if piece_end - pos >= chunk_size:
+                    if not has_finer:
+                        yield Span(pos, piece_end)
+                    else:
+                        yield from self._split(text, pos, piece_end, sep_index + 1)
+                    pos = piece_end
+                    continue
+                chunk_start, chunk_end = pos, piece_end
+
+            # Take every following piece that still fits
+            limit = chunk_start + chunk_size
+            if end <= limit:
+                chunk_end = pos = end
+                break
+            last = text.rfind(separator, chunk_end + 1, min(limit + sep_len, end))
+            if last != -1:
+                chunk_end = last
+
+            # The next piece overflows the chunk
+            piece_end = next_boundary(chunk_end)
+            length = piece_end - chunk_end
+            span = self._strip(text, chunk_start, chunk_end)
+            if span is not None:
+                yield span
+            if length >= chunk_size:
+                if not has_finer:
+                    yield Span(chunk_end, piece_end)
+                else:
+                    yield from self._split(text, chunk_end, piece_end, sep_index + 1)
+                chunk_start = None
+                pos = piece_end
+                continue
+
+            # Keep the trailing pieces that fit as overlap, then add the piece
+            keep_from = chunk_end - min(chunk_overlap, chunk_size - length)
+            overlap_start = find(separator, keep_from, chunk_end)
+            chunk_start = chunk_end if overlap_start == -1 else overlap_start
+            chunk_end = pos = piece_end
+
+        if chunk_start is not None:
+            span = self._strip(text, chunk_start, chunk_end)
+            if span is not None:
+                yield span
+
+    @staticmethod
+    def _pieces(text: str, start: int, end: int, separator: str) -> Iterator[tuple[int, int]]:
+        """Split [start, end) before every occurrence of ``separator``, dropping empty pieces."""
+        if separator == "":
+            for i in range(start, end):
+                yield i, i + 1
+            return
+        sep_len = len(separator)
+        piece_start = start
+        pos = text.find(separator, start, end)
+        while pos != -1:
+            if pos > piece_start:
+                yield piece_start, pos
+            piece_start = pos
+            pos = text.find(separator, pos + sep_len, end)
+        if end > piece_start:
+            yield piece_start, end
+
+    def _char_windows(self, text: str, start: int, end: int) -> Iterator[Span]:
+        stride = max(self.chunk_size - self.chunk_overlap, 1)
+        window_start = start
+        while window_start + self.chunk_size < end:
+            span = self._strip(text, window_start, window_start + self.chunk_size)
+            if span is not None:
+                yield span
+            window_start += stride
+        span = self._strip(text, window_start, end)
+        if span is not None:
+            yield span
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int) -> Optional[Span]:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return None
+        return Span(start, end)
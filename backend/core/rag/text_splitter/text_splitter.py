@@ -1,45 +1,133 @@
 # core/rag/text_splitter/text_splitter.py
 
-from typing import List
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import Iterable, Iterator, List, Optional, Tuple
+from configs.config import config
 from core.rag.datasource.document import Document
+from core.rag.embedding.token_counter import get_token_counter
+from core.rag.text_splitter.recursive_splitter import RecursiveSpanSplitter
+
+# Rough characters per token, used to size streaming windows for token-based chunking
+CHARS_PER_TOKEN = 4
 
 class TextSplitter:
-    """Text splitter service for chunking documents."""
-    
+    """
+    Text splitter service for chunking documents.
+
+    Chunk sizes are counted in characters, or in tokens of ``model``'s
+    tokenizer when ``length_unit`` is ``"tokens"``. Documents carry the
+    character offsets of their chunk in ``start_offset``/``end_offset``.
+    """
+
     def __init__(
         self,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
-        separators: List[str] = ["\n\n", "\n", " ", ""]
+        separators: List[str] = ["\n\n", "\n", " ", ""],
+        length_unit: str = "chars",
+        model: Optional[str] = None
     ):
-            
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        if length_unit not in ("chars", "tokens"):
+            raise ValueError(f"length_unit must be 'chars' or 'tokens', not {length_unit!r}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_unit = length_unit
+
+        length_function = None
+        if length_unit == "tokens":
+            length_function = get_token_counter(model or config.EMBEDDING_MODEL)
+
+        self.text_splitter = RecursiveSpanSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            separators=separators
+            separators=separators,
+            length_function=length_function
         )
 
+    def split_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Lazily yield (start, end) character offsets of the chunks of ``text``."""
+        return self.text_splitter.split_spans(text)
+
     def split_text(self, text: str) -> List[str]:
         """Split text into chunks."""
         return self.text_splitter.split_text(text)
-    
+
     def split_documents(self, text: str, metadata: dict = None) -> List[Document]:
         """Split text and create Document objects."""
-        chunks = self.split_text(text)
+        spans = list(self.split_spans(text))
         documents = []
-        
-        for i, chunk in enumerate(chunks):
+
+        for i, (start, end) in enumerate(spans):
             # Extend metadata with chunk information
             chunk_metadata = {
                 **(metadata or {}),
                 "chunk_index": i,
-                "chunk_total": len(chunks)
+                "chunk_total": len(spans),
+                "start_offset": start,
+                "end_offset": end
             }
-            
+
             documents.append(Document(
-                page_content=chunk,
+                page_content=text[start:end],
                 metadata=chunk_metadata
             ))
-            
-        return documents
\ No newline at end of file
+
+        return documents
+
+    def split_stream_spans(self, pieces: Iterable[str], window_size: int = None) -> Iterator[Tuple[str, int, int]]:
+        """
+        Split text arriving in pieces without holding all of it in memory,
+        yielding (chunk, start, end) with offsets into the whole text.
+
+        Text is split in windows of ``window_size`` characters (default 16
+        chunks); every chunk of a window but the last is yielded, and the text
+        from the last one on starts the next window, so chunks never end at a
+        window boundary. Windows depend only on the text, not on how it is
+        cut into pieces, so the same text always gives the same chunks.
+
+        The chunks are deterministic but not identical to split_text's: the
+        separators are chosen per window rather than for the whole text, so
+        chunk boundaries can differ, mostly around window boundaries.
+        """
+        chunk_chars = self.chunk_size * (CHARS_PER_TOKEN if self.length_unit == "tokens" else 1)
+        window_size = max(window_size or chunk_chars * 16, chunk_chars * 2)
+        buffer = ""
+        # Offset of buffer[0] in the whole text
+        base = 0
+        for piece in pieces:
+            buffer += piece
+            while len(buffer) >= window_size:
+                window = buffer[:window_size]
+                spans = list(self.split_spans(window))
+                if len(spans) < 2:
+                    # A single unsplittable run; emit it rather than grow unbounded
+                    for start, end in spans:
+                        yield window[start:end], base + start, base + end
+                    buffer = buffer[window_size:]
+                    base += window_size
+                    continue
+                for start, end in spans[:-1]:
+                    yield window[start:end], base + start, base + end
+                carry_from = spans[-1][0]
+                buffer = buffer[carry_from:]
+                base += carry_from
+        if buffer:
+            for start, end in self.split_spans(buffer):
+                yield buffer[start:end], base + start, base + end
+
+    def split_stream(self, pieces: Iterable[str], window_size: int = None) -> Iterator[str]:
+        """Chunks of text arriving in pieces; see split_stream_spans."""
+        for chunk, _, _ in self.split_stream_spans(pieces, window_size):
+            yield chunk
+
+    def split_documents_stream(self, pieces: Iterable[str], metadata: dict = None) -> Iterator[Document]:
+        """Streaming counterpart of split_documents; chunk_total is not known up front."""
+        return self.documents_from_chunks(self.split_stream_spans(pieces), metadata)
+
+    @staticmethod
+    def documents_from_chunks(chunks: Iterable[Tuple[str, int, int]], metadata: dict = None) -> Iterator[Document]:
+        """Documents for (chunk, start, end) triples computed earlier, as split_documents_stream makes them."""
+        for i, (chunk, start, end) in enumerate(chunks):
+            yield Document(
+                page_content=chunk,
+                metadata={**(metadata or {}), "chunk_index": i, "start_offset": start, "end_offset": end}
+            )
@@ -1,4 +1,4 @@
 # Import models here for easy access
 from .chat import ChatRequest
-from .knowledge_base import FileChunk, FilePreviewResponse, FileProcessResponse, FileProcessRequest, DatasetResponse, DatasetRequest
+from .knowledge_base import FileChunk, FilePreviewResponse, FileProcessResponse, FileProcessRequest, IngestionJobResponse, DatasetResponse, DatasetRequest
 from .auth import UserRegisterRequest, UserLoginRequest, UserResponse
\ No newline at end of file
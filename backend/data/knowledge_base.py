@@ -9,12 +9,31 @@ class FileChunk(BaseModel):
 class FilePreviewResponse(BaseModel):
     chunks: List[FileChunk]
     total_chunks: int
+    estimated: bool = Field(False, description="Whether total_chunks is extrapolated from the start of the file.")
+    preview_token: Optional[str] = Field(None, description="Token that stands for the previewed file in later requests.")
 
 class FileProcessResponse(BaseModel):
     success: bool
     dataset_id: Optional[str] = None
+    job_id: Optional[str] = None
+    status: Optional[str] = None
     error: Optional[str] = None
 
+class IngestionJobResponse(BaseModel):
+    id: str = Field(..., description="Ingestion job id.")
+    kind: str = Field("ingest", description="ingest, update or resume.")
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled.")
+    filename: str
+    dataset_id: Optional[str] = Field(None, description="Dataset being built, once created.")
+    chunks_split: int = 0
+    chunks_embedded: int = 0
+    chunks_stored: int = 0
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
 class FileProcessRequest(BaseModel):
     tenant_id: str
     
@@ -23,6 +42,7 @@ class DatasetResponse(BaseModel):
     tenant_id: str = Field(..., description="Unique identifier for the tenant.")
     created_by: Optional[str] = Field(None, description="ID of the user who created the dataset.")
     name: Optional[str] = Field(None, description="Name of the dataset.")
+    indexing_status: Optional[str] = Field(None, description="indexing, completed or failed.")
     
 class DatasetRequest(BaseModel):
     name: str = Field(..., description="Name of the dataset, e.g., a file name.")
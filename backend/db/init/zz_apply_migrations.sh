@@ -0,0 +1,16 @@
+#!/bin/bash
+# Runs after init.sql on a fresh database (init scripts run in name order) and
+# applies every migration in db/migrations, mounted at /docker-entrypoint-migrations,
+# so a new volume gets the schema the code expects. Existing databases are not
+# re-initialised; apply new migrations to them by hand.
+set -euo pipefail
+
+MIGRATIONS_DIR="${MIGRATIONS_DIR:-/docker-entrypoint-migrations}"
+
+for migration in "$MIGRATIONS_DIR"/*.sql; do
+    echo "Applying $(basename "$migration")"
+    psql -v ON_ERROR_STOP=1 \
+        -v text_search_config="${PGVECTOR_TEXT_SEARCH_CONFIG:-english}" \
+        --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" \
+        -f "$migration"
+done
@@ -0,0 +1,58 @@
+-- Adds the stored text_tsv column and its GIN index to embedding_* collections
+-- created before full-text search used a precomputed tsvector.
+--
+-- Adding the column computes the tsvector of every row and rewrites the table,
+-- so it happens here, ahead of a deploy, and never on the search path: search
+-- on a collection without text_tsv fails until this script has run.
+--
+-- Each collection is indexed with the text search configuration stored in its
+-- dataset's index_struct, falling back to the text_search_config variable,
+-- which must match PGVECTOR_TEXT_SEARCH_CONFIG (default english):
+--
+--   psql -v text_search_config=german -f 001_embedding_text_tsv.sql
+
+\if :{?text_search_config}
+\else
+\set text_search_config english
+\endif
+
+SELECT set_config('rag.text_search_config', :'text_search_config', false);
+
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT c.table_name,
+               coalesce(d.text_search_config, current_setting('rag.text_search_config')) AS text_search_config
+        FROM information_schema.tables c
+        LEFT JOIN (
+            -- index_struct is text in init.sql and jsonb in the model, and may
+            -- hold the JSON object itself or a JSON string of it
+            SELECT lower('embedding_' || (s.index_struct #>> '{vector_store,class_prefix}')) AS table_name,
+                   s.index_struct ->> 'text_search_config' AS text_search_config
+            FROM (
+                SELECT CASE jsonb_typeof(j.index_struct)
+                           WHEN 'string' THEN (j.index_struct #>> '{}')::jsonb
+                           ELSE j.index_struct
+                       END AS index_struct
+                FROM (
+                    SELECT index_struct::jsonb AS index_struct
+                    FROM public.datasets
+                    WHERE index_struct IS NOT NULL
+                ) j
+            ) s
+        ) d ON d.table_name = c.table_name
+        WHERE c.table_schema = 'public' AND c.table_name LIKE 'embedding\_%'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE public.%I ADD COLUMN IF NOT EXISTS text_tsv tsvector '
+            'GENERATED ALWAYS AS (to_tsvector(%L::regconfig, coalesce(text, ''''))) STORED',
+            t.table_name, t.text_search_config
+        );
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS %I ON public.%I USING gin (text_tsv)',
+            substr(t.table_name, length('embedding_') + 1) || '_tsv_idx', t.table_name
+        );
+    END LOOP;
+END $$;
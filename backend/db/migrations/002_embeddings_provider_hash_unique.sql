@@ -0,0 +1,14 @@
+-- Makes (provider_name, hash) unique in the embedding cache so CacheEmbedding
+-- can bulk insert with ON CONFLICT DO NOTHING.
+--
+-- Older code could cache the same chunk twice when it repeated within one
+-- upload; keep the first copy of each before adding the unique index.
+
+DELETE FROM public.embeddings e
+USING public.embeddings d
+WHERE e.provider_name = d.provider_name
+  AND e.hash = d.hash
+  AND e.ctid > d.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS embedding_provider_hash_idx
+    ON public.embeddings USING btree (provider_name, hash);
@@ -0,0 +1,25 @@
+-- Resumable ingestion: datasets remember the hash of their source file and
+-- whether indexing finished, and every stored batch of chunks is recorded so a
+-- retry skips the batches that are already embedded and stored.
+--
+-- Existing datasets were indexed in one go and are marked completed.
+
+ALTER TABLE public.datasets ADD COLUMN IF NOT EXISTS content_hash varchar(64);
+ALTER TABLE public.datasets
+    ADD COLUMN IF NOT EXISTS indexing_status varchar(32) NOT NULL DEFAULT 'completed'::character varying;
+
+CREATE INDEX IF NOT EXISTS dataset_tenant_content_hash_idx
+    ON public.datasets USING btree (tenant_id, content_hash);
+
+CREATE TABLE IF NOT EXISTS public.dataset_ingestion_checkpoints (
+    id uuid NOT NULL DEFAULT uuid_generate_v4(),
+    dataset_id uuid NOT NULL,
+    content_hash varchar(64) NOT NULL,
+    batch_start integer NOT NULL,
+    batch_end integer NOT NULL,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP(0),
+    CONSTRAINT dataset_ingestion_checkpoint_pkey PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS dataset_ingestion_checkpoint_range_idx
+    ON public.dataset_ingestion_checkpoints USING btree (dataset_id, content_hash, batch_start);
@@ -0,0 +1,14 @@
+-- Content-addressed file storage: files stored under the sha256 of their
+-- content are shared by every dataset of a tenant with the same content, and
+-- reference counted so the object is deleted with its last dataset.
+--
+-- Files stored under per-upload keys before this migration have no row here
+-- and are deleted directly, as before.
+
+CREATE TABLE IF NOT EXISTS public.storage_objects (
+    key varchar(512) NOT NULL,
+    size bigint NOT NULL DEFAULT 0,
+    ref_count integer NOT NULL DEFAULT 0,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP(0),
+    CONSTRAINT storage_object_pkey PRIMARY KEY (key)
+);
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from service.auth import AuthService
 from data import UserRegisterRequest, UserLoginRequest, UserResponse
 from app.utils.dependencies import oauth2_scheme
+from app.libs.executors import AUTH, DATABASE, run_blocking
 
 class AuthHandler:
     def __init__(self, auth_service: AuthService):
@@ -14,9 +15,19 @@ class AuthHandler:
         self.router.post("/login")(self.login_user)
         self.router.get("/me", response_model=UserResponse)(self.get_current_user)
 
+    def _register(self, **kwargs) -> UserResponse:
+        return UserResponse.model_validate(self.auth_service.register_user(**kwargs), from_attributes=True)
+
+    def _user_from_token(self, token: str):
+        user = self.auth_service.get_user_from_token(token)
+        return UserResponse.model_validate(user, from_attributes=True) if user else None
+
     async def register_user(self, user_data: UserRegisterRequest):
         try:
-            return self.auth_service.register_user(
+            # bcrypt hashing dominates, so registration runs on the auth executor
+            return await run_blocking(
+                AUTH,
+                self._register,
                 email=user_data.email,
                 password=user_data.password,
                 first_name=user_data.first_name,
@@ -27,7 +38,9 @@ class AuthHandler:
 
     async def login_user(self, user_data: UserLoginRequest):
         try:
-            token = self.auth_service.authenticate_user(
+            token = await run_blocking(
+                AUTH,
+                self.auth_service.authenticate_user,
                 email=user_data.email,
                 password=user_data.password
             )
@@ -42,7 +55,7 @@ class AuthHandler:
 
     async def get_current_user(self, token: str = Depends(oauth2_scheme)):
         try:
-            user = self.auth_service.get_user_from_token(token)
+            user = await run_blocking(DATABASE, self._user_from_token, token)
             if not user:
                 raise HTTPException(status_code=401, detail="Invalid token")
             return user
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from data.bots import BotCreateRequest, BotConfigureRequest, MessageResponse, ChatRequest, ChatResponse
 from app.utils.dependencies import get_current_user_tenant
+from app.libs.executors import DATABASE, run_blocking
 
 class BotHandler:
     def __init__(self, bot_service, chat_service):
@@ -16,9 +17,19 @@ class BotHandler:
         self.router.post("/{bot_id}/configure", response_model=MessageResponse)(self.configure_bot)
         self.router.post("/{bot_id}/chat", response_model=ChatResponse)(self.chat)
 
+    # Models are turned into dicts on the executor thread, whose session loaded them
+    def _bot_dicts(self, tenant_id: str) -> list:
+        return [bot.to_dict() for bot in self.bot_service.get_bots(tenant_id)]
+
+    def _bot_dict(self, bot_id: str, tenant_id: str):
+        bot = self.bot_service.get_bot(bot_id, tenant_id)
+        return bot.to_dict() if bot else None
+
     async def create_bot(self, bot_data: BotCreateRequest, tenant_id: str = Depends(get_current_user_tenant)):
         try:
-            bot = self.bot_service.create_bot(
+            await run_blocking(
+                DATABASE,
+                self.bot_service.create_bot,
                 name=bot_data.name,
                 description=bot_data.description,
                 tenant_id=tenant_id
@@ -29,17 +40,16 @@ class BotHandler:
 
     async def get_bots(self, tenant_id: str = Depends(get_current_user_tenant)):
         try:
-            bots = self.bot_service.get_bots(tenant_id)
-            return [bot.to_dict() for bot in bots]
+            return await run_blocking(DATABASE, self._bot_dicts, tenant_id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
     async def get_bot(self, bot_id: str, tenant_id: str = Depends(get_current_user_tenant)):
         try:
-            bot = self.bot_service.get_bot(bot_id, tenant_id)
+            bot = await run_blocking(DATABASE, self._bot_dict, bot_id, tenant_id)
             if not bot:
                 raise HTTPException(status_code=404, detail="Bot not found")
-            return bot.to_dict()
+            return bot
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
@@ -50,7 +60,9 @@ class BotHandler:
         tenant_id: str = Depends(get_current_user_tenant)
     ):
         try:
-            self.bot_service.configure_bot(
+            await run_blocking(
+                DATABASE,
+                self.bot_service.configure_bot,
                 bot_id=bot_id,
                 prompt_template=config.prompt_template,
                 dataset_id=config.dataset_id,
@@ -67,11 +79,11 @@ class BotHandler:
         tenant_id: str = Depends(get_current_user_tenant)
     ):
         try:
-            bot = self.bot_service.get_bot(bot_id, tenant_id)
+            bot = await run_blocking(DATABASE, self.bot_service.get_bot, bot_id, tenant_id)
             if not bot:
                 raise HTTPException(status_code=404, detail="Bot not found")
                 
-            response = self.chat_service.chat(
+            response = await self.chat_service.achat(
                 bot_id=bot_id,
                 message=request.query
             )
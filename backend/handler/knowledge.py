@@ -1,15 +1,25 @@
+import asyncio
+import json
+import os
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from fastapi.responses import JSONResponse
-from data import FilePreviewResponse, FileProcessResponse, FileProcessRequest, DatasetResponse, DatasetRequest
+from fastapi.responses import JSONResponse, StreamingResponse
+from data import FilePreviewResponse, FileProcessResponse, FileProcessRequest, IngestionJobResponse, DatasetResponse, DatasetRequest
 from service.file_service import FileService
 from core.llm.chat_assistant import ChatAssistant
+from core.rag.ingestion.jobs import IngestionJobQueue, JobKind, JobStatus
+from core.rag.ingestion.preview_cache import discard_files
+from core.rag.extractor.extract_processor import get_extractor
+from core.rag.extractor.extractor_base import UnsupportedFileType
+from configs.config import config
 from typing import Optional, List
 from app.utils.dependencies import get_current_user_tenant
+from app.libs.executors import DATABASE, FILES, JOBS, run_blocking
 
 class KnowledgeHandler:
-    def __init__(self, file_service: FileService, chat_assistant: ChatAssistant):
+    def __init__(self, file_service: FileService, chat_assistant: ChatAssistant, job_queue: IngestionJobQueue):
         self.file_service = file_service
         self.chat_assistant = chat_assistant
+        self.job_queue = job_queue
         self.router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
         self.setup_routes()
 
@@ -17,55 +27,263 @@ class KnowledgeHandler:
         self.router.post("/preview", response_model=FilePreviewResponse)(self.preview_file)
         self.router.post("/process", response_model=FileProcessResponse)(self.process_file)
         self.router.get("/datasets", response_model=List[DatasetResponse])(self.get_datasets)
+        self.router.put("/datasets/{dataset_id}/document", response_model=FileProcessResponse)(self.update_document)
+        self.router.post("/datasets/{dataset_id}/resume", response_model=FileProcessResponse)(self.resume_dataset)
+        self.router.get("/jobs/{job_id}", response_model=IngestionJobResponse)(self.get_job)
+        self.router.get("/jobs/{job_id}/events")(self.job_events)
+        self.router.post("/jobs/{job_id}/cancel", response_model=IngestionJobResponse)(self.cancel_job)
 
     async def preview_file(
         self, 
-        file: UploadFile = File(...),
+        file: Optional[UploadFile] = File(None),
+        preview_token: Optional[str] = Form(None),
+        chunk_size: Optional[int] = Form(None),
+        chunk_overlap: Optional[int] = Form(None),
+        limit: Optional[int] = Form(None),
+        offset: int = Form(0),
+        stream: bool = Form(False),
         tenant_id: str = Depends(get_current_user_tenant)
     ):
+        """
+        The first ``limit`` chunks after ``offset`` and an estimated total.
+        With ``stream`` every chunk from ``offset`` on is sent as NDJSON, one
+        chunk per line, split only as fast as the client reads.
+
+        An uploaded file is kept for a while under the returned preview
+        token, which later pages and process_file accept instead of the file.
+        """
+        limit = min(limit or config.PREVIEW_CHUNKS, config.PREVIEW_MAX_CHUNKS)
+        if file is None:
+            if not preview_token:
+                raise HTTPException(status_code=400, detail="Either file or preview_token is required")
+            entry = self._get_preview(preview_token, tenant_id)
+        else:
+            entry = None
+            try:
+                get_extractor(file.filename, file.content_type)
+            except UnsupportedFileType as e:
+                raise HTTPException(status_code=415, detail=str(e))
+
+        if stream:
+            return await self._stream_preview(file, entry, tenant_id, chunk_size, chunk_overlap, offset)
+
+        try:
+            if entry is not None:
+                preview = await run_blocking(
+                    FILES, self.file_service.preview_cached, entry, chunk_size, chunk_overlap, limit, offset
+                )
+                preview_token = entry.token
+            else:
+                preview, preview_token = await run_blocking(
+                    FILES, self.file_service.preview_upload, file.file, file.filename, tenant_id, file.content_type,
+                    chunk_size, chunk_overlap, limit, offset
+                )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        preview_data = [{
+            'content': doc.page_content,
+            'chunk_index': doc.metadata['chunk_index'],
+            'chunk_total': doc.metadata['chunk_total']
+        } for doc in preview.chunks]
+
+        return FilePreviewResponse(
+            chunks=preview_data,
+            total_chunks=preview.total_chunks,
+            estimated=preview.estimated,
+            preview_token=preview_token
+        )
+
+    def _get_preview(self, preview_token: str, tenant_id: str):
+        entry = self.file_service.preview_cache.get(preview_token, tenant_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Preview not found or expired; upload the file again")
+        return entry
+
+    async def _stream_preview(self, file, entry, tenant_id, chunk_size, chunk_overlap, offset):
+        headers = {}
+        if entry is not None:
+            spool_path, filename, mime_type = entry.spool_path, entry.filename, entry.mime_type
+            chunk_size = chunk_size or entry.chunk_size
+            chunk_overlap = entry.chunk_overlap if chunk_overlap is None else chunk_overlap
+            owned = False
+        else:
+            # The upload is closed once this handler returns, so the stream reads a copy
+            spool_path = await run_blocking(FILES, self.file_service.spool_upload, file.file)
+            filename, mime_type = file.filename, file.content_type
+            cached = self.file_service.preview_cache.put(
+                tenant_id, filename, mime_type, spool_path,
+                chunk_size or self.file_service.text_splitter.chunk_size,
+                self.file_service.text_splitter.chunk_overlap if chunk_overlap is None else chunk_overlap
+            )
+            owned = cached is None
+            if cached is not None:
+                headers["X-Preview-Token"] = cached.token
+
+        return StreamingResponse(
+            self._preview_lines(
+                spool_path, filename, mime_type, tenant_id, chunk_size, chunk_overlap, offset, owned
+            ),
+            media_type="application/x-ndjson",
+            headers=headers,
+        )
+
+    def _preview_lines(self, spool_path, filename, mime_type, tenant_id, chunk_size, chunk_overlap, offset, owned):
+        """NDJSON lines of every chunk from ``offset`` on, then one with the total."""
+        total = 0
         try:
-            content = await file.read()
-            success, chunks, error = self.file_service.get_chunk_preview(content, tenant_id)
-            if not success:
-                raise HTTPException(status_code=400, detail=error)
-
-            preview_data = [{
-                'content': doc.page_content,
-                'chunk_index': doc.metadata['chunk_index'],
-                'chunk_total': doc.metadata['chunk_total']
-            } for doc in chunks]
-
-            return FilePreviewResponse(chunks=preview_data, total_chunks=len(chunks))
+            with open(spool_path, "rb") as spool:
+                for doc in self.file_service.iter_preview_chunks(
+                    spool, filename, tenant_id, mime_type, chunk_size, chunk_overlap
+                ):
+                    total += 1
+                    if doc.metadata["chunk_index"] < offset:
+                        continue
+                    yield json.dumps({
+                        "content": doc.page_content,
+                        "chunk_index": doc.metadata["chunk_index"],
+                        "start_offset": doc.metadata["start_offset"],
+                        "end_offset": doc.metadata["end_offset"],
+                    }) + "\n"
+            yield json.dumps({"done": True, "total_chunks": total}) + "\n"
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error previewing file: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            if owned:
+                os.remove(spool_path)
 
     async def process_file(
         self, 
-        file: UploadFile = File(...),
+        file: Optional[UploadFile] = File(None),
+        preview_token: Optional[str] = Form(None),
         tenant_id: str = Depends(get_current_user_tenant)
     ):
+        """
+        Queue the upload for background ingestion and return the job id right
+        away. A ``preview_token`` stands for the file previewed under it: the
+        upload is not sent again, and chunks the preview computed are reused.
+        """
+        if file is None and not preview_token:
+            raise HTTPException(status_code=400, detail="Either file or preview_token is required")
         try:
-            file_content = await file.read()
-            success, result = self.file_service.process_file(
-                file_content=file_content,
-                filename=file.filename,
-                tenant_id=tenant_id
-            )
-
-            if success:
-                return FileProcessResponse(success=True, dataset_id=result)
+            if file is None:
+                entry = self.file_service.preview_cache.take(preview_token, tenant_id)
+                if entry is None:
+                    raise HTTPException(status_code=404, detail="Preview not found or expired; upload the file again")
+                try:
+                    job = await run_blocking(
+                        JOBS, self.job_queue.submit,
+                        tenant_id, entry.filename, entry.spool_path, mime_type=entry.mime_type
+                    )
+                except Exception:
+                    discard_files(entry.spool_path)
+                    raise
             else:
-                raise HTTPException(status_code=400, detail=result)
+                get_extractor(file.filename, file.content_type)
+                spool_path = await run_blocking(FILES, self.file_service.spool_upload, file.file)
+                job = await run_blocking(
+                    JOBS, self.job_queue.submit, tenant_id, file.filename, spool_path, mime_type=file.content_type
+                )
+            return FileProcessResponse(success=True, job_id=job["id"], status=job["status"])
 
+        except HTTPException:
+            raise
+        except UnsupportedFileType as e:
+            raise HTTPException(status_code=415, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
+    async def update_document(
+        self,
+        dataset_id: str,
+        file: UploadFile = File(...),
+        tenant_id: str = Depends(get_current_user_tenant)
+    ):
+        """Queue a job that replaces the dataset's document, re-embedding only changed chunks."""
+        dataset = await run_blocking(DATABASE, self.file_service.get_dataset, dataset_id, tenant_id)
+        if not dataset:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        try:
+            same_type = get_extractor(file.filename, file.content_type) is get_extractor(dataset["name"])
+        except UnsupportedFileType as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        if not same_type:
+            raise HTTPException(status_code=400, detail="New document must have the same file type as the dataset")
+
+        spool_path = await run_blocking(FILES, self.file_service.spool_upload, file.file)
+        job = await run_blocking(
+            JOBS, self.job_queue.submit,
+            tenant_id, file.filename, spool_path, dataset_id=dataset["id"], kind=JobKind.UPDATE,
+            mime_type=file.content_type
+        )
+        return FileProcessResponse(success=True, dataset_id=dataset["id"], job_id=job["id"], status=job["status"])
+
+    async def resume_dataset(
+        self,
+        dataset_id: str,
+        tenant_id: str = Depends(get_current_user_tenant)
+    ):
+        """Queue a job that finishes a failed ingestion from its last checkpoint."""
+        dataset = await run_blocking(DATABASE, self.file_service.get_dataset, dataset_id, tenant_id)
+        if not dataset:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        if dataset["indexing_status"] == "completed":
+            return FileProcessResponse(success=True, dataset_id=dataset["id"], status="succeeded")
+
+        job = await run_blocking(
+            JOBS, self.job_queue.submit, tenant_id, dataset["name"], dataset_id=dataset["id"], kind=JobKind.RESUME
+        )
+        return FileProcessResponse(success=True, dataset_id=dataset["id"], job_id=job["id"], status=job["status"])
+
+    async def _get_tenant_job(self, job_id: str, tenant_id: str) -> dict:
+        job = await run_blocking(JOBS, self.job_queue.get, job_id)
+        if not job or job["tenant_id"] != tenant_id:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    async def get_job(
+        self,
+        job_id: str,
+        tenant_id: str = Depends(get_current_user_tenant)
+    ):
+        return IngestionJobResponse(**await self._get_tenant_job(job_id, tenant_id))
+
+    async def job_events(
+        self,
+        job_id: str,
+        tenant_id: str = Depends(get_current_user_tenant)
+    ):
+        """Server-sent events with the job's progress until it finishes."""
+        await self._get_tenant_job(job_id, tenant_id)
+
+        async def events():
+            last_payload = None
+            while True:
+                job = await run_blocking(JOBS, self.job_queue.get, job_id)
+                payload = IngestionJobResponse(**job).model_dump_json()
+                if payload != last_payload:
+                    yield f"data: {payload}\n\n"
+                    last_payload = payload
+                if JobStatus(job["status"]).finished:
+                    break
+                await asyncio.sleep(config.INGESTION_EVENTS_INTERVAL)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def cancel_job(
+        self,
+        job_id: str,
+        tenant_id: str = Depends(get_current_user_tenant)
+    ):
+        await self._get_tenant_job(job_id, tenant_id)
+        return IngestionJobResponse(**await run_blocking(JOBS, self.job_queue.cancel, job_id))
+
     async def get_datasets(
         self,
         tenant_id: str = Depends(get_current_user_tenant)
     ):
         try:
-            datasets = self.file_service.get_datasets(tenant_id)
+            datasets = await run_blocking(DATABASE, self.file_service.get_datasets, tenant_id)
             return [DatasetResponse(**dataset) for dataset in datasets]
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error retrieving datasets: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from app.libs.executors import executor_stats
+from core.rag.datasource.pgvector_async import get_async_pool_stats
+from core.rag.datasource.pgvector_pool import get_pool_stats
+from repository.ext_database import pool_stats
+from app.utils.dependencies import get_current_user_tenant
+
+class SystemHandler:
+    """Operational state of the process: how the pools behind the handlers are doing."""
+
+    def __init__(self):
+        self.router = APIRouter(prefix="/api/system", tags=["system"])
+        self.setup_routes()
+
+    def setup_routes(self):
+        self.router.get("/executors")(self.get_executors)
+        self.router.get("/db-pools")(self.get_db_pools)
+
+    async def get_executors(self, tenant_id: str = Depends(get_current_user_tenant)):
+        """Size, load and queueing of each dependency's executor, for sizing EXECUTOR_*_WORKERS."""
+        return executor_stats()
+
+    async def get_db_pools(self, tenant_id: str = Depends(get_current_user_tenant)):
+        """Connection pool usage: the SQLAlchemy engine and the PGVector pools of this process."""
+        return {
+            "engine": pool_stats(),
+            "pgvector": get_pool_stats(),
+            "pgvector_async": get_async_pool_stats(),
+        }
@@ -1,7 +1,12 @@
 """Abstract interface for file storage implementations."""
 
+import hashlib
+import re
 from abc import ABC, abstractmethod
 from collections.abc import Generator
+from typing import BinaryIO, Optional, Tuple
+
+_CONTENT_KEY = re.compile(r"(^|/)sha256/[0-9a-f]{2}/[0-9a-f]{64}$")
 
 
 class BaseStorage(ABC):
@@ -11,6 +16,39 @@ class BaseStorage(ABC):
     def save(self, filename, data):
         raise NotImplementedError
 
+    def save_stream(self, filename, fileobj):
+        """Save a file object; implementations override this to avoid reading it whole."""
+        return self.save(filename, fileobj.read())
+
+    @staticmethod
+    def content_key(content_hash: str, prefix: str = "") -> str:
+        """Key of a content-addressed object: its sha256, fanned out by the first two hex digits."""
+        key = f"sha256/{content_hash[:2]}/{content_hash}"
+        return f"{prefix.rstrip('/')}/{key}" if prefix else key
+
+    @staticmethod
+    def is_content_key(key: str) -> bool:
+        return _CONTENT_KEY.search(key) is not None
+
+    def save_content(self, fileobj: BinaryIO, content_hash: Optional[str] = None, prefix: str = "") -> Tuple[str, bool]:
+        """
+        Store a seekable file object under its content key unless an object
+        is already there; returns the key and whether anything was uploaded.
+        """
+        if content_hash is None:
+            digest = hashlib.sha256()
+            fileobj.seek(0)
+            for data in iter(lambda: fileobj.read(1024 * 1024), b""):
+                digest.update(data)
+            content_hash = digest.hexdigest()
+        key = self.content_key(content_hash, prefix)
+        if self.exists(key):
+            return key, False
+        fileobj.seek(0)
+        if self.save_stream(key, fileobj) is False:
+            raise IOError(f"Failed to store {key}")
+        return key, True
+
     @abstractmethod
     def load_once(self, filename: str) -> bytes:
         raise NotImplementedError
@@ -1,5 +1,9 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker, declarative_base
+import contextvars
+import itertools
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, MetaData
+from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
 from sqlalchemy.exc import OperationalError
 from configs.config import Settings  # Import your settings
 
@@ -22,10 +26,88 @@ POSTGRES_INDEXES_NAMING_CONVENTION = {
 }
 
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+# Pool events counted since start, reported by pool_stats
+_pool_counters = {"connects": 0, "checkouts": 0, "invalidated": 0}
+_pool_counters_lock = threading.Lock()
+
+
+def _count(name: str):
+    def listener(*args):
+        with _pool_counters_lock:
+            _pool_counters[name] += 1
+    return listener
+
+
+event.listen(engine, "connect", _count("connects"))
+event.listen(engine, "checkout", _count("checkouts"))
+event.listen(engine, "invalidate", _count("invalidated"))
 metadata = MetaData(naming_convention=POSTGRES_INDEXES_NAMING_CONVENTION)
 Base = declarative_base(metadata=metadata)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-db = SessionLocal()
+# db resolves to the session of the current scope: a request (see
+# app.utils.dependencies.get_db_session) or an ingestion job, opened with
+# begin_session_scope / session_scope. Executor calls made through
+# app.libs.executors carry the caller's context and so its session. Code
+# outside any scope gets a session per thread, as a Session must never be
+# used by two threads at once.
+_session_scope: contextvars.ContextVar = contextvars.ContextVar("db_session_scope", default=None)
+_scope_ids = itertools.count(1)
+
+
+def _current_scope():
+    scope = _session_scope.get()
+    return scope if scope is not None else ("thread", threading.get_ident())
+
+
+db = scoped_session(SessionLocal, scopefunc=_current_scope)
+
+
+def begin_session_scope() -> contextvars.Token:
+    """Give the current context its own session, created on first use of db."""
+    return _session_scope.set(("scope", next(_scope_ids)))
+
+
+def end_session_scope(token: contextvars.Token) -> None:
+    """Close the scope's session, returning its connection to the pool, and leave the scope."""
+    try:
+        db.remove()
+    finally:
+        _session_scope.reset(token)
+
+
+@contextmanager
+def session_scope():
+    token = begin_session_scope()
+    try:
+        yield db()
+    finally:
+        end_session_scope(token)
+
+
+def pool_stats() -> dict:
+    """Usage of the SQLAlchemy engine's connection pool."""
+    pool = engine.pool
+    with _pool_counters_lock:
+        counters = dict(_pool_counters)
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+        "recycle": settings.DB_POOL_RECYCLE,
+        "sessions": len(db.registry.registry),
+        **counters,
+    }
@@ -2,10 +2,11 @@
 Local file storage implementation.
 """
 import os
+import shutil
 from pathlib import Path
-from typing import Union, Generator
+from typing import BinaryIO, Union, Generator
 
-from configs import config
+from configs.config import config
 from repository.base_storage import BaseStorage
 
 
@@ -19,7 +20,9 @@ class LocalStorage(BaseStorage):
 
     def _get_full_path(self, filename: str) -> Path:
         """Get full path for a file."""
-        path = self.storage_path / filename
+        path = (self.storage_path / filename).resolve()
+        if not path.is_relative_to(self.storage_path.resolve()):
+            raise ValueError(f"Invalid file name {filename}")
         path.parent.mkdir(parents=True, exist_ok=True)
         return path
 
@@ -42,6 +45,30 @@ class LocalStorage(BaseStorage):
         with open(path, 'wb') as f:
             f.write(data)
 
+    def save_stream(self, filename: str, fileobj: BinaryIO) -> None:
+        """
+        Save a file object without reading it into memory. The data goes to
+        a temporary file first, so a failed or oversized save leaves no
+        partial file behind.
+
+        Args:
+            filename: Name of the file
+            fileobj: Binary file object to copy from its current position
+        """
+        path = self._get_full_path(filename)
+        partial = path.with_name(path.name + ".part")
+        size = 0
+        try:
+            with open(partial, 'wb') as f:
+                for data in iter(lambda: fileobj.read(config.INGESTION_READ_SIZE), b""):
+                    size += len(data)
+                    if size > config.MAX_UPLOAD_SIZE:
+                        raise ValueError(f"File size exceeds maximum limit of {config.MAX_UPLOAD_SIZE} bytes")
+                    f.write(data)
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+
     def load(self, filename: str) -> bytes:
         """
         Load data from a file.
@@ -59,6 +86,44 @@ class LocalStorage(BaseStorage):
         with open(path, 'rb') as f:
             return f.read()
 
+    def load_once(self, filename: str) -> bytes:
+        """Load data from a file; same as load."""
+        return self.load(filename)
+
+    def load_stream(self, filename: str) -> Generator:
+        """
+        Stream a file in blocks.
+
+        Args:
+            filename: Name of the file to load
+
+        Yields:
+            Blocks of the file as bytes
+        """
+        path = self._get_full_path(filename)
+        if not path.exists():
+            raise FileNotFoundError(f"File {filename} not found")
+
+        with open(path, 'rb') as f:
+            yield from iter(lambda: f.read(config.INGESTION_READ_SIZE), b"")
+
+    def download(self, filename: str, target_filepath: str) -> bool:
+        """
+        Copy a file to a local path.
+
+        Args:
+            filename: Name of the file to copy
+            target_filepath: Destination path
+
+        Returns:
+            True if the file was copied, False if it didn't exist
+        """
+        path = self._get_full_path(filename)
+        if not path.exists():
+            return False
+        shutil.copyfile(path, target_filepath)
+        return True
+
     def exists(self, filename: str) -> bool:
         """
         Check if file exists.
@@ -1,6 +1,6 @@
 from repository.ext_database import db
 from core.rag.models.dataset import Dataset
-from typing import List
+from typing import List, Optional
 
 class DatasetRepository:
     @staticmethod
@@ -11,3 +11,32 @@ class DatasetRepository:
         except Exception as e:
             print(f"Error fetching datasets: {e}")
             return []
+
+
+    @staticmethod
+    def get_by_id(dataset_id: str) -> Optional[Dataset]:
+        return db.query(Dataset).filter(Dataset.id == dataset_id).first()
+
+    @staticmethod
+    def get_resumable(tenant_id: str, content_hash: str) -> Optional[Dataset]:
+        """
+        A dataset of this tenant whose indexing of the same content failed.
+        Datasets still indexing are not matched, so a duplicate upload never
+        runs a second pipeline on the same checkpoint; cancelled ones are
+        deleted and cannot match.
+        """
+        return db.query(Dataset).filter(
+            Dataset.tenant_id == tenant_id,
+            Dataset.content_hash == content_hash,
+            Dataset.indexing_status == "failed"
+        ).first()
+
+    @staticmethod
+    def delete(dataset_id: str) -> bool:
+        try:
+            deleted = db.query(Dataset).filter(Dataset.id == dataset_id).delete(synchronize_session=False)
+            db.commit()
+            return deleted > 0
+        except Exception as e:
+            db.rollback()
+            raise e
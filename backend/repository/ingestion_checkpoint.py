@@ -0,0 +1,72 @@
+from typing import List, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from core.rag.models.dataset import DatasetIngestionCheckpoint
+
+
+class IngestionCheckpointRepository:
+    def __init__(self, db_session: Session):
+        """
+        Initialize the repository with a SQLAlchemy database session.
+
+        The ingestion pipeline records checkpoints from its store thread, so
+        pass a session that no other thread uses at the same time.
+
+        Args:
+            db_session (Session): The SQLAlchemy session object.
+        """
+        self.db = db_session
+
+    def get_completed_ranges(self, dataset_id: str, content_hash: str) -> List[Tuple[int, int]]:
+        """
+        Return the chunk ranges [start, end) already stored for this dataset and content.
+        """
+        try:
+            rows = self.db.query(
+                DatasetIngestionCheckpoint.batch_start, DatasetIngestionCheckpoint.batch_end
+            ).filter(
+                DatasetIngestionCheckpoint.dataset_id == dataset_id,
+                DatasetIngestionCheckpoint.content_hash == content_hash
+            ).order_by(DatasetIngestionCheckpoint.batch_start).all()
+            self.db.commit()
+            return [(row.batch_start, row.batch_end) for row in rows]
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def record(self, dataset_id: str, content_hash: str, ranges: List[Tuple[int, int]]) -> None:
+        """
+        Record stored chunk ranges. Recording a range twice is a no-op.
+        """
+        if not ranges:
+            return
+        try:
+            stmt = insert(DatasetIngestionCheckpoint).values([
+                {
+                    "dataset_id": dataset_id,
+                    "content_hash": content_hash,
+                    "batch_start": start,
+                    "batch_end": end,
+                }
+                for start, end in ranges
+            ]).on_conflict_do_nothing(index_elements=["dataset_id", "content_hash", "batch_start"])
+            self.db.execute(stmt)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def clear(self, dataset_id: str) -> None:
+        """
+        Delete all checkpoints of a dataset once it is fully indexed or discarded.
+        """
+        try:
+            self.db.query(DatasetIngestionCheckpoint).filter(
+                DatasetIngestionCheckpoint.dataset_id == dataset_id
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise e
@@ -1,16 +1,39 @@
+import asyncio
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Generator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, BinaryIO, Generator, Iterator, Optional
+from configs.config import config
 from repository.base_storage import BaseStorage
 
+# S3 rejects multipart parts below 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
 class S3Storage(BaseStorage):
-    def __init__(self, bucket_name: str, aws_access_key_id: str, aws_secret_access_key: str, region_name: str):
+    def __init__(
+        self,
+        bucket_name: str,
+        aws_access_key_id: str,
+        aws_secret_access_key: str,
+        region_name: str,
+        endpoint_url: Optional[str] = None,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
         self.bucket_name = bucket_name
+        self.part_size = max(part_size or config.S3_MULTIPART_PART_SIZE, MIN_PART_SIZE)
+        self.max_concurrency = max(max_concurrency or config.S3_MULTIPART_CONCURRENCY, 1)
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key,
-            region_name=region_name
+            region_name=region_name,
+            # A local stand-in (MinIO, moto) when set
+            endpoint_url=endpoint_url or None,
+            # One connection per concurrent part on top of the default pool
+            config=Config(max_pool_connections=10 + self.max_concurrency)
         )
 
     def save(self, filename: str, data: bytes) -> bool:
@@ -26,6 +49,141 @@ class S3Storage(BaseStorage):
             print(f"Error saving to S3: {str(e)}")
             return False
 
+    def save_stream(self, filename: str, fileobj: BinaryIO) -> bool:
+        """
+        Upload a file object without reading it into memory: files below one
+        part go up in a single PUT, larger ones as a multipart upload with up
+        to ``max_concurrency`` parts in flight, so at most that many parts
+        plus the one being read are held at a time. A failed multipart
+        upload is aborted, leaving no orphaned parts behind.
+        """
+        try:
+            parts = self._read_parts(fileobj)
+            first = next(parts, b"")
+            if len(first) < self.part_size:
+                self.s3_client.put_object(Bucket=self.bucket_name, Key=filename, Body=first)
+                return True
+            self._multipart_upload(filename, first, parts)
+            return True
+        except ClientError as e:
+            print(f"Error saving to S3: {str(e)}")
+            return False
+
+    async def save_async_stream(self, filename: str, chunks: AsyncIterable[bytes]) -> bool:
+        """
+        save_stream for data arriving as an async iterator of byte chunks,
+        e.g. a request body. Chunks are gathered into parts on the event loop
+        and the blocking S3 calls run in threads.
+        """
+        upload_id = None
+        in_flight: set[asyncio.Task] = set()
+        tasks: list[asyncio.Task] = []
+        try:
+            buffer = bytearray()
+            async for data in chunks:
+                buffer += data
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        upload_id = await asyncio.to_thread(self._create_multipart_upload, filename)
+                    part = bytes(buffer[:self.part_size])
+                    del buffer[:self.part_size]
+                    if len(in_flight) >= self.max_concurrency:
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+                    task = asyncio.create_task(asyncio.to_thread(
+                        self._upload_part, filename, upload_id, len(tasks) + 1, part
+                    ))
+                    tasks.append(task)
+                    in_flight.add(task)
+
+            if upload_id is None:
+                await asyncio.to_thread(
+                    self.s3_client.put_object, Bucket=self.bucket_name, Key=filename, Body=bytes(buffer)
+                )
+                return True
+            if buffer:
+                tasks.append(asyncio.create_task(asyncio.to_thread(
+                    self._upload_part, filename, upload_id, len(tasks) + 1, bytes(buffer)
+                )))
+            completed = await asyncio.gather(*tasks)
+            await asyncio.to_thread(self._complete_multipart_upload, filename, upload_id, completed)
+            return True
+        except BaseException as e:
+            if upload_id is not None:
+                # Let parts in flight settle first so none lands after the abort
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.to_thread(self._abort_multipart_upload, filename, upload_id)
+            if isinstance(e, ClientError):
+                print(f"Error saving to S3: {str(e)}")
+                return False
+            raise
+
+    def _read_parts(self, fileobj: BinaryIO) -> Iterator[bytes]:
+        """Consecutive ``part_size`` blocks of the file; only the last may be shorter."""
+        while True:
+            part = bytearray()
+            while len(part) < self.part_size:
+                data = fileobj.read(self.part_size - len(part))
+                if not data:
+                    break
+                part += data
+            if not part:
+                return
+            yield bytes(part)
+            if len(part) < self.part_size:
+                return
+
+    def _multipart_upload(self, filename: str, first: bytes, rest: Iterator[bytes]) -> None:
+        upload_id = self._create_multipart_upload(filename)
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="s3-part")
+        try:
+            completed = []
+            pending = deque()
+            part_number = 0
+            for body in _chain(first, rest):
+                if len(pending) >= self.max_concurrency:
+                    completed.append(pending.popleft().result())
+                part_number += 1
+                pending.append(pool.submit(self._upload_part, filename, upload_id, part_number, body))
+            while pending:
+                completed.append(pending.popleft().result())
+            self._complete_multipart_upload(filename, upload_id, completed)
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._abort_multipart_upload(filename, upload_id)
+            raise
+        finally:
+            pool.shutdown(wait=True)
+
+    def _create_multipart_upload(self, filename: str) -> str:
+        response = self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=filename)
+        return response['UploadId']
+
+    def _upload_part(self, filename: str, upload_id: str, part_number: int, body: bytes) -> dict:
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=filename,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def _complete_multipart_upload(self, filename: str, upload_id: str, parts: list[dict]) -> None:
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=filename,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+
+    def _abort_multipart_upload(self, filename: str, upload_id: str) -> None:
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=filename, UploadId=upload_id)
+        except ClientError as e:
+            print(f"Error aborting S3 multipart upload {upload_id}: {str(e)}")
+
     def load_once(self, filename: str) -> bytes:
         """Load entire file from S3"""
         try:
@@ -85,4 +243,9 @@ class S3Storage(BaseStorage):
             return True
         except ClientError as e:
             print(f"Error deleting from S3: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+def _chain(first: bytes, rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield first
+    yield from rest
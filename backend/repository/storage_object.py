@@ -0,0 +1,59 @@
+from typing import Callable, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from core.rag.models.dataset import StorageObject
+
+
+class StorageObjectRepository:
+    def __init__(self, db_session: Session):
+        """
+        Initialize the repository with a SQLAlchemy database session.
+
+        Args:
+            db_session (Session): The SQLAlchemy session object.
+        """
+        self.db = db_session
+
+    def acquire(self, key: str, size: int) -> int:
+        """
+        Add a reference to the object at ``key``, creating its row on first
+        use, and return the new reference count. Call before uploading, so a
+        concurrent release of the last reference cannot delete the object
+        after it was found to exist.
+        """
+        try:
+            stmt = insert(StorageObject).values(key=key, size=size, ref_count=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"ref_count": StorageObject.ref_count + 1}
+            ).returning(StorageObject.ref_count)
+            ref_count = self.db.execute(stmt).scalar_one()
+            self.db.commit()
+            return ref_count
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def release(self, key: str, on_last: Callable[[str], None]) -> Optional[int]:
+        """
+        Drop a reference to the object at ``key`` and return the remaining
+        count, or None if the object is not tracked. When the last reference
+        goes, ``on_last(key)`` deletes the object while the row is still
+        locked, so a concurrent acquire waits and then uploads it again.
+        """
+        try:
+            row = self.db.query(StorageObject).filter(StorageObject.key == key).with_for_update().first()
+            if row is None:
+                self.db.commit()
+                return None
+            row.ref_count -= 1
+            if row.ref_count <= 0:
+                on_last(key)
+                self.db.delete(row)
+            self.db.commit()
+            return max(row.ref_count, 0)
+        except Exception as e:
+            self.db.rollback()
+            raise e
@@ -1,45 +1,64 @@
+import asyncio
+import logging
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+from app.libs.executors import DATABASE, LLM, MEMORY, run_blocking
+from core.memory.async_memory import AsyncTokenBufferMemoryMongoDB
 from core.memory.memory import TokenBufferMemoryMongoDB
 from core.llm.openai_client import OpenAIClient
 from service.dataset_retrieve import DatasetRetrievalService
 from service.bot_service import BotService
 
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_TENANT_ID = '00000000-0000-0000-0000-000000000001'
 
 class ChatService:
-   def __init__(self, memory: TokenBufferMemoryMongoDB, bot_service: BotService):
+   def __init__(
+       self,
+       memory: TokenBufferMemoryMongoDB,
+       bot_service: BotService,
+       async_memory: Optional[AsyncTokenBufferMemoryMongoDB] = None,
+   ):
        self.memory = memory
+       # Awaited by achat instead of running memory calls on the MEMORY executor
+       self.async_memory = async_memory
        self.openai_client = OpenAIClient()
        self.retrieval_service = DatasetRetrievalService()
        self.bot_service = bot_service
 
-   def get_relevant_context(self, dataset_id: str, query: str):
+   # Retrieval settings for the bot's dataset
+   RETRIEVAL_OPTIONS = {
+       "search_method": "hybrid",
+       "top_k": 3,
+       "score_threshold": 0.6,
+       "hybrid_weights": {"semantic": 0.5, "full_text": 0.5},
+   }
+
+   async def aget_relevant_context(self, dataset_id: str, query: str):
         try:
-            results = self.retrieval_service.retrieve_documents(
-                dataset_id=dataset_id,
-                query=query,
-                search_method="hybrid",
-                top_k=3,
-                score_threshold=0.6,
-                hybrid_weights={"semantic": 0.5, "full_text": 0.5}
+            results = await self.retrieval_service.aretrieve_documents(
+                dataset_id=dataset_id, query=query, **self.RETRIEVAL_OPTIONS
             )
-
-            # Calculate and log the average score
-            scores = [doc.metadata.get("score", 0) for doc in results]
-            avg_score = sum(scores) / len(scores) if scores else 0
-            print(f"[get_relevant_context] Average score of retrieved documents: {avg_score:.2f}")
-            
-            if avg_score < 0.5:
-                print(f"[get_relevant_context] Average score below threshold, returning empty list")
-                return []
-
-            return results
+            return self._relevant(results)
         except Exception as e:
             print(f"[ERROR] Retrieval error for dataset_id {dataset_id}: {e}")
             return []
 
+   @staticmethod
+   def _relevant(results):
+        # Calculate and log the average score
+        scores = [doc.metadata.get("score", 0) for doc in results]
+        avg_score = sum(scores) / len(scores) if scores else 0
+        print(f"[get_relevant_context] Average score of retrieved documents: {avg_score:.2f}")
+
+        if avg_score < 0.5:
+            print(f"[get_relevant_context] Average score below threshold, returning empty list")
+            return []
+
+        return results
+
    def format_context(self, documents):
        if not documents:
            return ""
@@ -68,50 +87,71 @@ class ChatService:
 
        return formatted_messages
 
-   def chat(self, bot_id: str, message: str, conversation_id: Optional[str] = None) -> Dict:
+   def _load_bot(self, bot_id: str) -> Tuple[Optional[str], str]:
+       """The bot's prompt template and dataset id, as plain values usable outside the session's thread."""
+       bot = self.bot_service.get_bot(bot_id, DEFAULT_TENANT_ID)
+       if not bot:
+           raise ValueError(f"Bot with ID {bot_id} not found")
+
+       config = self.bot_service.get_bot_config(bot_id)
+       dataset_id = self.bot_service.get_dataset_id(bot_id)
+
+       if not config:
+           raise ValueError(f"Bot configuration for ID {bot_id} not found")
+       if not dataset_id:
+           raise ValueError(f"Dataset for bot ID {bot_id} not found")
+
+       logger.debug("Bot %s uses dataset %s", bot_id, dataset_id.dataset_id)
+       return config.prompt_template, dataset_id.dataset_id
+
+   @staticmethod
+   def _memory_message(role: str, field: str, content: str) -> Dict:
+       return {
+           "role": role,
+           field: content,
+           "created_at": datetime.utcnow(),
+       }
+
+   def _save_message(self, conversation_id: str, role: str, field: str, content: str):
+       self.memory.save_message(conversation_id, self._memory_message(role, field, content))
+
+   def _build_messages(self, conversation_id: str, context: str, prompt_template: Optional[str]):
+       messages = self.memory.get_messages(conversation_id, max_token_limit=2000)
+       return self.format_messages_for_openai(messages, context, prompt_template)
+
+   async def _asave_message(self, conversation_id: str, role: str, field: str, content: str):
+       if self.async_memory is None:
+           return await run_blocking(MEMORY, self._save_message, conversation_id, role, field, content)
+       await self.async_memory.save_message(conversation_id, self._memory_message(role, field, content))
+
+   async def _abuild_messages(self, conversation_id: str, context: str, prompt_template: Optional[str]):
+       if self.async_memory is None:
+           return await run_blocking(MEMORY, self._build_messages, conversation_id, context, prompt_template)
+       messages = await self.async_memory.get_messages(conversation_id, max_token_limit=2000)
+       return self.format_messages_for_openai(messages, context, prompt_template)
+
+   async def achat(self, bot_id: str, message: str, conversation_id: Optional[str] = None) -> Dict:
+       """
+       Answer a message in a bot's conversation. Every blocking step runs on
+       the executor of the dependency it waits on, retrieval and memory are
+       awaited through their async clients where available, and saving the
+       user's message overlaps with retrieval.
+       """
        try:
-           bot = self.bot_service.get_bot(bot_id, DEFAULT_TENANT_ID)
-           if not bot:
-               raise ValueError(f"Bot with ID {bot_id} not found")
-           
            if not conversation_id:
                 conversation_id = f"{bot_id}-{datetime.utcnow().isoformat()}"
 
-           config = self.bot_service.get_bot_config(bot_id)
-           dataset_id = self.bot_service.get_dataset_id(bot_id)
-
-           print(f"Bot config: {config}")
-           print(f"Dataset ID: {dataset_id.dataset_id}")
-
-            
-           if not config:
-               raise ValueError(f"Bot configuration for ID {bot_id} not found")
-           if not dataset_id:
-               raise ValueError(f"Dataset for bot ID {bot_id} not found")
-
-           self.memory.save_message(conversation_id, {
-               "role": "user",
-               "query": message,
-               "created_at": datetime.utcnow(),
-           })
-
-           relevant_docs = self.get_relevant_context(dataset_id.dataset_id, message)
-           context = self.format_context(relevant_docs)
-
-           messages = self.memory.get_messages(conversation_id, max_token_limit=2000)
-           openai_messages = self.format_messages_for_openai(
-               messages, 
-               context,
-               config.prompt_template
+           prompt_template, dataset_id = await run_blocking(DATABASE, self._load_bot, bot_id)
+           _, relevant_docs = await asyncio.gather(
+               self._asave_message(conversation_id, "user", "query", message),
+               self.aget_relevant_context(dataset_id, message),
            )
+           context = self.format_context(relevant_docs)
 
-           response = self.openai_client.generate_response(openai_messages)
+           openai_messages = await self._abuild_messages(conversation_id, context, prompt_template)
+           response = await run_blocking(LLM, self.openai_client.generate_response, openai_messages)
 
-           self.memory.save_message(conversation_id, {
-               "role": "assistant",
-               "answer": response,
-               "created_at": datetime.utcnow(),
-           })
+           await self._asave_message(conversation_id, "assistant", "answer", response)
 
            return {
                "response": response,
@@ -10,6 +10,8 @@ from repository.ext_database import db  # adjust path if needed
 
 # This is your Vector wrapper that references PGVector or any other store:
 from core.rag.datasource.vector_factory import Vector
+from core.rag.datasource.vector_type import VectorType
+from app.libs.executors import DATABASE, run_blocking
 
 
 class DatasetRetrievalService:
@@ -39,7 +41,7 @@ class DatasetRetrievalService:
                 dataset.index_struct = json.loads(dataset.index_struct)
 
             print("[DatasetRetrievalService] Creating Vector instance...")
-            vector = Vector(dataset=dataset)
+            vector = Vector(dataset=dataset, vector_type=VectorType.PGVECTOR)
 
             if search_method == "semantic":
                 print("[DatasetRetrievalService] Using semantic search...")
@@ -59,22 +61,14 @@ class DatasetRetrievalService:
 
             elif search_method == "hybrid":
                 print("[DatasetRetrievalService] Using hybrid search...")
-                semantic_results = vector.search_by_vector(
+                results = vector.search_hybrid(
                     query=query,
-                    top_k=top_k * 2,
-                    score_threshold=score_threshold
-                )
-                full_text_results = vector.search_by_full_text(query=query, top_k=top_k * 2)
-
-                self._parse_metadata(semantic_results)
-                self._parse_metadata(full_text_results)
-
-                results = self._combine_hybrid_results(
-                    semantic_results,
-                    full_text_results,
-                    hybrid_weights or {"semantic": 0.5, "full_text": 0.5},
-                    top_k
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    weights=hybrid_weights or {"semantic": 0.5, "full_text": 0.5}
                 )
+                self._parse_metadata(results)
+                self._use_branch_scores(results)
             else:
                 raise ValueError(f"Unsupported search method: {search_method}")
 
@@ -88,44 +82,68 @@ class DatasetRetrievalService:
             print(f"[DatasetRetrievalService] Error during document retrieval: {e}")
             return []
 
-    @staticmethod
-    def _combine_hybrid_results(
-        semantic_results: List[Document],
-        full_text_results: List[Document],
-        weights: dict,
-        top_k: int
+    async def aretrieve_documents(
+        self,
+        dataset_id: str,
+        query: str,
+        search_method: str = "hybrid",
+        top_k: int = 3,
+        score_threshold: float = 0.5,
+        hybrid_weights: Optional[dict] = None
     ) -> List[Document]:
         """
-        Combine semantic and full-text search results with hybrid scoring.
+        retrieve_documents for the event loop: searches go through the
+        VECTOR_STORE's awaitable methods, so with pgvector_async no thread is
+        held while Postgres works.
         """
-        doc_scores = {}
-
-        for doc in semantic_results:
-            meta = doc.metadata
-            doc_id = meta.get("doc_id")
-            score = meta.get("score", 0) * weights.get("semantic", 0.5)
-
-            if doc_id is None:
-                continue
+        try:
+            vector = await run_blocking(DATABASE, self._load_vector, dataset_id)
+            if vector is None:
+                print(f"[DatasetRetrievalService] No dataset found with id={dataset_id}")
+                return []
 
-            doc_scores[doc_id] = {"doc": doc, "score": score}
+            if search_method == "semantic":
+                results = await vector.asearch_by_vector(query=query, top_k=top_k, score_threshold=score_threshold)
+                self._parse_metadata(results)
+            elif search_method == "full_text":
+                results = await vector.asearch_by_full_text(query=query, top_k=top_k)
+                self._parse_metadata(results)
+            elif search_method == "hybrid":
+                results = await vector.asearch_hybrid(
+                    query=query,
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    weights=hybrid_weights or {"semantic": 0.5, "full_text": 0.5}
+                )
+                self._parse_metadata(results)
+                self._use_branch_scores(results)
+            else:
+                raise ValueError(f"Unsupported search method: {search_method}")
 
-        for doc in full_text_results:
-            meta = doc.metadata
-            doc_id = meta.get("doc_id")
-            score = meta.get("score", 0) * weights.get("full_text", 0.5)
+            return results
 
-            if doc_id is None:
-                continue
+        except Exception as e:
+            print(f"[DatasetRetrievalService] Error during document retrieval: {e}")
+            return []
 
-            if doc_id in doc_scores:
-                doc_scores[doc_id]["score"] += score
-            else:
-                doc_scores[doc_id] = {"doc": doc, "score": score}
+    @staticmethod
+    def _load_vector(dataset_id: str) -> Optional[Vector]:
+        dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+        if not dataset:
+            return None
+        if isinstance(dataset.index_struct, str):
+            dataset.index_struct = json.loads(dataset.index_struct)
+        return Vector(dataset=dataset)
 
-        # Sort by combined score (descending)
-        sorted_docs = sorted(doc_scores.values(), key=lambda x: x["score"], reverse=True)
-        return [item["doc"] for item in sorted_docs[:top_k]]
+    @staticmethod
+    def _use_branch_scores(docs: List[Document]) -> None:
+        # Callers threshold on the score of the branch that found each
+        # document, so keep reporting that rather than the fused score.
+        for doc in docs:
+            branch_score = doc.metadata.get("semantic_score")
+            if branch_score is None:
+                branch_score = doc.metadata.get("full_text_score") or 0
+            doc.metadata["score"] = branch_score
 
     @staticmethod
     def _parse_metadata(docs: List[Document]) -> None:
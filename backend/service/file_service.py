@@ -1,97 +1,531 @@
-from typing import Tuple, List
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, List
+import logging
+import os
+import shutil
+import tempfile
 import uuid
+from dataclasses import dataclass
+from configs.config import config
 from repository.s3_storage import S3Storage
 from core.rag.datasource.vector_factory import Vector
+from core.rag.datasource.vector_type import VectorType
 from core.rag.datasource.document import Document
 from core.rag.text_splitter.text_splitter import TextSplitter
-from repository.ext_database import db
+from core.rag.ingestion.checkpoint import IngestionCheckpoint, hash_file
+from core.rag.ingestion.pipeline import IngestionPipeline
+from core.rag.extractor.extract_processor import TextStream, extract_text, get_extractor
+from core.rag.extractor.text_extractor import decode_stream
+from core.rag.ingestion.diff import ChunkDiff
+from core.rag.ingestion.preview_cache import PreviewCache, PreviewEntry, discard_files, read_chunks, write_chunks
+from core.rag.ingestion.jobs import JobCancelled, JobKind, JobProgress
+from repository.ext_database import SessionLocal, db, session_scope
 from repository.file import DatasetRepository
+from repository.ingestion_checkpoint import IngestionCheckpointRepository
+from repository.storage_object import StorageObjectRepository
 from core.rag.models.dataset import Dataset
 
+logger = logging.getLogger(__name__)
+
+# Stale chunk ids removed per DELETE statement during an update
+DELETE_BATCH_SIZE = 1000
+
+
+@dataclass
+class ChunkPreview:
+    chunks: List[Document]
+    total_chunks: int
+    # total_chunks is extrapolated from the part of the file that was split
+    estimated: bool = False
+    # Every chunk of the document, when the preview had to split all of it anyway
+    all_chunks: Optional[List[Document]] = None
+
+
 class FileService:
-    def __init__(self, s3_storage: S3Storage):
+    def __init__(self, s3_storage: S3Storage, preview_cache: Optional[PreviewCache] = None):
         self.s3_storage = s3_storage
+        self.preview_cache = preview_cache or PreviewCache(
+            max_entries=config.PREVIEW_CACHE_MAX_ENTRIES,
+            max_bytes=config.PREVIEW_CACHE_MAX_BYTES,
+            ttl=config.PREVIEW_CACHE_TTL
+        )
         self.dataset_repository = DatasetRepository 
+        self.storage_objects = StorageObjectRepository(db)
         self.text_splitter = TextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
 
-    def preview_chunks(self, file_content: str, tenant_id: str) -> List[Document]:
+    def preview_chunks(
+        self,
+        file: BinaryIO,
+        filename: str,
+        tenant_id: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> ChunkPreview:
+        """
+        Chunks ``offset`` to ``offset + limit`` of the file and the total chunk
+        count. Text is extracted and split only up to one chunk past the
+        requested page, so the cost does not depend on the file size; unless
+        the document ends there, the total is extrapolated from how much of
+        the file that covered.
+        """
+        splitter = self._splitter(chunk_size, chunk_overlap)
+        limit = limit or config.PREVIEW_CHUNKS
+        stream = extract_text(file, filename, mime_type)
+        seen_docs = []
+        try:
+            documents = splitter.split_documents_stream(stream, self._preview_metadata(filename, tenant_id))
+            for doc in documents:
+                seen_docs.append(doc)
+                if len(seen_docs) > offset + limit:
+                    break
+            if len(seen_docs) > offset + limit:
+                # Also count the chunks of text already read: splitting it costs
+                # no further extraction, and once the whole file has been read
+                # the count is exact
+                read = stream.chars
+                for doc in documents:
+                    seen_docs.append(doc)
+                    if stream.chars != read:
+                        break
+        finally:
+            stream.close()
+
+        seen = len(seen_docs)
+        estimated = seen > offset + limit and not stream.exhausted
+        total = self._estimate_chunk_total(stream, seen_docs[-1], splitter) if estimated else seen
+        total = max(total, seen)
+        chunks = seen_docs[offset:offset + limit]
+        for doc in chunks:
+            doc.metadata["chunk_total"] = total
+        return ChunkPreview(
+            chunks=chunks, total_chunks=total, estimated=estimated, all_chunks=None if estimated else seen_docs
+        )
+
+    def preview_upload(
+        self,
+        file: BinaryIO,
+        filename: str,
+        tenant_id: str,
+        mime_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[ChunkPreview, Optional[str]]:
+        """
+        Preview an upload and keep it in the preview cache, returning the
+        preview and the token ``process_file`` accepts in place of the file
+        (None if the cache cannot hold it). If the preview split the whole
+        document with the splitter ingestion uses, its chunks are kept too
+        and ingestion skips extraction and splitting.
+        """
+        splitter = self._splitter(chunk_size, chunk_overlap)
+        spool_path = self.spool_upload(file)
         try:
-            base_metadata = {
-                "source": "preview",
-                "preview": True,
-                "tenant_id": tenant_id
-            }
-            
-            documents = self.text_splitter.split_documents(
-                text=file_content,
-                metadata=base_metadata
+            with open(spool_path, "rb") as spool:
+                preview = self.preview_chunks(
+                    spool, filename, tenant_id, mime_type, splitter.chunk_size, splitter.chunk_overlap, limit, offset
+                )
+            if preview.all_chunks is not None and splitter is self.text_splitter:
+                write_chunks(spool_path, (
+                    (doc.page_content, doc.metadata["start_offset"], doc.metadata["end_offset"])
+                    for doc in preview.all_chunks
+                ))
+        except Exception:
+            discard_files(spool_path)
+            raise
+
+        entry = self.preview_cache.put(
+            tenant_id, filename, mime_type, spool_path, splitter.chunk_size, splitter.chunk_overlap
+        )
+        if entry is None:
+            discard_files(spool_path)
+            return preview, None
+        return preview, entry.token
+
+    def preview_cached(
+        self,
+        entry: PreviewEntry,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> ChunkPreview:
+        """Another page of a cached preview, by default with the chunk settings it was made with."""
+        with open(entry.spool_path, "rb") as spool:
+            return self.preview_chunks(
+                spool, entry.filename, entry.tenant_id, entry.mime_type,
+                chunk_size or entry.chunk_size,
+                entry.chunk_overlap if chunk_overlap is None else chunk_overlap,
+                limit, offset
             )
-            
-            return documents
-            
-        except Exception as e:
-            print(f"Chunking error: {str(e)}")
-            return []
+
+    def iter_preview_chunks(
+        self,
+        file: BinaryIO,
+        filename: str,
+        tenant_id: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+    ) -> Iterator[Document]:
+        """Every chunk of the file, split lazily as the caller consumes them."""
+        splitter = self._splitter(chunk_size, chunk_overlap)
+        stream = extract_text(file, filename, mime_type)
+        try:
+            yield from splitter.split_documents_stream(stream, self._preview_metadata(filename, tenant_id))
+        finally:
+            stream.close()
+
+    @staticmethod
+    def _preview_metadata(filename: str, tenant_id: Optional[str]) -> dict:
+        return {
+            "source": filename or "preview",
+            "preview": True,
+            "tenant_id": tenant_id
+        }
+
+    def _splitter(self, chunk_size: Optional[int], chunk_overlap: Optional[int]) -> TextSplitter:
+        """The default splitter, or one for the requested chunk size and overlap."""
+        chunk_size = chunk_size or self.text_splitter.chunk_size
+        chunk_overlap = self.text_splitter.chunk_overlap if chunk_overlap is None else chunk_overlap
+        if chunk_size == self.text_splitter.chunk_size and chunk_overlap == self.text_splitter.chunk_overlap:
+            return self.text_splitter
+        if chunk_size <= 0 or chunk_overlap < 0 or chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be non-negative and smaller than a positive chunk_size")
+        return TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    @staticmethod
+    def _estimate_chunk_total(stream: TextStream, last: Document, splitter: TextSplitter) -> int:
+        """
+        Chunk count of a partly split document: its estimated length divided
+        by the distance between chunk starts seen so far.
+        """
+        total_chars = stream.chars / stream.fraction if stream.fraction > 0 else stream.chars
+        index = last.metadata["chunk_index"]
+        stride = last.metadata["start_offset"] / index if index else 0
+        if stride <= 0:
+            stride = splitter.chunk_size - splitter.chunk_overlap
+        return round(total_chars / stride)
 
     def process_file(
         self,
-        file_content: bytes,
+        file: BinaryIO,
         filename: str,
         tenant_id: str,
+        mime_type: Optional[str] = None,
     ) -> Tuple[bool, str]:
         try:
-            file_id = str(uuid.uuid4())
-            s3_filename = f"{tenant_id}/{file_id}_{filename}"
+            return True, self.ingest_file(file, filename, tenant_id, mime_type=mime_type)
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
+
+    def ingest_file(
+        self,
+        file: BinaryIO,
+        filename: str,
+        tenant_id: str,
+        progress: Optional[JobProgress] = None,
+        mime_type: Optional[str] = None,
+        chunks: Optional[Iterable[Tuple[str, int, int]]] = None,
+    ) -> str:
+        """
+        Upload the file to S3 and index it through the streaming pipeline,
+        returning the dataset id. ``file`` must be seekable; its text is
+        extracted by the extractor for its extension or ``mime_type`` and
+        streamed into the splitter, so its size does not affect memory use.
 
-            s3_success = self.s3_storage.save(s3_filename, file_content)
-            if not s3_success:
-                return False, "Failed to save file to S3"
+        Uploading the same content again after a failed attempt resumes that
+        dataset instead of starting over. ``chunks`` kept from a preview of
+        the file replace extraction and splitting.
+        """
+        get_extractor(filename, mime_type)
+        content_hash = hash_file(file)
+        dataset = self.dataset_repository.get_resumable(tenant_id, content_hash)
+
+        if dataset is not None:
+            logger.info("Resuming ingestion of dataset %s", dataset.id)
+        else:
+            file_id = str(uuid.uuid4())
+            s3_filename = self._store_upload(file, filename, tenant_id, content_hash)
 
             dataset = Dataset(
                 name=filename,
                 dataset_id=file_id,
                 s3_path=s3_filename,
-                tenant_id=tenant_id
+                tenant_id=tenant_id,
+                content_hash=content_hash,
+                indexing_status="indexing"
             )
 
-            db.add(dataset)
-            db.commit()
+            try:
+                db.add(dataset)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._release_upload(s3_filename)
+                raise
 
-            base_metadata = {
-                "source": filename,
-                "dataset_id": dataset.id,
-                "tenant_id": tenant_id
-            }
-            
-            documents = self.text_splitter.split_documents(
-                text=file_content.decode('utf-8'),
-                metadata=base_metadata
+        pieces = extract_text(file, filename, mime_type) if chunks is None else ()
+        self._index_dataset(dataset, pieces, progress, chunks)
+        return dataset.id
+
+    def resume_dataset(self, dataset_id: str, tenant_id: str, progress: Optional[JobProgress] = None) -> str:
+        """Finish indexing a dataset whose ingestion failed, reading the file back from S3."""
+        dataset = self.dataset_repository.get_by_id(dataset_id)
+        if not dataset or dataset.tenant_id != tenant_id:
+            raise ValueError("Dataset not found")
+        if dataset.indexing_status == "completed":
+            return dataset.id
+        if not dataset.content_hash or not self.s3_storage.exists(dataset.s3_path):
+            raise ValueError("Dataset cannot be resumed")
+
+        self._index_dataset(dataset, self._extract_stored(dataset), progress)
+        return dataset.id
+
+    def _extract_stored(self, dataset: Dataset) -> Iterator[str]:
+        """Text of a dataset's file in S3, by the extension of its name."""
+        extractor = get_extractor(dataset.name)
+        if not extractor.cpu_bound:
+            yield from decode_stream(self.s3_storage.load_stream(dataset.s3_path), "utf-8-sig")
+            return
+        # Other formats need random access, so the file is fetched in full first
+        with tempfile.NamedTemporaryFile(prefix="extract-", dir=config.INGESTION_SPOOL_DIR or None) as local:
+            if not self.s3_storage.download(dataset.s3_path, local.name):
+                raise RuntimeError("Failed to load file from S3")
+            with open(local.name, "rb") as file:
+                yield from extract_text(file, dataset.name)
+
+    def update_dataset(
+        self,
+        dataset_id: str,
+        file: BinaryIO,
+        tenant_id: str,
+        progress: Optional[JobProgress] = None,
+        filename: Optional[str] = None,
+        mime_type: Optional[str] = None,
+    ) -> str:
+        """
+        Replace a dataset's document with a new version, embedding only the
+        chunks whose text changed. Stored chunks with a matching doc_hash are
+        kept as they are and chunks that disappeared are deleted afterwards.
+        A failed or cancelled update deletes the chunks it added, leaving the
+        dataset on its previous version.
+        """
+        dataset = self.dataset_repository.get_by_id(dataset_id)
+        if not dataset or dataset.tenant_id != tenant_id:
+            raise ValueError("Dataset not found")
+        if dataset.indexing_status != "completed":
+            raise ValueError("Dataset is still being indexed")
+
+        # Text is extracted by the new file's type, which must match the
+        # dataset's name as the stored file is re-read under that name
+        filename = filename or dataset.name
+        if get_extractor(filename, mime_type) is not get_extractor(dataset.name):
+            raise ValueError("New document must have the same file type as the dataset")
+
+        content_hash = hash_file(file)
+        if content_hash == dataset.content_hash:
+            return dataset.id
+        if progress is not None:
+            progress.set_dataset(dataset.id)
+
+        s3_filename = self._store_upload(file, dataset.name, tenant_id, content_hash)
+
+        base_metadata = {
+            "source": dataset.name,
+            "dataset_id": dataset.id,
+            "tenant_id": tenant_id
+        }
+
+        vector = Vector(dataset=dataset, vector_type=VectorType.PGVECTOR)
+        diff = ChunkDiff(vector.get_doc_hashes())
+        pipeline = IngestionPipeline(vector, self.text_splitter)
+        try:
+            pipeline.run(
+                extract_text(file, filename, mime_type), base_metadata, on_progress=progress, chunk_filter=diff
             )
-            
-            for doc in documents:
-                doc.metadata["doc_id"] = str(uuid.uuid4())
-                doc.metadata["tenant_id"] = tenant_id
+        except Exception:
+            try:
+                self._delete_chunks(vector, diff.added_ids)
+            finally:
+                self._release_upload(s3_filename)
+            raise
 
-            vector = Vector(dataset=dataset)
-            vector.create(documents)
+        # Drop old chunks only once the new ones are searchable
+        vanished = diff.vanished_ids()
+        self._delete_chunks(vector, vanished)
+        logger.info(
+            "Updated dataset %s: %d chunks added, %d unchanged, %d removed",
+            dataset.id, diff.added, diff.unchanged, len(vanished),
+        )
 
-            return True, dataset.id
+        old_s3_path = dataset.s3_path
+        dataset.s3_path = s3_filename
+        dataset.content_hash = content_hash
+        db.commit()
+        self._release_upload(old_s3_path)
+        return dataset.id
 
-        except Exception as e:
-            db.rollback()
-            return False, str(e)
+    @staticmethod
+    def _delete_chunks(vector: Vector, ids: List[str]) -> None:
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            vector.delete_by_ids(ids[i:i + DELETE_BATCH_SIZE])
+
+    def _store_upload(self, file: BinaryIO, filename: str, tenant_id: str, content_hash: str) -> str:
+        """
+        Store an upload for a dataset and return its key, leaving the file
+        rewound. With STORAGE_CONTENT_ADDRESSED the key is the tenant's
+        content key: a file the tenant already stored is not uploaded again,
+        and every dataset using it holds a reference.
+        """
+        if not config.STORAGE_CONTENT_ADDRESSED:
+            key = f"{tenant_id}/{uuid.uuid4()}_{filename}"
+            if not self.s3_storage.save_stream(key, file):
+                raise RuntimeError("Failed to save file to S3")
+            file.seek(0)
+            return key
 
-    def get_chunk_preview(self, file_content: bytes, tenant_id: str) -> Tuple[bool, List[Document], str]:
+        key = self.s3_storage.content_key(content_hash, tenant_id)
+        size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+        # Referenced before the existence check, so the object cannot be released in between
+        self.storage_objects.acquire(key, size)
         try:
-            text_content = file_content.decode('utf-8')
-            chunks = self.preview_chunks(text_content, tenant_id)
-            return True, chunks, ""
-            
+            _, uploaded = self.s3_storage.save_content(file, content_hash, tenant_id)
+        except Exception:
+            self._release_upload(key)
+            raise
+        file.seek(0)
+        if not uploaded:
+            logger.info("Reusing stored file %s", key)
+        return key
+
+    def _release_upload(self, key: str) -> None:
+        """
+        Drop a dataset's reference to its stored file; the last reference
+        deletes it. Files under per-upload keys are never shared and are
+        deleted without touching storage_objects, so deployments that never
+        enabled STORAGE_CONTENT_ADDRESSED do not need migration 004.
+        """
+        if not self.s3_storage.is_content_key(key) or self.storage_objects.release(key, self._delete_object) is None:
+            self.s3_storage.delete(key)
+
+    def _delete_object(self, key: str) -> None:
+        if not self.s3_storage.delete(key):
+            raise RuntimeError(f"Failed to delete {key} from S3")
+
+    def _index_dataset(
+        self,
+        dataset: Dataset,
+        pieces: Iterable[str],
+        progress: Optional[JobProgress],
+        chunks: Optional[Iterable[Tuple[str, int, int]]] = None,
+    ) -> None:
+        """
+        Run the pipeline with a checkpoint so only chunks not stored by an
+        earlier attempt are embedded. A cancelled job leaves no dataset behind;
+        any other failure keeps it resumable.
+        """
+        if progress is not None:
+            progress.set_dataset(dataset.id)
+        dataset.indexing_status = "indexing"
+        db.commit()
+
+        base_metadata = {
+            "source": dataset.name,
+            "dataset_id": dataset.id,
+            "tenant_id": dataset.tenant_id
+        }
+
+        # The pipeline's store thread records checkpoints, so it gets its own session
+        checkpoint_session = SessionLocal()
+        try:
+            checkpoint = IngestionCheckpoint(
+                IngestionCheckpointRepository(checkpoint_session), dataset.id, dataset.content_hash
+            )
+            vector = Vector(dataset=dataset, vector_type=VectorType.PGVECTOR)
+            pipeline = IngestionPipeline(vector, self.text_splitter)
+            try:
+                pipeline.run(pieces, base_metadata, on_progress=progress, checkpoint=checkpoint, chunks=chunks)
+            except JobCancelled:
+                db.rollback()
+                vector.delete()
+                checkpoint.clear()
+                self._release_upload(dataset.s3_path)
+                db.delete(dataset)
+                db.commit()
+                raise
+            except Exception:
+                db.rollback()
+                dataset.indexing_status = "failed"
+                db.commit()
+                raise
+
+            dataset.indexing_status = "completed"
+            db.commit()
+            checkpoint.clear()
+        finally:
+            checkpoint_session.close()
+
+    def spool_upload(self, file: BinaryIO) -> str:
+        """Copy an upload to a temporary file a background job can read later."""
+        with tempfile.NamedTemporaryFile(
+            prefix="ingest-", dir=config.INGESTION_SPOOL_DIR or None, delete=False
+        ) as spool:
+            shutil.copyfileobj(file, spool, config.INGESTION_READ_SIZE)
+            return spool.name
+
+    def run_ingestion_job(self, job: dict, progress: JobProgress) -> None:
+        """
+        IngestionJobQueue handler: ingest, update or resume depending on the
+        job kind, in a database session of its own.
+        """
+        with session_scope():
+            if job["kind"] == JobKind.RESUME:
+                self.resume_dataset(job["dataset_id"], job["tenant_id"], progress)
+                return
+            with open(job["spool_path"], "rb") as file:
+                if job["kind"] == JobKind.UPDATE:
+                    self.update_dataset(
+                        job["dataset_id"], file, job["tenant_id"], progress, job["filename"], job["mime_type"]
+                    )
+                else:
+                    self.ingest_file(
+                        file, job["filename"], job["tenant_id"], progress, job["mime_type"],
+                        read_chunks(job["spool_path"])
+                    )
+
+    def discard_spool(self, job: dict) -> None:
+        """Remove a finished job's spooled upload."""
+        if job and job.get("spool_path"):
+            discard_files(job["spool_path"])
+
+    def get_chunk_preview(
+        self,
+        file: BinaryIO,
+        filename: str,
+        tenant_id: str,
+        mime_type: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[bool, Optional[ChunkPreview], str]:
+        try:
+            preview = self.preview_chunks(
+                file, filename, tenant_id, mime_type, chunk_size, chunk_overlap, limit, offset
+            )
+            return True, preview, ""
+
         except Exception as e:
-            return False, [], str(e)
+            return False, None, str(e)
 
     def get_datasets(self, tenant_id: str) -> List[dict]:
         try:
@@ -100,11 +534,18 @@ class FileService:
             print(f"Error retrieving datasets: {e}")
             return []
 
+    def get_dataset(self, dataset_id: str, tenant_id: str) -> Optional[dict]:
+        """The tenant's dataset as a dict, or None if it has no such dataset."""
+        dataset = self.dataset_repository.get_by_id(dataset_id)
+        if dataset is None or dataset.tenant_id != tenant_id:
+            return None
+        return dataset.to_dict()
+
     def delete_dataset(self, dataset_id: str, tenant_id: str) -> bool:
         try:
             dataset = self.dataset_repository.get_by_id(dataset_id)
             if dataset and dataset.tenant_id == tenant_id:
-                self.s3_storage.delete(dataset.s3_path)
+                self._release_upload(dataset.s3_path)
                 self.dataset_repository.delete(dataset_id)
                 return True
             return False
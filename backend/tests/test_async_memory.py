@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from core.entities import AssistantPromptMessage, UserPromptMessage
+from core.memory.async_memory import AsyncTokenBufferMemoryMongoDB
+
+START = datetime(2024, 1, 1)
+
+
+def _memory() -> AsyncTokenBufferMemoryMongoDB:
+    return AsyncTokenBufferMemoryMongoDB(AsyncMongoMockClient(), "test", "messages")
+
+
+def _message(i: int, token_count: int = 10) -> dict:
+    message = {"created_at": START + timedelta(seconds=i), "token_count": token_count}
+    if i % 2 == 0:
+        message.update(role="user", query=f"question {i}")
+    else:
+        message.update(role="assistant", answer=f"answer {i}")
+    return message
+
+
+def test_append_and_read_back():
+    async def run():
+        memory = _memory()
+        await memory.ensure_indexes()
+        for i in range(4):
+            await memory.save_message("c1", _message(i))
+        await memory.save_message("c2", _message(0))
+        return await memory.get_messages("c1"), await memory.get_history_prompt_text("c1")
+
+    messages, text = asyncio.run(run())
+
+    assert [type(m) for m in messages] == [UserPromptMessage, AssistantPromptMessage] * 2
+    assert [m.content for m in messages] == ["question 0", "answer 1", "question 2", "answer 3"]
+    assert text == "Human: question 0\nAssistant: answer 1\nHuman: question 2\nAssistant: answer 3"
+
+
+def test_token_count_is_stored_on_write():
+    async def run():
+        memory = _memory()
+        await memory.save_message("c1", {"role": "user", "query": "hello there", "created_at": START})
+        return await memory.collection.find_one({"conversation_id": "c1"})
+
+    document = asyncio.run(run())
+
+    assert document["token_count"] > 0
+
+
+def test_history_is_trimmed_to_the_token_budget():
+    async def run():
+        memory = _memory()
+        for i in range(10):
+            await memory.save_message("c1", _message(i))
+        return (
+            await memory.get_messages("c1", max_token_limit=35),
+            await memory.get_messages("c1", max_token_limit=1000, message_limit=3),
+        )
+
+    by_tokens, by_count = asyncio.run(run())
+
+    # Newest messages that fit in 35 tokens, oldest first
+    assert [m.content for m in by_tokens] == ["answer 7", "question 8", "answer 9"]
+    assert [m.content for m in by_count] == ["answer 7", "question 8", "answer 9"]
+
+
+def test_newest_message_is_kept_over_the_budget():
+    async def run():
+        memory = _memory()
+        await memory.save_message("c1", _message(0, token_count=5))
+        await memory.save_message("c1", _message(1, token_count=500))
+        return await memory.get_messages("c1", max_token_limit=100)
+
+    messages = asyncio.run(run())
+
+    assert [m.content for m in messages] == ["answer 1"]
+
+
+def test_concurrent_appends():
+    async def run():
+        memory = _memory()
+        await asyncio.gather(*(memory.save_message(f"c{i % 3}", _message(i)) for i in range(60)))
+        return [await memory.get_messages(f"c{n}", max_token_limit=10_000) for n in range(3)]
+
+    conversations = asyncio.run(run())
+
+    assert [len(messages) for messages in conversations] == [20, 20, 20]
+    for n, messages in enumerate(conversations):
+        expected = [_message(i)["query" if i % 2 == 0 else "answer"] for i in range(n, 60, 3)]
+        assert [m.content for m in messages] == expected
+
+
+def test_close():
+    async def run():
+        memory = _memory()
+        await memory.save_message("c1", _message(0))
+        await memory.close()
+
+    asyncio.run(run())
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from core.rag.embedding.embedding_coalescer import EmbeddingCoalescer
+
+
+class FakeEmbeddings:
+    def __init__(self, embed_documents):
+        self.embed_documents = embed_documents
+
+
+def _embed_concurrently(coalescer: EmbeddingCoalescer, texts: list) -> list:
+    results = [None] * len(texts)
+
+    def call(i):
+        try:
+            results[i] = coalescer.embed(texts[i])
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_calls_share_one_request():
+    calls = []
+
+    def embed_documents(texts):
+        calls.append(texts)
+        return [[float(text[1:])] for text in texts]
+
+    coalescer = EmbeddingCoalescer(FakeEmbeddings(embed_documents), max_wait=0.05)
+
+    results = _embed_concurrently(coalescer, ["t1", "t2", "t3", "t1"])
+
+    assert results == [[1.0], [2.0], [3.0], [1.0]]
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["t1", "t2", "t3"]
+
+
+def test_short_response_fails_every_caller():
+    coalescer = EmbeddingCoalescer(FakeEmbeddings(lambda texts: [[1.0]] * (len(texts) - 1)), max_wait=0.05)
+
+    results = _embed_concurrently(coalescer, ["a", "b", "c"])
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_callers_are_released_when_the_request_does_not_return():
+    def embed_documents(texts):
+        raise SystemExit
+
+    coalescer = EmbeddingCoalescer(FakeEmbeddings(embed_documents), max_wait=0.01)
+
+    with pytest.raises(RuntimeError):
+        coalescer.embed("a")
+
+
+def test_wait_is_bounded_by_the_timeout():
+    def embed_documents(texts):
+        time.sleep(1)
+        return [[1.0]] * len(texts)
+
+    coalescer = EmbeddingCoalescer(FakeEmbeddings(embed_documents), max_wait=0.01, timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        coalescer.embed("a")
@@ -0,0 +1,177 @@
+import threading
+import time
+
+import pytest
+
+from core.rag.ingestion.jobs import IngestionJobQueue, JobCancelled, JobKind, JobProgress, JobStatus, SQLiteJobStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def _wait_finished(queue: IngestionJobQueue, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if JobStatus(job["status"]).finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_claim_marks_the_oldest_job_running(db_path):
+    store = SQLiteJobStore(db_path)
+    first = store.create("t1", "a.txt", "/spool/a")
+    store.create("t1", "b.txt", "/spool/b")
+
+    claimed = store.claim_next(per_tenant_limit=1)
+
+    assert claimed["id"] == first["id"]
+    assert claimed["status"] == JobStatus.RUNNING.value
+    assert claimed["started_at"] is not None
+    # The tenant is at its limit, so the second job waits
+    assert store.claim_next(per_tenant_limit=1) is None
+    assert store.claim_next(per_tenant_limit=2)["filename"] == "b.txt"
+
+
+def test_tenant_limit_does_not_hold_back_other_tenants(db_path):
+    store = SQLiteJobStore(db_path)
+    store.create("t1", "a.txt", None)
+    store.create("t1", "b.txt", None)
+    other = store.create("t2", "c.txt", None)
+
+    store.claim_next(per_tenant_limit=1)
+
+    assert store.claim_next(per_tenant_limit=1)["id"] == other["id"]
+
+
+def test_complete_and_fail(db_path):
+    seen = []
+
+    def handler(job, progress):
+        progress("split", 3)
+        progress("embedded", 2)
+        if job["filename"] == "bad.txt":
+            raise ValueError("cannot parse")
+
+    queue = IngestionJobQueue(SQLiteJobStore(db_path), handler, workers=2, on_finished=seen.append)
+    queue.start()
+    try:
+        good = queue.submit("t1", "good.txt")
+        bad = queue.submit("t2", "bad.txt")
+        good = _wait_finished(queue, good["id"])
+        bad = _wait_finished(queue, bad["id"])
+    finally:
+        queue.shutdown(timeout=5)
+
+    assert good["status"] == JobStatus.SUCCEEDED.value
+    assert good["error"] is None
+    assert (good["chunks_split"], good["chunks_embedded"]) == (3, 2)
+    assert good["finished_at"] >= good["started_at"]
+
+    assert bad["status"] == JobStatus.FAILED.value
+    assert bad["error"] == "cannot parse"
+
+    assert sorted(job["filename"] for job in seen) == ["bad.txt", "good.txt"]
+
+
+def test_failed_job_is_retried_as_resume(db_path):
+    attempts = []
+
+    def handler(job, progress):
+        attempts.append(job["kind"])
+        progress.set_dataset("dataset-1")
+        if job["kind"] == JobKind.INGEST.value:
+            raise RuntimeError("embedding service unavailable")
+
+    queue = IngestionJobQueue(SQLiteJobStore(db_path), handler, workers=1)
+    queue.start()
+    try:
+        failed = _wait_finished(queue, queue.submit("t1", "a.txt")["id"])
+        retry = queue.submit("t1", "a.txt", dataset_id=failed["dataset_id"], kind=JobKind.RESUME)
+        retry = _wait_finished(queue, retry["id"])
+    finally:
+        queue.shutdown(timeout=5)
+
+    assert failed["status"] == JobStatus.FAILED.value
+    assert failed["dataset_id"] == "dataset-1"
+    assert retry["status"] == JobStatus.SUCCEEDED.value
+    assert attempts == [JobKind.INGEST.value, JobKind.RESUME.value]
+
+
+def test_stale_running_jobs_are_requeued_on_restart(db_path):
+    store = SQLiteJobStore(db_path)
+    job = store.create("t1", "a.txt", "/spool/a")
+    store.claim_next(per_tenant_limit=1)
+    store.add_progress(job["id"], "chunks_split", 10)
+    # The process dies with the job still running
+    del store
+
+    handled = []
+    queue = IngestionJobQueue(SQLiteJobStore(db_path), lambda job, progress: handled.append(job), workers=1)
+    queue.start()
+    try:
+        recovered = _wait_finished(queue, job["id"])
+    finally:
+        queue.shutdown(timeout=5)
+
+    assert recovered["status"] == JobStatus.SUCCEEDED.value
+    assert len(handled) == 1
+    # Progress restarts from zero along with the job
+    assert handled[0]["chunks_split"] == 0
+    assert handled[0]["spool_path"] == "/spool/a"
+
+
+def test_queued_jobs_survive_a_restart(db_path):
+    job = SQLiteJobStore(db_path).create("t1", "a.txt", "/spool/a")
+
+    store = SQLiteJobStore(db_path)
+
+    assert store.requeue_running() == 0
+    assert store.claim_next(per_tenant_limit=1)["id"] == job["id"]
+
+
+def test_cancel_queued_and_running_jobs(db_path):
+    started = threading.Event()
+
+    def handler(job, progress):
+        started.set()
+        while True:
+            progress("split", 1)
+            time.sleep(0.01)
+
+    seen = []
+    queue = IngestionJobQueue(SQLiteJobStore(db_path), handler, workers=1, on_finished=seen.append)
+    queue.start()
+    try:
+        running = queue.submit("t1", "a.txt")
+        queued = queue.submit("t1", "b.txt")
+        assert started.wait(5)
+
+        assert queue.cancel(queued["id"])["status"] == JobStatus.CANCELLED.value
+        queue.cancel(running["id"])
+        running = _wait_finished(queue, running["id"])
+    finally:
+        queue.shutdown(timeout=5)
+
+    assert running["status"] == JobStatus.CANCELLED.value
+    assert queue.cancel("missing") is None
+    assert [job["filename"] for job in seen] == ["b.txt", "a.txt"]
+
+
+def test_progress_raises_once_cancelled(db_path):
+    store = SQLiteJobStore(db_path)
+    job = store.create("t1", "a.txt", None)
+    store.claim_next(per_tenant_limit=1)
+    progress = JobProgress(store, job["id"])
+
+    progress("stored", 1)
+    store.request_cancel(job["id"])
+
+    with pytest.raises(JobCancelled):
+        progress("stored", 1)
+    assert store.get(job["id"])["chunks_stored"] == 2
+    with pytest.raises(ValueError):
+        store.add_progress(job["id"], "chunks_unknown", 1)
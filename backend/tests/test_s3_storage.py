@@ -0,0 +1,162 @@
+import asyncio
+import io
+import os
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from repository.s3_storage import MIN_PART_SIZE, S3Storage
+
+BUCKET = "test-bucket"
+PART_SIZE = MIN_PART_SIZE
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        s3 = S3Storage(BUCKET, "testing", "testing", "us-east-1", part_size=PART_SIZE, max_concurrency=3)
+        s3.s3_client.create_bucket(Bucket=BUCKET)
+        yield s3
+
+
+def _data(size: int) -> bytes:
+    # Every part differs, so parts stored out of order would not round trip
+    return b"".join(i.to_bytes(4, "big") for i in range(size // 4 + 1))[:size]
+
+
+def _uploads(s3: S3Storage) -> list:
+    return s3.s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", [])
+
+
+def _record_calls(monkeypatch, s3: S3Storage, method: str) -> list:
+    calls = []
+    original = getattr(s3.s3_client, method)
+
+    def wrapper(**kwargs):
+        calls.append(kwargs)
+        return original(**kwargs)
+
+    monkeypatch.setattr(s3.s3_client, method, wrapper)
+    return calls
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_small_file_is_a_single_put(storage, monkeypatch):
+    multipart = _record_calls(monkeypatch, storage, "create_multipart_upload")
+    data = _data(PART_SIZE - 1)
+
+    assert storage.save_stream("small", io.BytesIO(data))
+
+    assert storage.load_once("small") == data
+    assert multipart == []
+
+
+def test_empty_file(storage):
+    assert storage.save_stream("empty", io.BytesIO(b""))
+    assert storage.load_once("empty") == b""
+
+
+@pytest.mark.parametrize("size", [PART_SIZE, 2 * PART_SIZE])
+def test_exact_part_size_boundary(storage, monkeypatch, size):
+    parts = _record_calls(monkeypatch, storage, "upload_part")
+    data = _data(size)
+
+    assert storage.save_stream("boundary", io.BytesIO(data))
+
+    assert storage.load_once("boundary") == data
+    # No empty trailing part
+    assert len(parts) == size // PART_SIZE
+    assert all(len(call["Body"]) == PART_SIZE for call in parts)
+    assert _uploads(storage) == []
+
+
+def test_parts_keep_their_order_when_uploaded_concurrently(storage, monkeypatch):
+    original = storage._upload_part
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_first_parts(filename, upload_id, part_number, body):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            # Earlier parts finish last
+            time.sleep(0.2 / part_number)
+            return original(filename, upload_id, part_number, body)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(storage, "_upload_part", slow_first_parts)
+    data = _data(4 * PART_SIZE + 123)
+
+    assert storage.save_stream("multipart", io.BytesIO(data))
+
+    assert storage.load_once("multipart") == data
+    assert 1 < peak <= storage.max_concurrency
+    assert _uploads(storage) == []
+
+
+def test_failed_part_aborts_the_upload(storage, monkeypatch):
+    original = storage.s3_client.upload_part
+
+    def fail_second_part(**kwargs):
+        if kwargs["PartNumber"] == 2:
+            raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "UploadPart")
+        return original(**kwargs)
+
+    monkeypatch.setattr(storage.s3_client, "upload_part", fail_second_part)
+
+    assert not storage.save_stream("failed", io.BytesIO(_data(3 * PART_SIZE)))
+
+    assert _uploads(storage) == []
+    assert not storage.exists("failed")
+
+
+def test_async_stream_small_file(storage, monkeypatch):
+    multipart = _record_calls(monkeypatch, storage, "create_multipart_upload")
+    data = _data(PART_SIZE // 2)
+
+    assert asyncio.run(storage.save_async_stream("async-small", _chunks(data, 64 * 1024)))
+
+    assert storage.load_once("async-small") == data
+    assert multipart == []
+
+
+@pytest.mark.parametrize("size", [2 * PART_SIZE, 3 * PART_SIZE + 4096])
+def test_async_stream_multipart(storage, size):
+    data = _data(size)
+
+    # Chunks that do not divide the part size
+    assert asyncio.run(storage.save_async_stream("async-multipart", _chunks(data, 1024 * 1024 + 7)))
+
+    assert storage.load_once("async-multipart") == data
+    assert _uploads(storage) == []
+
+
+def test_async_stream_failed_part_aborts_the_upload(storage, monkeypatch):
+    original = storage.s3_client.upload_part
+
+    def fail_second_part(**kwargs):
+        if kwargs["PartNumber"] == 2:
+            raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "UploadPart")
+        return original(**kwargs)
+
+    monkeypatch.setattr(storage.s3_client, "upload_part", fail_second_part)
+    data = _data(3 * PART_SIZE)
+
+    assert not asyncio.run(storage.save_async_stream("async-failed", _chunks(data, 1024 * 1024)))
+
+    assert _uploads(storage) == []
+    assert not storage.exists("async-failed")
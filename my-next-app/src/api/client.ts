@@ -76,6 +76,19 @@ export const apiClient = {
     return handleResponse<T>(response);
   },
 
+  async putForm<T>(endpoint: string, formData: FormData): Promise<T> {
+    const token = getToken();
+    const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+      method: 'PUT',
+      credentials: 'include',
+      headers: {
+        Authorization: token ? `Bearer ${token}` : '',
+      },
+      body: formData,
+    });
+    return handleResponse<T>(response);
+  },
+
   async delete<T>(endpoint: string): Promise<T> {
     const token = getToken();
     const response = await fetch(`${API_BASE_URL}${endpoint}`, {
@@ -1,4 +1,4 @@
-import { apiClient } from '../client';
+import { APIError, apiClient } from '../client';
 
 // Data Models
 export interface FileChunk {
@@ -10,14 +10,36 @@ export interface FileChunk {
 export interface FilePreviewResponse {
   chunks: FileChunk[];
   total_chunks: number;
+  // total_chunks is extrapolated from the start of a large file
+  estimated: boolean;
+  // Stands for the uploaded file in processFile for a while after the preview
+  preview_token?: string;
 }
 
 export interface FileProcessResponse {
   success: boolean;
   dataset_id?: string;
+  job_id?: string;
+  status?: string;
   error?: string;
 }
 
+export interface IngestionJob {
+  id: string;
+  kind: 'ingest' | 'update' | 'resume';
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  filename: string;
+  dataset_id?: string;
+  chunks_split: number;
+  chunks_embedded: number;
+  chunks_stored: number;
+  cancel_requested: boolean;
+  error?: string;
+  created_at: number;
+  started_at?: number;
+  finished_at?: number;
+}
+
 export interface FileProcessRequest {
   tenant_id: string;
 }
@@ -27,6 +49,7 @@ export interface Dataset {
   tenant_id: string;
   created_by?: string;
   name?: string;
+  indexing_status?: 'indexing' | 'completed' | 'failed';
 }
 
 export interface DatasetRequest {
@@ -46,10 +69,15 @@ export const validateFile = (file: File) => {
   const MAX_SIZE = 10 * 1024 * 1024; // 10MB
   const ALLOWED_TYPES = [
     'text/plain',
+    'text/markdown',
+    'text/csv',
+    'text/html',
+    'application/json',
     'application/pdf',
-    'application/msword',
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
   ];
+  // Browsers often report no type or a generic one for these
+  const ALLOWED_EXTENSIONS = ['txt', 'md', 'markdown', 'csv', 'json', 'html', 'htm', 'pdf', 'docx'];
 
   if (!file) {
     throw new Error('No file selected');
@@ -59,7 +87,8 @@ export const validateFile = (file: File) => {
     throw new Error('File size exceeds 10MB limit');
   }
 
-  if (!ALLOWED_TYPES.includes(file.type)) {
+  const extension = file.name.split('.').pop()?.toLowerCase() ?? '';
+  if (!ALLOWED_TYPES.includes(file.type) && !ALLOWED_EXTENSIONS.includes(extension)) {
     throw new Error('Unsupported file type');
   }
 };
@@ -86,11 +115,41 @@ export const knowledgeApi = {
     return apiClient.postForm<FilePreviewResponse>('/api/knowledge/preview', formData);
   },
 
-  processFile: async (file: File, tenant_id: string = DEFAULT_TENANT_ID) => {
+  processFile: async (file: File, tenant_id: string = DEFAULT_TENANT_ID, previewToken?: string) => {
+    if (previewToken) {
+      const tokenData = new FormData();
+      tokenData.append('preview_token', previewToken);
+      tokenData.append('tenant_id', tenant_id);
+      try {
+        return await apiClient.postForm<FileProcessResponse>('/api/knowledge/process', tokenData);
+      } catch (err) {
+        // Only an expired or unknown preview falls back to uploading the file again
+        if (!(err instanceof APIError && err.status === 404)) {
+          throw err;
+        }
+      }
+    }
     validateFile(file);
     const formData = new FormData();
     formData.append('file', file);
     formData.append('tenant_id', tenant_id);
     return apiClient.postForm<FileProcessResponse>('/api/knowledge/process', formData);
-  }
+  },
+
+  updateDocument: async (id: string, file: File) => {
+    validateFile(file);
+    const formData = new FormData();
+    formData.append('file', file);
+    return apiClient.putForm<FileProcessResponse>(`/api/knowledge/datasets/${id}/document`, formData);
+  },
+
+  resumeDataset: (id: string) =>
+    apiClient.post<FileProcessResponse>(`/api/knowledge/datasets/${id}/resume`),
+
+  // Ingestion jobs
+  getJob: (id: string) =>
+    apiClient.get<IngestionJob>(`/api/knowledge/jobs/${id}`),
+
+  cancelJob: (id: string) =>
+    apiClient.post<IngestionJob>(`/api/knowledge/jobs/${id}/cancel`)
 };
\ No newline at end of file
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -8,9 +8,22 @@ import { useToast } from "@/hooks/use-toast";
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import { Progress } from '@/components/ui/progress';
 import { Upload, FileText, AlertCircle, Check, ArrowLeft } from 'lucide-react';
-import { knowledgeApi, DEFAULT_TENANT_ID, FilePreviewResponse, validateFile } from '@/api/endpoints/knowledge';
+import { knowledgeApi, DEFAULT_TENANT_ID, FilePreviewResponse, IngestionJob, validateFile } from '@/api/endpoints/knowledge';
 import Link from 'next/link';
 
+const JOB_POLL_INTERVAL = 1000;
+
+const JOB_STATUS_LABELS: Record<IngestionJob['status'], string> = {
+  queued: 'Waiting to start...',
+  running: 'Indexing document...',
+  succeeded: 'Indexing complete',
+  failed: 'Indexing failed',
+  cancelled: 'Indexing cancelled',
+};
+
+const isFinished = (status: IngestionJob['status']) =>
+  status === 'succeeded' || status === 'failed' || status === 'cancelled';
+
 export default function UploadPage() {
   const router = useRouter();
   const { toast } = useToast();
@@ -19,6 +32,28 @@ export default function UploadPage() {
   const [isUploading, setIsUploading] = useState(false);
   const [isProcessing, setIsProcessing] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [job, setJob] = useState<IngestionJob | null>(null);
+  // Stops polling once the page is left
+  const mounted = useRef(true);
+
+  useEffect(() => {
+    mounted.current = true;
+    return () => {
+      mounted.current = false;
+    };
+  }, []);
+
+  // Poll the ingestion job until it finishes, showing its progress
+  const waitForJob = async (jobId: string): Promise<IngestionJob | null> => {
+    while (mounted.current) {
+      const current = await knowledgeApi.getJob(jobId);
+      if (!mounted.current) break;
+      setJob(current);
+      if (isFinished(current.status)) return current;
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL));
+    }
+    return null;
+  };
 
   const handleFileSelect = async (file: File) => {
     setError(null);
@@ -59,18 +94,31 @@ export default function UploadPage() {
     if (!file) return;
     
     setIsProcessing(true);
+    setError(null);
+    setJob(null);
     try {
-      const response = await knowledgeApi.processFile(file, DEFAULT_TENANT_ID);
-      
-      if (response.success) {
-        toast({
-          title: 'Success',
-          description: 'File processed successfully',
-        });
-        router.push('/knowledge');
-      } else {
+      const response = await knowledgeApi.processFile(file, DEFAULT_TENANT_ID, preview?.preview_token);
+      if (!response.success) {
         throw new Error(response.error || 'Processing failed');
       }
+
+      // /process only queues the ingestion; its outcome comes from the job
+      if (response.job_id) {
+        const finished = await waitForJob(response.job_id);
+        if (!finished) return;
+        if (finished.status === 'failed') {
+          throw new Error(finished.error || 'Indexing failed');
+        }
+        if (finished.status === 'cancelled') {
+          throw new Error('Indexing was cancelled');
+        }
+      }
+
+      toast({
+        title: 'Success',
+        description: 'File processed successfully',
+      });
+      router.push('/knowledge');
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'Error processing file';
       setError(errorMessage);
@@ -99,7 +147,7 @@ export default function UploadPage() {
         <CardHeader>
           <CardTitle>Upload Dataset</CardTitle>
           <CardDescription>
-            Upload documents to train your AI assistant. Supported formats: PDF, DOC, DOCX, TXT (up to 10MB)
+            Upload documents to train your AI assistant. Supported formats: PDF, DOCX, TXT, Markdown, CSV, JSON, HTML (up to 10MB)
           </CardDescription>
         </CardHeader>
         <CardContent>
@@ -125,7 +173,7 @@ export default function UploadPage() {
                   id="file-upload"
                   className="hidden"
                   onChange={(e) => e.target.files?.[0] && handleFileSelect(e.target.files[0])}
-                  accept=".pdf,.doc,.docx,.txt"
+                  accept=".pdf,.docx,.txt,.md,.csv,.json,.html,.htm"
                 />
                 <label htmlFor="file-upload" className="cursor-pointer">
                   {file ? (
@@ -138,7 +186,7 @@ export default function UploadPage() {
                       <Upload className="h-8 w-8" />
                       <span>Drop your file here or click to browse</span>
                       <span className="text-sm text-muted-foreground">
-                        PDF, DOC, DOCX, or TXT up to 10MB
+                        PDF, DOCX, TXT, Markdown or HTML up to 10MB
                       </span>
                     </div>
                   )}
@@ -164,12 +212,32 @@ export default function UploadPage() {
               </div>
             )}
 
+            {/* Ingestion Job Status */}
+            {job && (
+              <div className="space-y-2">
+                <Progress
+                  value={
+                    job.status === 'succeeded'
+                      ? 100
+                      : job.chunks_split > 0
+                        ? (job.chunks_stored / job.chunks_split) * 100
+                        : 0
+                  }
+                  className="w-full"
+                />
+                <p className="text-sm text-center text-muted-foreground">
+                  {JOB_STATUS_LABELS[job.status]}
+                  {job.status === 'running' && ` (${job.chunks_stored} of ${job.chunks_split} chunks stored)`}
+                </p>
+              </div>
+            )}
+
             {/* Preview Section */}
             {preview && (
               <div className="space-y-4">
                 <div className="bg-muted rounded-lg p-4">
                   <div className="text-sm font-medium mb-2">
-                    Document Preview ({preview.total_chunks} chunks)
+                    Document Preview ({preview.estimated ? '~' : ''}{preview.total_chunks} chunks)
                   </div>
                   <div className="space-y-3 max-h-60 overflow-y-auto">
                     {preview.chunks.map((chunk) => (
@@ -178,7 +246,7 @@ export default function UploadPage() {
                         className="text-sm bg-background rounded p-2"
                       >
                         <div className="text-xs text-muted-foreground mb-1">
-                          Chunk {chunk.chunk_index + 1} of {chunk.chunk_total}
+                          Chunk {chunk.chunk_index + 1} of {preview.estimated ? '~' : ''}{chunk.chunk_total}
                         </div>
                         <div className="whitespace-pre-wrap">{chunk.content}</div>
                       </div>